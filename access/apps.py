@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class AccessConfig(AppConfig):
+    name = 'access'
+
+    def ready(self):
+        from access import signals  # noqa: F401
@@ -0,0 +1,31 @@
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from access.tokens import token_cache
+
+
+class AccessTokenAuthentication(BaseAuthentication):
+    """
+    `Authorization: Bearer <key>` for Admins and Customers. Sets
+    request.user to an access.tokens.Principal and request.auth to the key.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token header.")
+
+        principal = token_cache.resolve(key)
+        if principal is None:
+            raise exceptions.AuthenticationFailed("Invalid or expired token.")
+        return principal, key
+
+    def authenticate_header(self, request):
+        return self.keyword
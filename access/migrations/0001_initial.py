@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 15:46
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('custom_admin', '0003_unique_admin_identifier'),
+        ('customers', '0007_customer_otp_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessToken',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key_hash', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('revoked_at', models.DateTimeField(blank=True, null=True)),
+                ('admin', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='access_tokens', to='custom_admin.admin')),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='access_tokens', to='customers.customer')),
+            ],
+            options={
+                'verbose_name': 'Access Token',
+                'db_table': 'access_tokens',
+                'indexes': [models.Index(fields=['expires_at'], name='access_toke_expires_c63347_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('admin__isnull', False), ('customer__isnull', True)), models.Q(('admin__isnull', True), ('customer__isnull', False)), _connector='OR'), name='access_token_one_principal')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+import uuid
+from django.db import models
+
+
+class AccessToken(models.Model):
+    """
+    Bearer token of an Admin or a Customer. Only the SHA-256 of the key is
+    stored; the key itself is returned once, when the token is issued.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key_hash = models.CharField(max_length=64, unique=True)
+    admin = models.ForeignKey(
+        'custom_admin.Admin', on_delete=models.CASCADE, null=True, blank=True, related_name='access_tokens'
+    )
+    customer = models.ForeignKey(
+        'customers.Customer', on_delete=models.CASCADE, null=True, blank=True, related_name='access_tokens'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'access_tokens'
+        verbose_name = 'Access Token'
+        indexes = [
+            # Expired tokens are reaped through this index.
+            models.Index(fields=['expires_at']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(admin__isnull=False, customer__isnull=True)
+                    | models.Q(admin__isnull=True, customer__isnull=False)
+                ),
+                name='access_token_one_principal',
+            ),
+        ]
+
+    def __str__(self):
+        principal = f"admin {self.admin_id}" if self.admin_id else f"customer {self.customer_id}"
+        return f"Token for {principal} until {self.expires_at:%Y-%m-%d %H:%M}"
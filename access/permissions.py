@@ -0,0 +1,68 @@
+from rest_framework.permissions import BasePermission
+
+from access.tokens import Principal
+from shop.tenancy import get_current_shop_id
+
+
+def _principal(request, kind):
+    user = request.user
+    if isinstance(user, Principal) and user.kind == kind:
+        return user
+    return None
+
+
+class IsShopMember(BasePermission):
+    """
+    Admins linked to the shop of the request (see TenantMiddleware), and
+    staff users. Subclasses narrow it down to some roles.
+    """
+    message = "You are not a member of this shop."
+    roles = None
+
+    def has_permission(self, request, view):
+        return self.allows(request, get_current_shop_id())
+
+    def allows(self, request, shop_id):
+        """The same check for an explicit shop, e.g. one named in the body."""
+        if getattr(request.user, 'is_staff', False):
+            return True
+        admin = _principal(request, 'admin')
+        if admin is None or shop_id is None or not admin.can_access_shop(shop_id):
+            return False
+        return self.roles is None or admin.role in self.roles
+
+
+class IsShopCreator(IsShopMember):
+    message = "Only the shop's creators may do this."
+    roles = ('creator',)
+
+
+class IsAdmin(BasePermission):
+    """Any admin with a token, and staff users."""
+    message = "An admin token is required."
+
+    def has_permission(self, request, view):
+        return getattr(request.user, 'is_staff', False) or _principal(request, 'admin') is not None
+
+
+class IsSelfOrStaff(IsAdmin):
+    """Admins acting on their own account; staff on any."""
+    message = "Admins may only change their own account."
+
+    def has_object_permission(self, request, view, obj):
+        if getattr(request.user, 'is_staff', False):
+            return True
+        admin = _principal(request, 'admin')
+        return admin is not None and admin.id == obj.pk
+
+
+class IsCustomer(BasePermission):
+    """Customers with a token, of the current shop when one is resolved."""
+    message = "A customer token is required."
+
+    def has_permission(self, request, view):
+        customer = _principal(request, 'customer')
+        if customer is None:
+            return False
+        shop_id = get_current_shop_id()
+        return shop_id is None or customer.can_access_shop(shop_id)
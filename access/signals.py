@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from access.tokens import ADMIN, CUSTOMER, broadcast_change
+from admin.models import Admin
+from customers.models import Customer
+
+
+# ==========================================
+# CACHED PRINCIPAL INVALIDATION
+# ==========================================
+
+def _broadcast_on_commit(kind, principal_id):
+    transaction.on_commit(lambda: broadcast_change(kind, principal_id))
+
+
+@receiver([post_save, post_delete], sender=Admin)
+def broadcast_admin_change(sender, instance, **kwargs):
+    # Role changes and deleted accounts.
+    _broadcast_on_commit(ADMIN, instance.pk)
+
+
+@receiver(m2m_changed, sender=Admin.shop.through)
+def broadcast_admin_shops_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+    if not reverse:
+        if action != 'pre_clear':
+            _broadcast_on_commit(ADMIN, instance.pk)
+        return
+    # Changed from the shop side: shop.members.add(...) / .clear().
+    if action == 'pre_clear':
+        pk_set = set(instance.members.values_list('pk', flat=True))
+    for admin_id in pk_set or ():
+        _broadcast_on_commit(ADMIN, admin_id)
+
+
+@receiver([post_save, post_delete], sender=Customer)
+def broadcast_customer_change(sender, instance, **kwargs):
+    # Deactivated and deleted customers lose their tokens.
+    _broadcast_on_commit(CUSTOMER, instance.pk)
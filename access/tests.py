@@ -0,0 +1,278 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from access.models import AccessToken
+from access.tokens import TokenCache, is_shared, issue_token, revoke_token
+from admin.models import Admin
+from customers.models import Customer
+from details.models import Details
+from orders.models import Order
+from pre_registration.models import PreRegistration
+from products.models import Product
+from shop.models import Shop
+
+
+def bearer(client, key):
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {key}')
+    return client
+
+
+class AdminAccountAccessTests(TestCase):
+    """The members API: admins only, and each admin edits only themselves."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop, cls.other_shop = Shop.objects.create(), Shop.objects.create()
+        cls.owner = Admin.objects.create(identifier='owner@example.com', nickname='owner', password='secret')
+        cls.colleague = Admin.objects.create(identifier='colleague@example.com', nickname='colleague', password='$unusable')
+        cls.stranger = Admin.objects.create(identifier='stranger@example.com', nickname='stranger', password='$unusable')
+        cls.owner.shop.add(cls.shop)
+        cls.colleague.shop.add(cls.shop)
+        cls.stranger.shop.add(cls.other_shop)
+        cls.customer, _ = Customer.objects.register(cls.shop.pk, 'customer-secret', email='buyer@example.com')
+
+    def client_for(self, principal):
+        client = bearer(APIClient(), issue_token(principal)[0])
+        client.get('/api/auth/token/')  # resolves the token once, like a warm worker
+        return client
+
+    def test_customer_token_cannot_list_or_change_admins(self):
+        client = self.client_for(self.customer)
+        self.assertEqual(client.get('/api/admin/members/').status_code, 403)
+        self.assertEqual(client.get(f'/api/admin/members/{self.owner.pk}/').status_code, 403)
+        response = client.patch(f'/api/admin/members/{self.owner.pk}/', {'password': 'taken-over'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(client.delete(f'/api/admin/members/{self.owner.pk}/').status_code, 403)
+
+        login = APIClient().post('/api/admin/members/login/', {
+            'identifier': 'owner@example.com', 'password': 'secret',
+        }, format='json')
+        self.assertEqual(login.status_code, 200, login.content)
+
+    def test_anonymous_callers_are_rejected(self):
+        client = APIClient()
+        self.assertIn(client.get('/api/admin/members/').status_code, (401, 403))
+        response = client.patch(f'/api/admin/members/{self.owner.pk}/', {'password': 'x'}, format='json')
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_admins_list_themselves_and_their_shop_members_only(self):
+        response = self.client_for(self.owner).get('/api/admin/members/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {row['identifier'] for row in response.json()['results']},
+            {'owner@example.com', 'colleague@example.com'},
+        )
+        self.assertEqual(self.client_for(self.owner).get(f'/api/admin/members/{self.stranger.pk}/').status_code, 404)
+
+    def test_admins_only_change_their_own_account(self):
+        client = self.client_for(self.owner)
+        response = client.patch(f'/api/admin/members/{self.colleague.pk}/', {'nickname': 'renamed'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(client.delete(f'/api/admin/members/{self.colleague.pk}/').status_code, 403)
+        self.assertEqual(
+            client.patch(f'/api/admin/members/{self.stranger.pk}/', {'nickname': 'x'}, format='json').status_code, 404,
+        )
+        self.colleague.refresh_from_db()
+        self.assertEqual(self.colleague.nickname, 'colleague')
+
+        response = client.patch(f'/api/admin/members/{self.owner.pk}/', {'nickname': 'renamed'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.owner.refresh_from_db()
+        self.assertEqual(self.owner.nickname, 'renamed')
+        # Saving the account must not hash the stored hash again.
+        login = APIClient().post('/api/admin/members/login/', {
+            'identifier': 'owner@example.com', 'password': 'secret',
+        }, format='json')
+        self.assertEqual(login.status_code, 200, login.content)
+
+
+class ShopMembershipTests(TestCase):
+    """Signup only claims shops without members; creators add everyone else."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        cls.creator = Admin.objects.create(
+            identifier='creator@example.com', nickname='creator', password='$unusable', role='creator',
+        )
+        cls.creator.shop.add(cls.shop)
+
+    def signup(self, identifier, shops):
+        PreRegistration.objects.create(
+            identifier=identifier, otp='123456', otp_expires_at=timezone.now() + timedelta(minutes=15),
+        )
+        return APIClient().post('/api/admin/members/', {
+            'identifier': identifier, 'otp': '123456', 'password': 'secret',
+            'shop': [str(shop.pk) for shop in shops],
+        }, format='json')
+
+    def link(self, principal, identifier, method='post'):
+        client = bearer(APIClient(), issue_token(principal)[0])
+        return getattr(client, method)('/api/admin/members/link-shop/', {
+            'identifier': identifier, 'shop_id': str(self.shop.pk),
+        }, format='json')
+
+    def test_signup_cannot_join_a_shop_with_members(self):
+        response = self.signup('intruder@example.com', [self.shop])
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertFalse(Admin.objects.filter(identifier='intruder@example.com').exists())
+        self.assertEqual(list(self.shop.members.all()), [self.creator])
+
+    def test_signup_claims_new_shops_as_their_creator(self):
+        new_shop = Shop.objects.create()
+        response = self.signup('founder@example.com', [new_shop])
+        self.assertEqual(response.status_code, 201, response.content)
+        founder = Admin.objects.get(identifier='founder@example.com')
+        self.assertEqual(founder.role, 'creator')
+        self.assertEqual(list(founder.shop.all()), [new_shop])
+
+    def test_members_cannot_add_themselves_to_shops(self):
+        handler = Admin.objects.create(identifier='handler@example.com', nickname='handler', password='$unusable')
+        client = bearer(APIClient(), issue_token(handler)[0])
+        response = client.patch(
+            f'/api/admin/members/{handler.pk}/', {'shop': [str(self.shop.pk)]}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.link(handler, 'handler@example.com').status_code, 403)
+        self.assertFalse(handler.shop.exists())
+
+    def test_creator_adds_and_removes_members(self):
+        handler = Admin.objects.create(identifier='handler@example.com', nickname='handler', password='$unusable')
+        response = self.link(self.creator, 'handler@example.com')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['user']['shop_ids'], [str(self.shop.pk)])
+        # A handler of the shop may not add or remove members either.
+        Admin.objects.create(identifier='other@example.com', nickname='other', password='$unusable')
+        self.assertEqual(self.link(handler, 'other@example.com').status_code, 403)
+
+        response = self.link(self.creator, 'handler@example.com', method='delete')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(handler.shop.exists())
+
+
+class CheckoutAccessTests(TestCase):
+    """Customers check out as themselves, in their own shop only."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop, cls.other_shop = Shop.objects.create(), Shop.objects.create()
+        cls.customer, _ = Customer.objects.register(cls.shop.pk, 'customer-secret', email='buyer@example.com')
+        cls.product = Product.objects.create(shop=cls.shop, name='mug', price=Decimal('4'), stock=3)
+        cls.other_product = Product.objects.create(shop=cls.other_shop, name='pan', price=Decimal('9'), stock=3)
+
+    def checkout(self, client, product, **extra):
+        return client.post('/api/orders/checkout/', {
+            'items': [{'product': str(product.pk), 'quantity': 1}], **extra,
+        }, format='json')
+
+    def test_anonymous_and_admin_callers_are_rejected(self):
+        self.assertIn(self.checkout(APIClient(), self.product).status_code, (401, 403))
+        admin = Admin.objects.create(identifier='owner@example.com', nickname='owner', password='$unusable')
+        admin.shop.add(self.shop)
+        self.assertEqual(self.checkout(bearer(APIClient(), issue_token(admin)[0]), self.product).status_code, 403)
+        self.assertFalse(Order.objects.exists())
+
+    def test_customers_order_as_themselves_in_their_shop(self):
+        client = bearer(APIClient(), issue_token(self.customer)[0])
+        # A shop id or identifier in the body no longer chooses the buyer.
+        response = self.checkout(
+            client, self.other_product, shop_id=str(self.other_shop.pk), identifier=self.customer.identifier,
+        )
+        self.assertNotEqual(response.status_code, 201, response.content)
+        self.assertFalse(Order.objects.filter(shop=self.other_shop).exists())
+
+        response = self.checkout(client, self.product)
+        self.assertEqual(response.status_code, 201, response.content)
+        order = Order.objects.get()
+        self.assertEqual((order.shop_id, order.customer_id), (self.shop.pk, self.customer.pk))
+
+
+class TokenCacheInvalidationTests(TestCase):
+    """
+    Two TokenCache instances stand in for two workers sharing
+    ACCESS_TOKEN_CACHE: a change made through one must reach the other.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        cls.admin = Admin.objects.create(identifier='owner@example.com', nickname='owner', password='$unusable')
+        cls.admin.shop.add(cls.shop)
+        cls.customer, _ = Customer.objects.register(cls.shop.pk, 'customer-secret', email='buyer@example.com')
+
+    def warm(self, key):
+        workers = TokenCache(), TokenCache()
+        for worker in workers:
+            self.assertIsNotNone(worker.resolve(key))
+        with self.assertNumQueries(0):
+            workers[1].resolve(key)
+        return workers
+
+    def test_revocation_reaches_every_worker(self):
+        key, _ = issue_token(self.customer)
+        workers = self.warm(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(revoke_token(key))
+        self.assertEqual([worker.resolve(key) for worker in workers], [None, None])
+
+    def test_shop_link_changes_reach_every_worker(self):
+        key, _ = issue_token(self.admin)
+        workers = self.warm(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.shop.remove(self.shop)
+        self.assertEqual([worker.resolve(key).shop_ids for worker in workers], [frozenset(), frozenset()])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shop.members.add(self.admin)
+        self.assertEqual([worker.resolve(key).shop_ids for worker in workers], [{self.shop.pk}] * 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shop.members.clear()
+        self.assertFalse(workers[1].resolve(key).can_access_shop(self.shop.pk))
+
+    @override_settings(ACCESS_TOKEN_CACHE='default')
+    def test_process_local_backend_reads_the_database(self):
+        self.assertFalse(is_shared(caches['default']))
+        key, _ = issue_token(self.customer)
+        worker = TokenCache()
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertIsNotNone(worker.resolve(key))
+        # Revoked without a broadcast another worker could hear.
+        AccessToken.objects.update(revoked_at=timezone.now())
+        self.assertIsNone(worker.resolve(key))
+
+
+class StorefrontWriteAccessTests(TestCase):
+    """Details and images of a shop are changed by its own admins only."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop, cls.other_shop = Shop.objects.create(), Shop.objects.create()
+        cls.owner = Admin.objects.create(identifier='owner@example.com', nickname='owner', password='$unusable')
+        cls.owner.shop.add(cls.shop)
+        cls.stranger = Admin.objects.create(identifier='stranger@example.com', nickname='stranger', password='$unusable')
+        cls.stranger.shop.add(cls.other_shop)
+        cls.customer, _ = Customer.objects.register(cls.other_shop.pk, 'customer-secret', email='buyer@example.com')
+
+    def patch(self, principal, path, data):
+        client = bearer(APIClient(), issue_token(principal)[0])
+        return client.patch(f'/api/{path}/{self.shop.pk}/', data, format='json')
+
+    def test_customers_and_other_shops_cannot_edit_details_or_images(self):
+        for principal in (self.customer, self.stranger):
+            response = self.patch(principal, 'details', {'title': 'Taken', 'url': 'taken-over'})
+            self.assertEqual(response.status_code, 403, response.content)
+            self.assertEqual(self.patch(principal, 'image', {}).status_code, 403)
+        details = Details.objects.get(shop=self.shop)
+        self.assertNotEqual(details.url, 'taken-over')
+
+    def test_members_edit_their_shop(self):
+        response = self.patch(self.owner, 'details', {'title': 'Renamed'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(Details.objects.get(shop=self.shop).title, 'Renamed')
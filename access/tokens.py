@@ -0,0 +1,252 @@
+import hashlib
+import secrets
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+
+from shop.profile import LRUCache
+
+ADMIN = 'admin'
+CUSTOMER = 'customer'
+
+
+# ==========================================
+# 1. PRINCIPALS
+# ==========================================
+
+class Principal:
+    """
+    The authenticated Admin or Customer behind a token, as `request.user`.
+    Carries everything permission checks need (kind, role, shops), so they
+    never go back to the database.
+    """
+    is_authenticated = True
+    is_anonymous = False
+    is_staff = False
+    is_superuser = False
+
+    def __init__(self, kind, id, token_id, expires_at, shop_ids=(), role=None, identifier=None):
+        self.kind = kind
+        self.id = id
+        self.token_id = token_id
+        self.expires_at = expires_at
+        self.shop_ids = frozenset(shop_ids)
+        self.role = role
+        self.identifier = identifier
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def is_admin(self):
+        return self.kind == ADMIN
+
+    @property
+    def is_customer(self):
+        return self.kind == CUSTOMER
+
+    @property
+    def shop_id(self):
+        """The shop a customer belongs to (admins may have several)."""
+        if self.is_customer:
+            return next(iter(self.shop_ids), None)
+        return None
+
+    def can_access_shop(self, shop_id):
+        try:
+            return uuid.UUID(str(shop_id)) in self.shop_ids
+        except ValueError:
+            return False
+
+    def __str__(self):
+        return f"{self.kind} {self.id}"
+
+
+def principal_of(obj):
+    """(kind, id) of an Admin or Customer instance."""
+    from admin.models import Admin
+
+    return (ADMIN if isinstance(obj, Admin) else CUSTOMER), obj.pk
+
+
+# ==========================================
+# 2. VERSIONS (REVOCATION BROADCAST)
+# ==========================================
+
+def _backend():
+    return caches[getattr(settings, 'ACCESS_TOKEN_CACHE', 'default')]
+
+
+def is_shared(cache):
+    """False for backends that live inside one process (locmem, dummy)."""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def _version_key(kind, principal_id):
+    return f"access:version:{kind}:{principal_id}"
+
+
+def get_version(kind, principal_id):
+    """
+    Current version of a principal's permissions, shared by all processes
+    through the cache backend. Random tokens, like shop profile versions,
+    so an evicted key can never bring back a stale entry.
+    """
+    cache = _backend()
+    key = _version_key(kind, principal_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def broadcast_change(kind, principal_id):
+    """
+    Moves the principal to a fresh version. Every process compares its
+    cached entries against the shared version on each request, so revoked
+    tokens and changed shop links stop working everywhere at once.
+    """
+    _backend().set(_version_key(kind, principal_id), uuid.uuid4().hex, None)
+
+
+# ==========================================
+# 3. ISSUING & REVOKING
+# ==========================================
+
+def hash_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue_token(obj, ttl=None):
+    """Creates a token for an Admin or Customer. Returns (key, AccessToken)."""
+    from access.models import AccessToken
+
+    kind, _ = principal_of(obj)
+    ttl = ttl or getattr(settings, 'ACCESS_TOKEN_TTL', 14 * 24 * 3600)
+    key = secrets.token_urlsafe(32)
+    token = AccessToken.objects.create(
+        key_hash=hash_key(key),
+        expires_at=timezone.now() + timedelta(seconds=ttl),
+        **{kind: obj},
+    )
+    return key, token
+
+
+def revoke_token(key):
+    """Revokes one token. Returns False if it was unknown or already revoked."""
+    from access.models import AccessToken
+
+    token = (
+        AccessToken.objects.filter(key_hash=hash_key(key), revoked_at__isnull=True)
+        .values('id', 'admin_id', 'customer_id').first()
+    )
+    if token is None:
+        return False
+    AccessToken.objects.filter(pk=token['id']).update(revoked_at=timezone.now())
+    kind = ADMIN if token['admin_id'] else CUSTOMER
+    principal_id = token['admin_id'] or token['customer_id']
+    transaction.on_commit(lambda: broadcast_change(kind, principal_id))
+    return True
+
+
+def revoke_all(kind, principal_id):
+    """Revokes every live token of a principal. Returns the count."""
+    from access.models import AccessToken
+
+    revoked = AccessToken.objects.filter(
+        **{f'{kind}_id': principal_id}, revoked_at__isnull=True
+    ).update(revoked_at=timezone.now())
+    transaction.on_commit(lambda: broadcast_change(kind, principal_id))
+    return revoked
+
+
+# ==========================================
+# 4. CACHED RESOLUTION
+# ==========================================
+
+def load_principal(key_hash):
+    """
+    Token hash -> Principal from the database: the token with its owner in
+    one query, plus one for an admin's shop ids. None if the token is
+    unknown, revoked or expired, or its owner can no longer sign in.
+    """
+    from access.models import AccessToken
+    from shop.models import Shop
+
+    token = (
+        AccessToken.objects.select_related('admin', 'customer')
+        .filter(key_hash=key_hash, revoked_at__isnull=True, expires_at__gt=timezone.now())
+        .first()
+    )
+    if token is None:
+        return None
+    if token.admin_id:
+        admin = token.admin
+        shop_ids = Shop.objects.filter(members=admin).values_list('id', flat=True)
+        return Principal(
+            ADMIN, admin.pk, token.pk, token.expires_at,
+            shop_ids=shop_ids, role=admin.role, identifier=admin.identifier,
+        )
+    customer = token.customer
+    if not customer.is_active:
+        return None
+    return Principal(
+        CUSTOMER, customer.pk, token.pk, token.expires_at,
+        shop_ids=[customer.shop_id], identifier=customer.identifier,
+    )
+
+
+class TokenCache:
+    """
+    In-process map from token hash to Principal. An entry is served while
+    its TTL lasts and the principal's shared version is unchanged, so an
+    authenticated request costs one cache lookup and no query.
+
+    With a process-local ACCESS_TOKEN_CACHE a broadcast never leaves the
+    worker that sent it, so nothing is cached and every request loads the
+    token from the database instead of trusting a stale entry.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.ttl = ttl
+        self._cache = LRUCache(maxsize)
+
+    def resolve(self, key):
+        """Token key -> Principal, or None when it does not authenticate."""
+        key_hash = hash_key(key)
+        if not is_shared(_backend()):
+            return load_principal(key_hash)
+        entry = self._cache.get(key_hash)
+        if entry is not None:
+            principal, version, fresh_until = entry
+            if (
+                fresh_until > time.monotonic()
+                and principal.expires_at > timezone.now()
+                and version == get_version(principal.kind, principal.id)
+            ):
+                return principal
+            self._cache.delete(key_hash)
+
+        principal = load_principal(key_hash)
+        if principal is not None:
+            version = get_version(principal.kind, principal.id)
+            self._cache.set(key_hash, (principal, version, time.monotonic() + self.ttl))
+        return principal
+
+    def clear(self):
+        self._cache.clear()
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, 'ACCESS_TOKEN_LRU_SIZE', 10000),
+    ttl=getattr(settings, 'ACCESS_TOKEN_CACHE_TTL', 300),
+)
@@ -0,0 +1,35 @@
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from access.authentication import AccessTokenAuthentication
+from access.tokens import revoke_all, revoke_token
+
+
+class TokenView(APIView):
+    """
+    The caller's own token.
+    URL: GET    /api/auth/token/            -> who the token belongs to
+         DELETE /api/auth/token/[?all=1]    -> revoke it (or all of the owner's)
+    """
+    authentication_classes = [AccessTokenAuthentication]
+
+    def get(self, request):
+        user = request.user
+        return Response({
+            "kind": user.kind,
+            "id": user.id,
+            "identifier": user.identifier,
+            "role": user.role,
+            "shop_ids": sorted(str(shop_id) for shop_id in user.shop_ids),
+            "expires_at": user.expires_at,
+        })
+
+    def delete(self, request):
+        if request.query_params.get('all') in ('1', 'true'):
+            revoked = revoke_all(request.user.kind, request.user.id)
+        else:
+            revoked = int(revoke_token(request.auth))
+        if not revoked:
+            raise exceptions.NotAuthenticated("Token already revoked.")
+        return Response({"revoked": revoked}, status=status.HTTP_200_OK)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_admin', '0001_initial'),
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='admin',
+            index=models.Index(fields=['created_at', 'id'], name='admin_created_9c4e23_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_admin', '0002_admin_keyset_index'),
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='admin',
+            constraint=models.UniqueConstraint(fields=('identifier',), name='unique_admin_identifier'),
+        ),
+    ]
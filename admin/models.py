@@ -1,7 +1,7 @@
 import uuid
 from django.db import models
 from django.core.validators import RegexValidator
-from django.contrib.auth.hashers import make_password
+from django.contrib.auth.hashers import identify_hasher, make_password
 
 from shop.models import Shop
 
@@ -10,7 +10,7 @@ class Admin(models.Model):  # Renamed for clarity
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     shop = models.ManyToManyField('shop.Shop', related_name='members', blank=True)
     nickname = models.CharField(max_length=50)
-    identifier = models.EmailField()  # Removed unique=True; enforced via unique_together
+    identifier = models.EmailField()  # unique, see Meta.constraints
     password = models.CharField(max_length=128)
     otp = models.CharField(max_length=6, default='', validators=[RegexValidator(r'^\d{4,6}$', 'OTP must be 4-6 digits')])  # Changed to CharField with validation
     is_verified = models.BooleanField(default=False)
@@ -22,12 +22,24 @@ class Admin(models.Model):  # Renamed for clarity
     class Meta:
         db_table = 'admin'
         verbose_name = 'Admin'
-        pass
+        indexes = [
+            # Keyset pagination of the members list.
+            models.Index(fields=['created_at', 'id']),
+        ]
+        constraints = [
+            # Signup inserts and lets this reject duplicates, no exists() first.
+            models.UniqueConstraint(fields=['identifier'], name='unique_admin_identifier'),
+        ]
+
     def save(self, *args, **kwargs):
+        # Hash raw passwords only; an encoded one must survive later saves.
         if self.password and not self.password.startswith('$'):
-            self.password = make_password(self.password)
+            try:
+                identify_hasher(self.password)
+            except ValueError:
+                self.password = make_password(self.password)
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.nickname} ({self.role}) @ {self.shop.title}"
+        return f"{self.nickname} ({self.role}) <{self.identifier}>"
 
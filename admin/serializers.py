@@ -1,3 +1,4 @@
+from django.db.models import Exists, OuterRef
 from rest_framework import serializers
 
 from shop.models import Shop
@@ -6,25 +7,79 @@ from .models import Admin
 class AdminSerializer(serializers.ModelSerializer):
     otp = serializers.CharField(write_only=True, required=False, allow_null=True)
     password = serializers.CharField(write_only=True, required=False)
-    nickname = serializers.CharField(required=False, allow_blank=True)
-    shop = serializers.PrimaryKeyRelatedField(
-        queryset=Shop.objects.all(), 
-        many=True,
-        required=True
+    nickname = serializers.CharField(required=False, allow_blank=True, default='')
+    # Plain ids validated with one query for the whole list, instead of a
+    # PrimaryKeyRelatedField lookup per shop. Only shops nobody belongs to
+    # yet can be claimed at signup; joining a shop with members takes one
+    # of its creators (AdminViewSet.link_shop).
+    shop = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        write_only=True,
     )
-    shop_id=serializers.CharField(read_only=True,required=False)
+    # Memberships are returned as a flat id list, read from the view's
+    # prefetch instead of one query per admin.
+    shop_ids = serializers.PrimaryKeyRelatedField(source='shop', many=True, read_only=True)
     class Meta:
         model = Admin
         # Fields to include in the API
-        fields = ['id', 'identifier', 'otp', 'password', 'nickname', 'shop', 'created_at', 'updated_at','shop_id']
+        fields = ['id', 'identifier', 'otp', 'password', 'nickname', 'shop', 'shop_ids', 'created_at', 'updated_at']
         
         # 'shop' must be read_only so .save() doesn't look for it in request.data
         read_only_fields = ("id", "created_at", "updated_at")
         
         extra_kwargs = {
             'password': {'write_only': True},
+            # The unique constraint rejects duplicates on insert; a
+            # UniqueValidator would cost an extra query per signup.
+            'identifier': {'validators': []},
         }
     def validate(self, data):
         identifier = data.get('identifier')
         otp= data.get('otp')
-        return data       
\ No newline at end of file
+        return data
+
+    def validate_shop(self, value):
+        if self.instance is not None:
+            raise serializers.ValidationError("Memberships are managed by the shops' creators.")
+        wanted = list(dict.fromkeys(value))
+        shops = list(
+            Shop.objects.filter(pk__in=wanted).only('id')
+            .annotate(claimed=Exists(Admin.shop.through.objects.filter(shop_id=OuterRef('pk'))))
+        )
+        missing = set(wanted) - {shop.pk for shop in shops}
+        if missing:
+            raise serializers.ValidationError(f"Unknown shop(s): {', '.join(sorted(map(str, missing)))}")
+        claimed = sorted(str(shop.pk) for shop in shops if shop.claimed)
+        if claimed:
+            raise serializers.ValidationError(
+                f"Shop(s) already have members, ask one of their creators to add you: {', '.join(claimed)}"
+            )
+        return shops
+
+    def create(self, validated_data):
+        shops = validated_data.pop('shop', [])
+        validated_data.pop('otp', None)
+        # Whoever claims new shops at signup is their creator.
+        admin = Admin.objects.create(**validated_data, role='creator' if shops else 'handler')
+        link_shops(admin, shops)
+        return admin
+
+    def update(self, instance, validated_data):
+        validated_data.pop('otp', None)
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.save()
+        return instance
+
+
+def link_shops(admin, shops):
+    """
+    Links a new admin to `shops` with one bulk INSERT into the through
+    table, and primes the relation cache so rendering costs no query.
+    """
+    through = Admin.shop.through
+    through.objects.bulk_create([through(admin_id=admin.pk, shop_id=shop.pk) for shop in shops])
+    cached = Shop.objects.filter(pk__in=[shop.pk for shop in shops])
+    cached._result_cache, cached._prefetch_done = list(shops), True
+    admin._prefetched_objects_cache = {'shop': cached}
@@ -1,3 +1,145 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from pre_registration.models import PreRegistration
+from shop.models import Shop
+from .models import Admin
+
+
+class AdminListQueryBudgetTests(TestCase):
+    """The members list must not issue a query per admin."""
+
+    # Page of admins + one prefetch of their memberships.
+    QUERY_BUDGET = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('staff', password='unused', is_staff=True)
+        shops = [Shop.objects.create() for _ in range(3)]
+        for index in range(25):
+            admin = Admin.objects.create(
+                identifier=f'admin{index}@example.com', nickname=f'admin{index}',
+                password='$unusable',  # skip hashing, irrelevant here
+            )
+            admin.shop.set(shops[:index % 3 + 1])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # The first request builds the middleware stack, which warms caches.
+        self.client.get('/api/admin/members/')
+
+    def test_list_stays_within_budget(self):
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get('/api/admin/members/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 25)
+
+    def test_budget_does_not_grow_with_page_size(self):
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get('/api/admin/members/', {'page_size': 5})
+        page = response.json()
+        self.assertEqual(len(page['results']), 5)
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            self.client.get(page['next'])
+
+    def test_memberships_are_flat_shop_ids(self):
+        response = self.client.get('/api/admin/members/', {'page_size': 200})
+        for row in response.json()['results']:
+            self.assertNotIn('shop', row)
+            self.assertEqual(len(row['shop_ids']), int(row['nickname'][5:]) % 3 + 1)
+
+
+# OTP requests spend from the rate-limit buckets; keep them out of the
+# shared cache, which outlives the test database.
+@override_settings(RATE_LIMIT_CACHE=None)
+class AdminSignupTests(TestCase):
+    """
+    Both phases of signup post to the same route, so they share its
+    telemetry budget ('POST admin-member-list' in TELEMETRY_BUDGETS).
+    Phase 1 issues the OTP; phase 2 consumes it, inserts the admin and
+    links its shops.
+    """
+
+    # Phase 2 runs four statements: DELETE pre-registration, SELECT shops,
+    # INSERT admin, INSERT memberships. Inside the test transaction its
+    # atomic block adds a savepoint pair, hence six.
+    QUERY_BUDGET = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shops = [Shop.objects.create() for _ in range(5)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.get('/api/admin/members/')  # builds the middleware stack
+
+    def pending(self, identifier, otp='123456', expires_in=timedelta(minutes=15)):
+        return PreRegistration.objects.create(
+            identifier=identifier, otp=otp, otp_expires_at=timezone.now() + expires_in,
+        )
+
+    def signup(self, identifier, otp='123456', shops=None):
+        return self.client.post('/api/admin/members/', {
+            'identifier': identifier,
+            'otp': otp,
+            'password': 'secret',
+            'nickname': 'owner',
+            'shop': [str(shop.pk) for shop in (self.shops if shops is None else shops)],
+        }, format='json')
+
+    def test_signup_query_budget_is_independent_of_shop_count(self):
+        self.pending('owner@example.com')
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.signup('owner@example.com')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            sorted(response.json()['user']['shop_ids']), sorted(str(shop.pk) for shop in self.shops),
+        )
+        self.assertFalse(PreRegistration.objects.filter(identifier='owner@example.com').exists())
+        self.assertEqual(Admin.objects.get(identifier='owner@example.com').shop.count(), 5)
+
+    def test_wrong_code_keeps_pending_signup(self):
+        self.pending('owner@example.com')
+        response = self.signup('owner@example.com', otp='000000')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(PreRegistration.objects.filter(identifier='owner@example.com').exists())
+
+    def test_expired_code_is_rejected_and_cleared(self):
+        self.pending('owner@example.com', expires_in=timedelta(minutes=-1))
+        response = self.signup('owner@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PreRegistration.objects.exists())
+
+    def test_duplicate_identifier_rolls_back_the_consumed_code(self):
+        Admin.objects.create(identifier='owner@example.com', nickname='first', password='$unusable')
+        self.pending('owner@example.com')
+        response = self.signup('owner@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(PreRegistration.objects.filter(identifier='owner@example.com').exists())
+
+    def test_unknown_shop_is_rejected_before_the_code_is_used(self):
+        self.pending('owner@example.com')
+        response = self.client.post('/api/admin/members/', {
+            'identifier': 'owner@example.com', 'otp': '123456', 'password': 'secret',
+            'shop': ['00000000-0000-0000-0000-000000000000'],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(PreRegistration.objects.filter(identifier='owner@example.com').exists())
+
+    def test_otp_request_stays_within_budget(self):
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.post('/api/admin/members/', {'identifier': 'owner@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_expired_pending_signup_can_be_restarted(self):
+        self.pending('owner@example.com', otp='111111', expires_in=timedelta(minutes=-1))
+        # SELECT admin, UPDATE the expired signup, INSERT the outbox row.
+        with self.assertNumQueries(3):
+            response = self.client.post('/api/admin/members/', {'identifier': 'owner@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(PreRegistration.objects.get(identifier='owner@example.com').otp, response.json()['otp'])
@@ -1,25 +1,69 @@
-from rest_framework import viewsets, status
+import uuid
+
+from rest_framework import viewsets, permissions, exceptions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.db import transaction
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
 from django.shortcuts import get_object_or_404
 
+from config.pagination import KeysetPagination
+
 # Local app imports
 from .models import Admin
 from .serializers import AdminSerializer
 
 # Other app imports
+from access.permissions import IsAdmin, IsSelfOrStaff, IsShopCreator
+from access.tokens import issue_token
+from notifications.ratelimit import TokenBucketLimiter
 from pre_registration.models import PreRegistration
 from shop.models import Shop
 
+_throttle = None
+
+
+def login_throttle():
+    """Failed logins per identifier, like CUSTOMER_LOGIN_THROTTLE for customers."""
+    global _throttle
+    if _throttle is None:
+        config = getattr(settings, 'ADMIN_LOGIN_THROTTLE', {'capacity': 5, 'per_second': 1 / 60})
+        _throttle = TokenBucketLimiter(config['capacity'], config['per_second'], prefix='admin-login')
+    return _throttle
+
+
 class AdminViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing Admins. 
     Supports 2-step registration: OTP generation and OTP verification.
     """
-    queryset = Admin.objects.all()
     serializer_class = AdminSerializer
     lookup_field = 'id'
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        # All memberships of a page in one extra query, ids only.
+        queryset = Admin.objects.prefetch_related(
+            Prefetch('shop', queryset=Shop.objects.only('id').order_by())
+        )
+        user = self.request.user
+        if getattr(user, 'is_staff', False) or self.action in ('create', 'login'):
+            return queryset
+        # Admins see themselves and the members of their own shops.
+        colleagues = Admin.shop.through.objects.filter(shop_id__in=user.shop_ids).values('admin_id')
+        return queryset.filter(Q(pk=user.id) | Q(pk__in=colleagues))
+
+    def get_permissions(self):
+        # Signing up and logging in is how an admin gets a token at all.
+        if self.action in ('create', 'login'):
+            return [permissions.AllowAny()]
+        if self.action in ('update', 'partial_update', 'destroy'):
+            return [IsSelfOrStaff()]
+        # A customer token authenticates too; it must not reach admin data.
+        return [IsAdmin()]
 
     def create(self, request, *args, **kwargs):
         identifier = request.data.get('identifier')
@@ -29,61 +73,100 @@ class AdminViewSet(viewsets.ModelViewSet):
         if not identifier:
             return Response({"error": "Identifier is required."}, status=status.HTTP_400_BAD_REQUEST)
         
-        # 2. Check if Admin already exists
-        if Admin.objects.filter(identifier=identifier).exists():
-            return Response({"error": "This identifier is already registered."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # 3. PHASE 1: OTP Generation
+        # 2. PHASE 1: OTP Generation
         # Triggered if identifier is provided but otp is missing
         if not otp:
+            # Don't send codes to identifiers that already have an account
+            if Admin.objects.filter(identifier=identifier).exists():
+                return Response({"error": "This identifier is already registered."}, status=status.HTTP_400_BAD_REQUEST)
             pre_reg = PreRegistration.objects.create_pre_registration(identifier=identifier)
+            if isinstance(pre_reg, tuple):
+                # (None, reason): pending signup already exists or OTP requests are throttled
+                return Response({"error": pre_reg[1]}, status=status.HTTP_400_BAD_REQUEST)
             return Response({
                 "message": "OTP generated successfully.",
                 "identifier": identifier,
                 "otp": pre_reg.otp  # Included for development; remove in production
             }, status=status.HTTP_200_OK)
         
-        # 4. PHASE 2: OTP Verification and Admin Creation
+        # 3. PHASE 2: OTP Verification and Admin Creation
+        # Validate first (one query for all submitted shops) so bad input
+        # does not burn the code. Then consume the code, insert the admin and
+        # link its shops in one transaction: a duplicate identifier rolls the
+        # consumed code back too.
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                is_verified, msg = PreRegistration.objects.verify_otp(identifier, otp)
+                if not is_verified:
+                    return Response({"error": msg}, status=status.HTTP_400_BAD_REQUEST)
+                serializer.save()
+        except IntegrityError:
+            return Response({"error": "This identifier is already registered."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "message": "Admin created successfully.",
+            "user": serializer.data
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def login(self, request, *args, **kwargs):
+        """
+        Exchanges identifier + password for a bearer token.
+        URL: POST /api/admin/members/login/
+        """
+        identifier = request.data.get('identifier')
+        password = request.data.get('password')
+        if not identifier or not password:
+            return Response({"error": "Identifier and password are required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        throttle_key = identifier.strip().lower()
+        if not login_throttle().peek(throttle_key):
+            return Response({"error": "Too many failed attempts. Please try again later."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+
+        admin = Admin.objects.filter(identifier=identifier).first()
+        if admin is None or not check_password(password, admin.password):
+            login_throttle().consume(throttle_key)
+            return Response({"error": "Invalid credentials."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        key, token = issue_token(admin)
+        return Response({
+            "message": "Login successful.",
+            "token": key,
+            "expires_at": token.expires_at,
+            "user": self.get_serializer(admin).data,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post', 'delete'], url_path='link-shop')
+    def link_shop(self, request, *args, **kwargs):
+        """
+        A shop's creator adds an existing admin to the shop, or removes one.
+        This is the only way into a shop that already has members.
+        URL: POST|DELETE /api/admin/members/link-shop/
+        Body: {"identifier": <admin email>, "shop_id": <uuid>}
+        """
+        identifier = request.data.get('identifier')
+        shop_id = request.data.get('shop_id')
+        if not identifier or not shop_id:
+            return Response({"error": "identifier and shop_id are required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            shop_id = uuid.UUID(str(shop_id))
+        except ValueError:
+            return Response({"error": "shop_id must be a UUID."}, status=status.HTTP_400_BAD_REQUEST)
+        creator = IsShopCreator()
+        if not creator.allows(request, shop_id):
+            raise exceptions.PermissionDenied(creator.message)
+
+        shop = get_object_or_404(Shop, id=shop_id)
+        admin = Admin.objects.filter(identifier=identifier).first()
+        if admin is None:
+            return Response({"error": "No admin with this identifier; they must sign up first."}, status=status.HTTP_404_NOT_FOUND)
+        if request.method == 'DELETE':
+            admin.shop.remove(shop)
         else:
-            is_verified, pre_reg_instance, msg = PreRegistration.objects.verify_otp(identifier, otp)
-            
-            if not is_verified:
-                return Response({"error": msg or "Invalid or expired OTP."}, status=status.HTTP_400_BAD_REQUEST)
-
-            try:
-                with transaction.atomic():
-                    serializer = self.get_serializer(data=request.data)
-                    serializer.is_valid(raise_exception=True)
-                    
-                    # Save the admin without a shop link for now
-                    serializer.save() 
-
-                return Response({
-                    "message": "Admin created successfully. Shop can be linked later.",
-                    "user": serializer.data
-                }, status=status.HTTP_201_CREATED)
-
-            except Exception as e:
-                return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-    # @action(detail=True, methods=['post'], url_path='link-shop')
-    # def link_shop(self, request, id=None):
-    #     """
-    #     Custom action to link this Admin to a Shop later.
-    #     URL: POST /api/admin/members/<id>/link-shop/
-    #     """
-    #     admin_user = self.get_object()
-    #     shop_id = request.data.get('shop_id')
-        
-    #     if not shop_id:
-    #         return Response({"error": "shop_id is required."}, status=status.HTTP_400_BAD_REQUEST)
-            
-    #     shop = get_object_or_404(Shop, id=shop_id)
-        
-    #     admin_user.shop = shop
-    #     admin_user.save()
-        
-    #     return Response({
-    #         "message": f"Admin successfully linked to {shop.name}.",
-    #         "shop_id": shop.id
-    #     }, status=status.HTTP_200_OK)
\ No newline at end of file
+            admin.shop.add(shop)
+        return Response({
+            "message": "Admin linked to the shop." if request.method == 'POST' else "Admin removed from the shop.",
+            "user": self.get_serializer(admin).data,
+        }, status=status.HTTP_200_OK)
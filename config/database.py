@@ -0,0 +1,102 @@
+"""
+Database profiles, selected with the DB_PROFILE environment variable.
+
+    sqlite    (default) db.sqlite3 tuned for concurrent writers
+    postgres  PostgreSQL with persistent connections or a connection pool
+
+Every value can be overridden through DB_* variables, so deployments do not
+need to edit settings.py.
+"""
+import os
+
+
+def _env(name, default=None):
+    return os.environ.get(f'DB_{name}', default)
+
+
+def _env_bool(name, default):
+    value = _env(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# ==========================================
+# 1. SQLITE
+# ==========================================
+
+# Applied to every new connection. WAL lets readers run alongside the one
+# writer, synchronous=NORMAL is durable in WAL mode except on power loss,
+# and busy_timeout makes writers wait for the lock instead of failing.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(_env('BUSY_TIMEOUT', 5000)),  # ms
+    'cache_size': -64000,         # KiB (negative), i.e. 64 MB per connection
+    'mmap_size': 256 * 1024 ** 2,
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite_init_command(pragmas=None):
+    return ''.join(f'PRAGMA {name}={value};' for name, value in (pragmas or SQLITE_PRAGMAS).items())
+
+
+def sqlite_profile(base_dir, tuned=True):
+    """`tuned=False` is Django's stock configuration (for comparisons)."""
+    database = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': _env('NAME', base_dir / 'db.sqlite3'),
+    }
+    if tuned:
+        database['OPTIONS'] = {
+            'init_command': sqlite_init_command(),
+            # Take the write lock when the transaction starts. A deferred
+            # transaction that reads first and then writes cannot wait for
+            # the lock and fails with "database is locked" at once.
+            'transaction_mode': 'IMMEDIATE',
+        }
+    return database
+
+
+# ==========================================
+# 2. POSTGRESQL
+# ==========================================
+
+def postgres_profile():
+    """
+    With DB_POOL on (needs psycopg[pool]) connections come from a pool per
+    process; Django requires CONN_MAX_AGE = 0 then. Otherwise connections
+    persist for DB_CONN_MAX_AGE seconds and are health-checked before reuse.
+    """
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': _env('NAME', 'ziprocommerce'),
+        'USER': _env('USER', 'ziprocommerce'),
+        'PASSWORD': _env('PASSWORD', ''),
+        'HOST': _env('HOST', 'localhost'),
+        'PORT': _env('PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(_env('CONNECT_TIMEOUT', 5)),
+        },
+    }
+    if _env_bool('POOL', False):
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': int(_env('POOL_MIN', 2)),
+            'max_size': int(_env('POOL_MAX', 10)),
+            'timeout': int(_env('POOL_TIMEOUT', 10)),
+        }
+    else:
+        database['CONN_MAX_AGE'] = int(_env('CONN_MAX_AGE', 60))
+    return database
+
+
+def database_from_env(base_dir):
+    profile = os.environ.get('DB_PROFILE', 'sqlite')
+    if profile == 'postgres':
+        return postgres_profile()
+    if profile in ('sqlite', 'sqlite-stock'):
+        return sqlite_profile(base_dir, tuned=profile == 'sqlite')
+    raise ValueError(f"Unknown DB_PROFILE {profile!r}; use 'sqlite', 'sqlite-stock' or 'postgres'.")
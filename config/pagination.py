@@ -0,0 +1,174 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor keyset pagination.
+
+    Pages are fetched with a seek predicate on the ordering columns instead of
+    OFFSET, so every page costs O(page_size) as long as an index covers the
+    ordering. The last ordering field must be unique (usually the pk).
+    Views can override the ordering with a `keyset_ordering` attribute.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = None  # KEYSET_PAGE_SIZE unless a subclass sets one
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.model = queryset.model
+        self.limit = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self._invert(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek(ordering, position))
+
+        rows = list(queryset[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+
+        # Coming back from a reversed page always means there is a next page,
+        # and any page reached through a cursor has a previous one.
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.next_position = self._position(rows[-1]) if rows and self.has_next else None
+        self.previous_position = self._position(rows[0]) if rows and self.has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        # Read per request, so the setting can change without a re-import.
+        default = self.page_size or getattr(settings, 'KEYSET_PAGE_SIZE', 50)
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return default
+        try:
+            size = int(raw)
+        except ValueError:
+            return default
+        if size <= 0:
+            return default
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    # ==========================================
+    # CURSOR ENCODING
+    # ==========================================
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            raw_position = payload['p']
+            reverse = bool(payload.get('r'))
+            if len(raw_position) != len(self.ordering):
+                raise ValueError
+            position = [
+                self._field(name).to_python(value)
+                for name, value in zip(self._names(self.ordering), raw_position)
+            ]
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    # ==========================================
+    # HELPERS
+    # ==========================================
+
+    def _field(self, name):
+        return self.model._meta.get_field(name)
+
+    @staticmethod
+    def _names(ordering):
+        return [term.lstrip('-') for term in ordering]
+
+    @staticmethod
+    def _invert(ordering):
+        return tuple(term[1:] if term.startswith('-') else f'-{term}' for term in ordering)
+
+    def _position(self, instance):
+        position = []
+        for name in self._names(self.ordering):
+            value = getattr(instance, self._field(name).attname)
+            position.append(value.isoformat() if isinstance(value, datetime) else str(value))
+        return position
+
+    def _seek(self, ordering, position):
+        """
+        Builds `(a, b, ...) > (x, y, ...)` for the given ordering as
+        `a >= x AND (a > x OR (a = x AND ...))`, which keeps a range bound
+        on the leading column so the index can be used.
+        """
+        term, rest = ordering[0], ordering[1:]
+        name = term.lstrip('-')
+        op = 'lt' if term.startswith('-') else 'gt'
+        value = position[0]
+        strict = Q(**{f'{name}__{op}': value})
+        if not rest:
+            return strict
+        return Q(**{f'{name}__{op}e': value}) & (
+            strict | (Q(**{name: value}) & self._seek(rest, position[1:]))
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'schema': {'type': 'integer'},
+            },
+        ]
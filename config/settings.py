@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 
+from config.database import database_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,12 +48,18 @@ INSTALLED_APPS = [
     'details',
     'image',
     'customers',
+    'notifications',
+    'orders',
+    'telemetry',
     'rest_framework.authtoken',
+    'access',
 
 
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole stack (inactive unless enabled).
+    'telemetry.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,6 +67,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'shop.tenancy.TenantMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -84,11 +93,10 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Chosen by the DB_PROFILE environment variable (sqlite | sqlite-stock |
+# postgres), see config/database.py for the tuning and DB_* overrides.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_env(BASE_DIR),
 }
 
 
@@ -152,8 +160,171 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 #         }
 #     }
 # }
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Storefront read models (shop profiles). locmem is per-process; switch to
+    # the file-based backend so every worker on a host sees the same entries:
+    #     'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #     'LOCATION': BASE_DIR / 'cache' / 'storefront',
+    'storefront': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'storefront',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Access token versions (access/tokens.py) and rate-limit buckets
+    # (RATE_LIMIT_CACHE). Must be shared by every worker, or a revocation
+    # only reaches the worker that made it; the
+    # file-based backend is shared on one host, use Redis or Memcached
+    # across hosts.
+    'access': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'access',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Shop profile read model (shop/profile.py)
+SHOP_PROFILE_CACHE = 'storefront'
+SHOP_PROFILE_LRU_SIZE = 1024
+
 REST_FRAMEWORK = {
+    # Bearer tokens of Admins and Customers (access/), then Django users.
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'access.authentication.AccessTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ]
 }
+
+# Default page size for KeysetPagination (config/pagination.py);
+# clients may ask for up to `max_page_size` rows with ?page_size=.
+KEYSET_PAGE_SIZE = 50
+
+# Product search (products/search.py): 'auto' uses SQLite FTS5 when the
+# product_search table exists, PostgreSQL full-text search on PostgreSQL,
+# otherwise an in-process BM25 index that each process reloads per shop
+# after PRODUCT_SEARCH_MEMORY_TTL seconds.
+PRODUCT_SEARCH_BACKEND = 'auto'
+PRODUCT_SEARCH_MEMORY_TTL = 60
+
+# Image derivatives (image/derivatives.py): uploads are resized to these
+# widths and re-encoded on a pool of IMAGE_DERIVATIVE_WORKERS processes
+# (0 renders inline). Add 'avif' to the formats if Pillow supports it.
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)
+IMAGE_DERIVATIVE_FORMATS = ('webp',)
+IMAGE_DERIVATIVE_WORKERS = 2
+IMAGE_DERIVATIVE_MAX_AGE = 60 * 60 * 24 * 365
+
+# Stock reservations (products/product_manager.py): held stock returns to the
+# shelf after this many seconds unless committed. The expiry reaper releases
+# them (EXPIRY_REAPER_MODE below); `manage.py release_expired_reservations`
+# does only that.
+STOCK_RESERVATION_TTL = 15 * 60
+# Reservations are made with a customer token; each customer may hold this
+# many at once, so no one account can keep a shop's stock off the shelf.
+STOCK_RESERVATION_MAX_HELD = 3
+
+# OTP delivery (notifications app). Requests only enqueue into the outbox;
+# `manage.py run_otp_worker` delivers through these transports.
+OTP_TRANSPORTS = {
+    'email': 'notifications.transports.ConsoleTransport',
+    'sms': 'notifications.transports.ConsoleTransport',
+}
+# OTP_FILE_TRANSPORT_PATH = BASE_DIR / 'otp_outbox.jsonl'  # for FileTransport
+OTP_MAX_ATTEMPTS = 5
+OTP_RETRY_BACKOFF = 5  # seconds, doubled after every failed attempt
+OTP_RATE_LIMITS = {
+    'credential': {'capacity': 3, 'per_second': 1 / 120},
+    'shop': {'capacity': 300, 'per_second': 5},
+}
+
+# Customer OTP state (customers/otp_store.py): 'db' keeps codes in the narrow
+# customer_otp table; 'cache' uses CUSTOMER_OTP_CACHE with the table as
+# fallback and needs a cache shared by all workers (not locmem).
+CUSTOMER_OTP_STORE = 'db'
+CUSTOMER_OTP_CACHE = 'default'
+
+# Customer password hashing per shop (customers/hashing.py). Hashes made with
+# older settings are upgraded transparently on the next successful login.
+CUSTOMER_PASSWORD_PROFILES = {
+    'default': {'algorithm': 'pbkdf2_sha256'},
+    # '<shop uuid>': {'algorithm': 'pbkdf2_sha256', 'iterations': 300_000},
+}
+# Failed logins allowed per (shop, credential) before throttling.
+CUSTOMER_LOGIN_THROTTLE = {'capacity': 5, 'per_second': 1 / 60}
+# Failed admin logins allowed per identifier before throttling.
+ADMIN_LOGIN_THROTTLE = {'capacity': 5, 'per_second': 1 / 60}
+# Where the OTP and login token buckets (notifications/ratelimit.py) live.
+# Must be shared by every worker, or each enforces the limits on its own and
+# N workers allow N times as much; None keeps them in-process.
+RATE_LIMIT_CACHE = 'access'
+
+# Loyalty tiers by minimum total_spent, for shops without LoyaltyTier rows.
+# `manage.py refresh_tiers` re-evaluates customers whose spending changed.
+CUSTOMER_TIER_THRESHOLDS = {'BRONZE': 0, 'SILVER': 500, 'GOLD': 2000, 'PLATINUM': 10000}
+
+# Order spending rollups (orders/spending.py): 'thread' flushes in-process
+# after a burst of checkouts, 'worker' leaves it to
+# `manage.py apply_order_spending`, 'inline' applies on every checkout.
+ORDER_SPENDING_MODE = 'thread'
+ORDER_SPENDING_COALESCE = 1.0  # seconds to gather a burst before flushing
+ORDER_SPENDING_POLL_INTERVAL = 30.0
+
+# Tenant resolution (shop/tenancy.py): URL shop id, storefront slug, or this
+# header carrying a shop id or Details.url slug.
+TENANT_HEADER = 'X-Shop'
+
+# Storefront slug resolver (shop/slugs.py). Local changes apply on commit;
+# the TTLs bound how stale other worker processes can be.
+SHOP_SLUG_LRU_SIZE = 4096
+SHOP_SLUG_TTL = 300
+SHOP_SLUG_NEGATIVE_TTL = 30
+SHOP_SLUG_WARM = 2000  # storefronts preloaded when a worker starts
+
+# Request profiling (telemetry/): query count, DB/serializer/render time and
+# response size per URL name, kept in an in-process ring buffer (see
+# /api/telemetry/) and optionally appended to a JSONL file. Routes over
+# budget are logged with their repeated-query fingerprints.
+TELEMETRY_ENABLED = True
+TELEMETRY_BUFFER_SIZE = 2000
+TELEMETRY_SINK = None  # e.g. BASE_DIR / 'telemetry.jsonl'
+TELEMETRY_IGNORE_PATHS = ('/api/telemetry/', '/static/', '/media/')
+TELEMETRY_DEFAULT_BUDGET = {'queries': 20, 'total_ms': 500}
+TELEMETRY_BUDGETS = {
+    # '[METHOD ]<URL name>' -> limits on any of queries, db_ms, serialize_ms,
+    # render_ms, total_ms, bytes
+    'GET admin-member-list': {'queries': 2},
+    # Signup, both phases: at most four statements, plus a savepoint pair
+    # when already inside a transaction (tests); hashing the password is slow.
+    'POST admin-member-list': {'queries': 6, 'total_ms': 1500},
+    'POST admin-member-login': {'queries': 4, 'total_ms': 1500},  # password check
+    'POST login': {'queries': 4, 'total_ms': 1500},  # customer password check
+    'product-list': {'queries': 3},
+    'product-facets': {'queries': 1},  # one ShopCatalogStats row per category
+}
+
+# Expired pre-registrations, customer OTPs, access tokens and stock
+# reservations (pre_registration/reaper.py): 'thread' reaps in-process every
+# EXPIRY_REAPER_INTERVAL seconds, 'worker' leaves it to
+# `manage.py reap_expired`.
+EXPIRY_REAPER_MODE = 'thread'
+EXPIRY_REAPER_INTERVAL = 300
+EXPIRY_REAPER_BATCH_SIZE = 500
+
+# Admin and customer bearer tokens (access/tokens.py). Resolved tokens are
+# kept in-process for ACCESS_TOKEN_CACHE_TTL seconds and checked against a
+# per-principal version in ACCESS_TOKEN_CACHE on every request; revoking a
+# token or changing an admin's shops moves that version. With a
+# process-local backend (locmem, dummy) other workers would never see the
+# move, so tokens are then read from the database on every request.
+ACCESS_TOKEN_TTL = 14 * 24 * 3600
+ACCESS_TOKEN_CACHE = 'access'
+ACCESS_TOKEN_CACHE_TTL = 300
+ACCESS_TOKEN_LRU_SIZE = 10000
@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 
+from image.derivatives import DERIVATIVE_ROOT
+from image.views import serve_derivative
+
 urlpatterns = [
     # Built-in Django Admin
     path('admin/', admin.site.urls),
@@ -12,4 +16,11 @@ urlpatterns = [
     path('api/details/', include('details.urls')),
     path('api/image/', include('image.urls')),
     path('api/customers/', include('customers.urls')),
+    path('api/orders/', include('orders.urls')),
+    # Bearer tokens of admins and customers
+    path('api/auth/', include('access.urls')),
+    # Internal request profiling (staff only)
+    path('api/telemetry/', include('telemetry.urls')),
+    # Content-hashed image derivatives, served with far-future cache headers
+    path(f"{settings.MEDIA_URL.strip('/')}/{DERIVATIVE_ROOT}/<path:path>", serve_derivative),
 ]
\ No newline at end of file
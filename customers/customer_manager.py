@@ -1,10 +1,43 @@
-from django.db import models
+import re
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError
 from django.db.models import Q, F
 from django.utils import timezone
-from django.contrib.auth.hashers import check_password
 
+from customers.hashing import verify_customer_password
+from notifications.dispatcher import allow_otp, enqueue_otp
+from notifications.ratelimit import TokenBucketLimiter
+from shop.tenancy import TenantManager
+
+_PHONE_NOISE = re.compile(r'[\s\-().]')
+_throttle = None
+
+
+def normalize_credential(value):
+    """Emails are case-insensitive; phones ignore spacing and punctuation."""
+    value = (value or '').strip()
+    if '@' in value:
+        return value.lower()
+    return _PHONE_NOISE.sub('', value)
 
-class CustomerManager(models.Manager):
+
+def _login_throttle():
+    """Failed-login token bucket per (shop, credential)."""
+    global _throttle
+    if _throttle is None:
+        config = getattr(settings, 'CUSTOMER_LOGIN_THROTTLE', {'capacity': 5, 'per_second': 1 / 60})
+        _throttle = TokenBucketLimiter(config['capacity'], config['per_second'], prefix='customer-login')
+    return _throttle
+
+
+class CustomerManager(TenantManager):
+    """
+    Scoped to the current shop inside a request; outside one (commands,
+    the spending aggregator) it sees every shop, so `strict` is off.
+    """
+    strict = False
 
     # ==========================================
     # 1. IDENTITY & AUTHENTICATION
@@ -12,38 +45,59 @@ class CustomerManager(models.Manager):
 
     def find_by_credential(self, shop_id, credential):
         """Finds a customer by either email or phone within a specific shop."""
-        return self.filter(
-            Q(shop_id=shop_id) & (Q(email=credential) | Q(phone=credential))
+        if not credential:
+            return None
+        return self.for_shop(shop_id).filter(
+            credentials__shop_id=shop_id,
+            credentials__credential=normalize_credential(credential),
         ).first()
 
     def register(self, shop_id, password, email=None, phone=None, **extra_fields):
         """Handles shop-scoped registration with uniqueness checks."""
+        from customers.models import CustomerCredential
+
         if not email and not phone:
             return None, "Must provide either an email or a phone number."
 
-        # Check for existing credentials in this specific shop
-        existing = self.filter(Q(shop_id=shop_id) & (Q(email=email) | Q(phone=phone)))
-        if email and existing.filter(email=email).exists():
+        # One probe of the (shop, credential) index covers both handles
+        wanted = [normalize_credential(value) for value in (email, phone) if value]
+        taken = set(CustomerCredential.objects.filter(
+            shop_id=shop_id, credential__in=wanted
+        ).values_list('kind', flat=True))
+        if 'email' in taken:
             return None, "Email already registered in this shop."
-        if phone and existing.filter(phone=phone).exists():
+        if 'phone' in taken:
             return None, "Phone number already registered in this shop."
 
-        customer = self.create(
-            shop_id=shop_id,
-            email=email,
-            phone=phone,
-            password=password,  # Model save() hashes this
-            **extra_fields
-        )
+        try:
+            customer = self.create(
+                shop_id=shop_id,
+                email=email,
+                phone=phone,
+                password=password,  # Model save() hashes this
+                **extra_fields
+            )
+        except IntegrityError:
+            # Only a credential taken since the probe above is the caller's
+            # problem; anything else (an identifier clash) is not.
+            if CustomerCredential.objects.filter(shop_id=shop_id, credential__in=wanted).exists():
+                return None, "Email or phone already registered in this shop."
+            raise
         return customer, "Account created successfully."
 
     def authenticate_customer(self, shop_id, credential, password):
         """Custom login check using either email or phone."""
+        throttle_key = f"{shop_id}:{normalize_credential(credential or '')}"
+        if not _login_throttle().peek(throttle_key):
+            return None, "Too many failed attempts. Please try again later."
+
         customer = self.find_by_credential(shop_id, credential)
-        if customer and check_password(password, customer.password):
+        if customer and verify_customer_password(customer, password):
             if not customer.is_active:
                 return None, "Account is deactivated."
             return customer, "Login successful."
+
+        _login_throttle().consume(throttle_key)
         return None, "Invalid credentials."
 
     # ==========================================
@@ -56,10 +110,14 @@ class CustomerManager(models.Manager):
         if not customer:
             return None, "Customer not found."
 
+        if not allow_otp(credential, shop_id):
+            return None, "Too many OTP requests. Please try again later."
+
         otp_code = customer.generate_otp()
 
-        # Determine routing
+        # Determine routing; delivery itself happens in the outbox worker
         method = "email" if (customer.email and credential == customer.email) else "sms"
+        enqueue_otp(credential, otp_code, channel=method, purpose="customer_otp", shop_id=shop_id)
         return customer, {"otp": otp_code, "method": method}
 
     def verify_otp(self, shop_id, credential, input_code):
@@ -76,15 +134,15 @@ class CustomerManager(models.Manager):
 
     def update_password(self, shop_id, identifier, current_password, new_password):
         """Standard password change (requires old password)."""
-        customer = self.filter(shop_id=shop_id, identifier=identifier).first()
+        customer = self.for_shop(shop_id).filter(identifier=identifier).first()
         if not customer:
             return False, "Customer not found."
 
-        if not check_password(current_password, customer.password):
+        if not verify_customer_password(customer, current_password):
             return False, "Current password incorrect."
 
         customer.password = new_password  # save() hashes it
-        customer.save()
+        customer.save(update_fields=['password'])
         return True, "Password updated successfully."
 
     def reset_password_via_otp(self, shop_id, credential, otp_code, new_password):
@@ -95,8 +153,8 @@ class CustomerManager(models.Manager):
 
         success, msg = customer.check_otp(otp_code)
         if success:
-            customer.password = new_password
-            customer.save()
+            customer.password = new_password  # save() hashes it
+            customer.save(update_fields=['password'])
             return True, "Password reset successful."
         return False, msg
 
@@ -106,7 +164,7 @@ class CustomerManager(models.Manager):
 
     def update_basic_info(self, shop_id, identifier, first_name=None, last_name=None):
         """Updates legal/display names."""
-        count = self.filter(shop_id=shop_id, identifier=identifier).update(
+        count = self.for_shop(shop_id).filter(identifier=identifier).update(
             first_name=first_name,
             last_name=last_name
         )
@@ -114,27 +172,168 @@ class CustomerManager(models.Manager):
 
     def update_contact_phone(self, shop_id, identifier, new_phone):
         """Updates phone with collision check."""
-        if self.filter(shop_id=shop_id, phone=new_phone).exclude(identifier=identifier).exists():
-            return False, "This phone number is already registered in this shop."
+        customer = self.for_shop(shop_id).filter(identifier=identifier).first()
+        if not customer:
+            return False, "Customer not found."
 
-        count = self.filter(shop_id=shop_id, identifier=identifier).update(
-            phone=new_phone,
-            is_verified=False  # Reset verification status on contact change
-        )
-        return (True, "Phone updated. Please verify.") if count > 0 else (False, "Customer not found.")
+        customer.phone = new_phone
+        customer.is_verified = False  # Reset verification status on contact change
+        try:
+            # save() re-points the credential row; its unique index catches collisions
+            customer.save(update_fields=['phone', 'is_verified'])
+        except IntegrityError:
+            return False, "This phone number is already registered in this shop."
+        return True, "Phone updated. Please verify."
 
     # ==========================================
     # 5. E-COMMERCE STATS & ADMIN
     # ==========================================
 
     def increment_spending(self, shop_id, identifier, amount):
-        """Atomic update of total spent (use during checkout)."""
-        count = self.filter(shop_id=shop_id, identifier=identifier).update(
-            total_spent=F('total_spent') + amount
+        """Atomic update of total spent; the tier engine picks the change up."""
+        count = self.for_shop(shop_id).filter(identifier=identifier).update(
+            total_spent=F('total_spent') + amount,
+            spent_updated_at=timezone.now(),
         )
         return (True, "Balance updated.") if count > 0 else (False, "Customer not found.")
 
+    def apply_spending(self, totals):
+        """
+        Adds coalesced {customer_id: amount} deltas to total_spent, then
+        re-evaluates the tiers of just those customers. Rows are written in
+        id order so concurrent appliers cannot deadlock.
+        """
+        from customers.tiers import refresh_tiers
+
+        now = timezone.now()
+        for customer_id in sorted(totals, key=str):
+            self.filter(pk=customer_id).update(
+                total_spent=F('total_spent') + totals[customer_id],
+                spent_updated_at=now,
+            )
+        if totals:
+            refresh_tiers(self.filter(pk__in=list(totals)))
+
     def set_account_status(self, shop_id, identifier, is_active):
         """Admin action to ban/activate account."""
-        count = self.filter(shop_id=shop_id, identifier=identifier).update(is_active=is_active)
-        return (True, "Status updated.") if count > 0 else (False, "Customer not found.")
\ No newline at end of file
+        count = self.for_shop(shop_id).filter(identifier=identifier).update(is_active=is_active)
+        return (True, "Status updated.") if count > 0 else (False, "Customer not found.")
+    # ==========================================
+    # 6. BULK REGISTRATION
+    # ==========================================
+
+    def bulk_register(self, shop_id, rows, batch_size=2000):
+        """
+        Inserts many customers for one shop without per-row queries.
+        `rows` are dicts with email/phone/password/first_name/last_name.
+        Passwords may be raw, already encoded, or None (unusable). Raw ones
+        are hashed one by one and dominate the cost; migrations should pass
+        the encoded hashes they already have.
+        Returns (created_customers, errors) where errors is [(index, message)].
+        """
+        from django.contrib.auth.hashers import identify_hasher, make_password
+        from django.db import transaction
+        from customers.hashing import make_customer_password
+        from customers.identifiers import allocate_customer_identifiers
+        from customers.models import CustomerCredential
+
+        errors, accepted, seen = [], [], set()
+        for index, row in enumerate(rows):
+            handles = [normalize_credential(row.get(key)) for key in ('email', 'phone') if row.get(key)]
+            if not handles:
+                errors.append((index, "Must provide either an email or a phone number."))
+            elif seen.intersection(handles):
+                errors.append((index, "Duplicate email or phone in import."))
+            else:
+                seen.update(handles)
+                accepted.append((index, row, handles))
+
+        # Existing handles, fetched in chunks to stay under parameter limits
+        handles = [handle for _, _, row_handles in accepted for handle in row_handles]
+        taken = set()
+        for start in range(0, len(handles), batch_size):
+            taken.update(CustomerCredential.objects.filter(
+                shop_id=shop_id, credential__in=handles[start:start + batch_size]
+            ).values_list('credential', flat=True))
+
+        fresh = [(index, row) for index, row, row_handles in accepted if not taken.intersection(row_handles)]
+        errors.extend(
+            (index, "Email or phone already registered in this shop.")
+            for index, row, row_handles in accepted if taken.intersection(row_handles)
+        )
+        identifiers = allocate_customer_identifiers(len(fresh))
+
+        # Only these columns differ per row; the rest (defaults, created_at)
+        # are the same for the whole import and are computed once.
+        varying = ('id', 'identifier', 'email', 'phone', 'password', 'first_name', 'last_name')
+        template = self.model(shop_id=shop_id)
+        fields = self.model._meta.concrete_fields
+        shared = {field.name: field.pre_save(template, add=True) for field in fields if field.name not in varying}
+        # Positional arguments in field order, as from_db() builds instances.
+        slots = [(varying.index(field.name), None) if field.name in varying else (None, shared[field.name])
+                 for field in fields]
+
+        customers, rows, credentials = [], [], []
+        for (index, row), identifier in zip(fresh, identifiers):
+            password = row.get('password')
+            if password is None:
+                password = make_password(None)
+            else:
+                try:
+                    identify_hasher(password)
+                except ValueError:
+                    password = make_customer_password(password, shop_id)
+            values = (
+                uuid.uuid4(), identifier, row.get('email'), row.get('phone'), password,
+                row.get('first_name', ''), row.get('last_name', ''),
+            )
+            customer = self.model(*[value if slot is None else values[slot] for slot, value in slots])
+            customer._state.adding, customer._state.db = False, self.db
+            customer._saved_credentials = customer.credential_set()
+            customers.append(customer)
+            rows.append(values)
+            credentials.extend(
+                (uuid.uuid4(), customer.pk, kind, credential) for kind, credential in customer._saved_credentials
+            )
+
+        with transaction.atomic(using=self.db):
+            self._insert_rows(self.model, varying, rows, shared, batch_size)
+            self._insert_rows(
+                CustomerCredential, ('id', 'customer', 'kind', 'credential'), credentials,
+                {'shop': shop_id}, batch_size,
+            )
+        return customers, sorted(errors)
+
+    def _insert_rows(self, model, varying, rows, shared, batch_size):
+        """
+        INSERTs `rows` (tuples of the `varying` fields) with one executemany
+        per batch. `shared` are {field: value} for the remaining columns.
+        bulk_create compiles every value of every row, and that compiling,
+        not the database, was most of the time of a large import.
+        """
+        from django.db import connections
+
+        connection = connections[self.db]
+        opts = model._meta
+        varying = [opts.get_field(name) for name in varying]
+        shared = {opts.get_field(name): value for name, value in shared.items()}
+        shared_values = [field.get_db_prep_save(value, connection) for field, value in shared.items()]
+        # Strings go to the driver as they are; only other types need preparing.
+        prepare = [
+            None if field.get_internal_type() in ('CharField', 'TextField') else field.get_db_prep_save
+            for field in varying
+        ]
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in [*varying, *shared])
+        sql = (
+            f"INSERT INTO {connection.ops.quote_name(opts.db_table)} ({columns}) "
+            f"VALUES ({', '.join(['%s'] * (len(varying) + len(shared)))})"
+        )
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                cursor.executemany(sql, [
+                    [
+                        value if fn is None or value is None else fn(value, connection)
+                        for fn, value in zip(prepare, row)
+                    ] + shared_values
+                    for row in rows[start:start + batch_size]
+                ])
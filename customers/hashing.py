@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+
+# Example:
+# CUSTOMER_PASSWORD_PROFILES = {
+#     'default': {'algorithm': 'pbkdf2_sha256', 'iterations': 600_000},
+#     '<shop uuid>': {'algorithm': 'argon2'},
+# }
+_hashers = {}
+
+
+def _profile(shop_id):
+    profiles = getattr(settings, 'CUSTOMER_PASSWORD_PROFILES', {})
+    return profiles.get(str(shop_id)) or profiles.get('default') or {}
+
+
+def get_customer_hasher(shop_id):
+    """
+    Returns the password hasher configured for a shop. Work-factor overrides
+    (`iterations`, `rounds`, `time_cost`, ...) are applied to a private
+    instance of the named hasher, so they never leak into the global one.
+    """
+    profile = _profile(shop_id)
+    key = tuple(sorted(profile.items()))
+    if key not in _hashers:
+        base = get_hasher(profile.get('algorithm', 'default'))
+        hasher = base.__class__()
+        for name, value in profile.items():
+            if name != 'algorithm':
+                setattr(hasher, name, value)
+        _hashers[key] = hasher
+    return _hashers[key]
+
+
+def make_customer_password(raw_password, shop_id):
+    return make_password(raw_password, hasher=get_customer_hasher(shop_id))
+
+
+def verify_customer_password(customer, raw_password):
+    """
+    Checks a password against the shop's current hasher settings and, when
+    the stored hash uses an older algorithm or work factor, rehashes it in
+    place with a single-column UPDATE.
+    """
+    def upgrade(raw):
+        customer.password = make_customer_password(raw, customer.shop_id)
+        type(customer).objects.filter(pk=customer.pk).update(password=customer.password)
+
+    return check_password(
+        raw_password,
+        customer.password,
+        setter=upgrade,
+        preferred=get_customer_hasher(customer.shop_id),
+    )
@@ -0,0 +1,88 @@
+import string
+import threading
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+ALPHABET = string.digits + string.ascii_uppercase
+WIDTH = 8
+KEYSPACE = len(ALPHABET) ** WIDTH          # 36^8 = 2,821,109,907,456
+
+# n -> (n * MULTIPLIER + OFFSET) mod KEYSPACE is a bijection because the
+# multiplier is prime (so coprime with 36^8). Consecutive sequence values
+# therefore map to distinct, non-sequential-looking codes.
+MULTIPLIER = 2_654_435_761
+OFFSET = 1_234_567_890_123 % KEYSPACE
+
+# Legacy identifiers are random "CUST-" codes of the same width; a distinct
+# prefix keeps sequence-derived codes from ever colliding with them.
+PREFIX = "CID"
+
+
+def encode(value, prefix=PREFIX):
+    n = (value * MULTIPLIER + OFFSET) % KEYSPACE
+    chars = []
+    for _ in range(WIDTH):
+        n, digit = divmod(n, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return f"{prefix}-{''.join(reversed(chars))}"
+
+
+class BlockAllocator:
+    """
+    Hands out unique integers from a DB-backed sequence, reserving a whole
+    block per round trip. Identifiers then need no existence probe: every
+    process owns a disjoint block.
+
+    Inside a transaction only the values asked for are reserved: if it
+    rolls back, the sequence row reverts and the range may be handed out
+    again, so no spare part of it may be kept for later.
+    """
+
+    def __init__(self, name, block_size=1000):
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+
+    def _reserve(self, size):
+        from customers.models import IdentifierSequence
+
+        with transaction.atomic():
+            updated = IdentifierSequence.objects.filter(name=self.name).update(
+                next_value=F('next_value') + size
+            )
+            if not updated:
+                try:
+                    with transaction.atomic():
+                        IdentifierSequence.objects.create(name=self.name, next_value=size)
+                except IntegrityError:
+                    # Another process created the row first.
+                    IdentifierSequence.objects.filter(name=self.name).update(
+                        next_value=F('next_value') + size
+                    )
+            end = IdentifierSequence.objects.values_list('next_value', flat=True).get(name=self.name)
+
+        if end > KEYSPACE:
+            raise OverflowError(f"Identifier sequence '{self.name}' is exhausted.")
+        self._next, self._end = end - size, end
+
+    def allocate(self, count=1):
+        """Returns `count` unique sequence numbers."""
+        with self._lock:
+            values = []
+            while len(values) < count:
+                if self._next >= self._end:
+                    wanted = count - len(values)
+                    self._reserve(wanted if connection.in_atomic_block else max(self.block_size, wanted))
+                take = min(count - len(values), self._end - self._next)
+                values.extend(range(self._next, self._next + take))
+                self._next += take
+            return values
+
+
+customer_identifiers = BlockAllocator('customer')
+
+
+def allocate_customer_identifiers(count=1):
+    return [encode(value) for value in customer_identifiers.allocate(count)]
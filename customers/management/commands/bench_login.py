@@ -0,0 +1,82 @@
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from customers import hashing
+from customers.models import Customer
+from shop.models import Shop
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the customer login path: p50/p99 latency and logins per second "
+        "per core. Runs inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=200)
+        parser.add_argument('--logins', type=int, default=500)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--algorithm', default='pbkdf2_sha256')
+        parser.add_argument('--iterations', type=int, help="Override the hasher work factor.")
+
+    def handle(self, *args, **options):
+        profile = {'algorithm': options['algorithm']}
+        if options['iterations']:
+            profile['iterations'] = options['iterations']
+
+        with override_settings(CUSTOMER_PASSWORD_PROFILES={'default': profile}):
+            hashing._hashers.clear()
+            try:
+                with transaction.atomic():
+                    self.run(options)
+                    transaction.set_rollback(True)
+            finally:
+                hashing._hashers.clear()
+
+    def run(self, options):
+        shop = Shop.objects.create()
+        encoded = hashing.make_customer_password('bench-password', shop.id)
+        credentials = []
+        for i in range(options['customers']):
+            email = f"bench{i}@example.com"
+            # Pre-hashed password: save() only identifies it.
+            Customer(shop=shop, email=email, password=encoded).save()
+            credentials.append(email)
+
+        def login(i):
+            customer, _ = Customer.objects.authenticate_customer(
+                shop.id, credentials[i % len(credentials)], 'bench-password'
+            )
+            assert customer is not None
+
+        for i in range(options['warmup']):
+            login(i)
+
+        with CaptureQueriesContext(connection) as queries:
+            login(0)
+
+        samples = []
+        for i in range(options['logins']):
+            started = time.perf_counter()
+            login(i)
+            samples.append(time.perf_counter() - started)
+
+        mean = statistics.fmean(samples)
+        self.stdout.write(f"hasher:          {options['algorithm']} iterations={options['iterations'] or 'default'}")
+        self.stdout.write(f"logins:          {len(samples)} over {len(credentials)} customers")
+        self.stdout.write(f"queries/login:   {len(queries)}")
+        self.stdout.write(f"p50:             {percentile(samples, 50) * 1000:.2f} ms")
+        self.stdout.write(f"p99:             {percentile(samples, 99) * 1000:.2f} ms")
+        self.stdout.write(f"logins/s/core:   {1 / mean:.1f}")
+        self.stdout.write(f"cores available: {os.cpu_count()}")
@@ -0,0 +1,68 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from customers import tiers
+from customers.identifiers import allocate_customer_identifiers
+from customers.models import Customer, TierWatermark
+from shop.models import Shop
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows that incremental tier evaluation costs O(changed customers): "
+        "grows the customers table and times a run with a fixed number of "
+        "spending changes, next to a full pass. Rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                            help="Customers added before each round.")
+        parser.add_argument('--changed', type=int, default=200, help="Customers whose spending changes per round.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        self.stdout.write(f"{'customers':>10} {'changed':>8} {'incr ms':>9} {'queries':>8} {'full ms':>9}")
+        for size in options['sizes']:
+            shop = Shop.objects.create()
+            Customer.objects.bulk_create(
+                [
+                    Customer(shop=shop, identifier=identifier, email=f"tier{i}@example.com", password='!')
+                    for i, identifier in enumerate(allocate_customer_identifiers(size))
+                ],
+                batch_size=2000,
+            )
+            # Everything so far is up to date.
+            now = timezone.now()
+            TierWatermark.objects.update_or_create(name=tiers.WATERMARK, defaults={'high_water': now})
+
+            ids = list(Customer.objects.filter(shop=shop).values_list('pk', flat=True))
+            touched = random.sample(ids, min(options['changed'], len(ids)))
+            Customer.objects.filter(pk__in=touched).update(
+                total_spent=F('total_spent') + 600, spent_updated_at=now + timedelta(seconds=1),
+            )
+
+            run_at = now + tiers.SAFETY_LAG + timedelta(seconds=2)
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                scanned, changed = tiers.run_incremental(now=run_at)
+                incremental = time.perf_counter() - started
+
+            started = time.perf_counter()
+            tiers.refresh_tiers(Customer.objects.all())
+            full = time.perf_counter() - started
+
+            total = Customer.objects.count()
+            self.stdout.write(
+                f"{total:>10} {changed:>8} {incremental * 1000:>9.1f} {len(queries):>8} {full * 1000:>9.1f}"
+            )
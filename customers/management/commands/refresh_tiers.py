@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from customers import tiers
+from customers.models import Customer
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-evaluates loyalty tiers for customers whose spending changed since "
+        "the last run. --full re-checks every customer (optionally one shop)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true')
+        parser.add_argument('--shop', help="Limit a --full pass to one shop.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['full']:
+            queryset = Customer.objects.all()
+            if options['shop']:
+                queryset = queryset.filter(shop_id=options['shop'])
+            scanned, changed = tiers.refresh_tiers(queryset, batch_size=options['batch_size'])
+        else:
+            scanned, changed = tiers.run_incremental(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} customers, {changed} changed tier."))
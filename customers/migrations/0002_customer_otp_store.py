@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 15:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerOtp',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pending_otp', serialize=False, to='customers.customer')),
+                ('code_hash', models.CharField(max_length=64)),
+                ('expires_at', models.DateTimeField()),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'customer_otp',
+            },
+        ),
+        migrations.RemoveField(
+            model_name='customer',
+            name='otp',
+        ),
+        migrations.RemoveField(
+            model_name='customer',
+            name='otp_expired',
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 6.0 on 2026-10-18 15:12
+
+import django.db.models.deletion
+import re
+import uuid
+from django.db import migrations, models
+
+# Frozen copy of customers.customer_manager.normalize_credential as of this
+# migration, so later changes to it cannot alter what this backfill writes.
+_PHONE_NOISE = re.compile(r'[\s\-().]')
+
+
+def normalize_credential(value):
+    value = (value or '').strip()
+    if '@' in value:
+        return value.lower()
+    return _PHONE_NOISE.sub('', value)
+
+
+def backfill_credentials(apps, schema_editor):
+    """
+    One credential row per email and phone. Two customers of a shop whose
+    handles only differ in case or punctuation cannot both get one, and
+    would silently lose their login, so the migration stops and lists
+    them instead: merge or rename those accounts, then migrate again.
+    """
+    Customer = apps.get_model('customers', 'Customer')
+    CustomerCredential = apps.get_model('customers', 'CustomerCredential')
+    rows = (
+        Customer.objects.order_by('shop_id')
+        .values_list('id', 'shop_id', 'email', 'phone')
+        .iterator(chunk_size=2000)
+    )
+    batch, owners, collisions, current_shop = [], {}, [], None
+    for customer_id, shop_id, email, phone in rows:
+        if shop_id != current_shop:
+            # Rows come shop by shop; only one shop's handles are held at a time.
+            owners, current_shop = {}, shop_id
+        for kind, value in (('email', email), ('phone', phone)):
+            if not value:
+                continue
+            credential = normalize_credential(value)
+            owner = owners.get(credential)
+            if owner is None:
+                owners[credential] = customer_id
+                batch.append(CustomerCredential(
+                    id=uuid.uuid4(), shop_id=shop_id, customer_id=customer_id,
+                    kind=kind, credential=credential,
+                ))
+            elif owner != customer_id:
+                collisions.append(f"shop {shop_id}: {credential!r} is used by customers {owner} and {customer_id}")
+        if len(batch) >= 1000:
+            CustomerCredential.objects.bulk_create(batch)
+            batch = []
+    if collisions:
+        raise RuntimeError(
+            f"{len(collisions)} customer login(s) collide once normalized:\n" + "\n".join(collisions)
+        )
+    CustomerCredential.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_customer_otp_store'),
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerCredential',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('credential', models.CharField(max_length=255)),
+                ('kind', models.CharField(choices=[('email', 'Email'), ('phone', 'Phone')], max_length=5)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credentials', to='customers.customer')),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_credentials', to='shop.shop')),
+            ],
+            options={
+                'db_table': 'customer_credentials',
+                'constraints': [models.UniqueConstraint(fields=('shop', 'credential'), name='unique_credential_per_shop')],
+            },
+        ),
+        migrations.RunPython(backfill_credentials, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-18 15:28
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_identifier_sequences'),
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TierWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('high_water', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'tier_watermarks',
+            },
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='spent_updated_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='LoyaltyTier',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=10)),
+                ('min_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='loyalty_tiers', to='shop.shop')),
+            ],
+            options={
+                'db_table': 'loyalty_tiers',
+                'ordering': ['shop', 'min_spent'],
+                'constraints': [models.UniqueConstraint(fields=('shop', 'name'), name='unique_tier_per_shop')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_loyalty_tiers'),
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='customer',
+            name='unique_email_per_shop',
+        ),
+        migrations.RemoveConstraint(
+            model_name='customer',
+            name='unique_phone_per_shop',
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['shop', 'created_at'], name='customers_shop_id_edc3cb_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('shop', 'email'), name='unique_email_per_shop'),
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('shop', 'phone'), name='unique_phone_per_shop'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0006_tenant_leading_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customerotp',
+            index=models.Index(fields=['expires_at'], name='customer_ot_expires_54421a_idx'),
+        ),
+    ]
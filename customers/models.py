@@ -1,13 +1,17 @@
 import uuid
 import random
+import secrets
 import string
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
 from django.contrib.auth.hashers import make_password, identify_hasher, check_password
 from django.utils import timezone
 from datetime import timedelta
 
-from customers.customer_manager import CustomerManager
+from customers.customer_manager import CustomerManager, normalize_credential
+from customers.hashing import make_customer_password
+from customers.identifiers import allocate_customer_identifiers
+from customers.otp_store import get_otp_store
 
 
 class Customer(models.Model):
@@ -24,15 +28,16 @@ class Customer(models.Model):
     first_name = models.CharField(max_length=100, blank=True)
     last_name = models.CharField(max_length=100, blank=True)
 
-    # OTP Section
-    otp = models.CharField(max_length=6, blank=True, null=True)
+    # Verification (OTP codes live in customers.otp_store, not on this row)
     is_verified = models.BooleanField(default=False)
-    otp_expired = models.DateTimeField(blank=True, null=True)
 
     # Status & Loyalty
     is_active = models.BooleanField(default=True)
     tier = models.CharField(max_length=10, default='BRONZE')
     total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    # Bumped whenever total_spent (or the shop's tier table) changes; the
+    # tier engine only re-evaluates rows past its high-water mark.
+    spent_updated_at = models.DateTimeField(null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     objects = CustomerManager()
@@ -40,49 +45,167 @@ class Customer(models.Model):
     class Meta:
         db_table = 'customers'
         constraints = [
-            models.UniqueConstraint(fields=['email', 'shop'], name='unique_email_per_shop'),
-            models.UniqueConstraint(fields=['phone', 'shop'], name='unique_phone_per_shop'),
+            models.UniqueConstraint(fields=['shop', 'email'], name='unique_email_per_shop'),
+            models.UniqueConstraint(fields=['shop', 'phone'], name='unique_phone_per_shop'),
         ]
+        indexes = [
+            models.Index(fields=['shop', 'created_at']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Only when both handles were loaded; touching a deferred field here
+        # would cost a query per row.
+        if 'email' in field_names and 'phone' in field_names:
+            instance._saved_credentials = instance.credential_set()
+        return instance
 
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+
         # Generate internal identifier
         if not self.identifier:
             self.identifier = self.generate_unique_identifier()
 
-        # Handle Password Hashing
-        try:
-            identify_hasher(self.password)
-        except ValueError:
-            self.password = make_password(self.password)
-
-        super().save(*args, **kwargs)
+        # Handle Password Hashing (skipped for partial saves that don't touch it)
+        if update_fields is None or 'password' in update_fields:
+            try:
+                identify_hasher(self.password)
+            except ValueError:
+                self.password = make_customer_password(self.password, self.shop_id)
+
+        if self._state.adding:
+            self._saved_credentials = set()
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or {'email', 'phone'} & set(update_fields):
+                self.sync_credentials()
+
+    def credential_set(self):
+        """Normalized (kind, credential) pairs this customer can log in with."""
+        pairs = set()
+        if self.email:
+            pairs.add(('email', normalize_credential(self.email)))
+        if self.phone:
+            pairs.add(('phone', normalize_credential(self.phone)))
+        return pairs
+
+    def sync_credentials(self):
+        """Mirrors email/phone into the credential lookup table when they change."""
+        current = self.credential_set()
+        previous = getattr(self, '_saved_credentials', None)
+        if previous is None:
+            previous = set(self.credentials.values_list('kind', 'credential'))
+        if current == previous:
+            return
+        stale = [credential for _, credential in previous - current]
+        if stale:
+            CustomerCredential.objects.filter(customer=self, credential__in=stale).delete()
+        CustomerCredential.objects.bulk_create([
+            CustomerCredential(shop_id=self.shop_id, customer=self, kind=kind, credential=credential)
+            for kind, credential in current - previous
+        ])
+        self._saved_credentials = current
 
     def generate_unique_identifier(self):
-        prefix = "CUST"
-        while True:
-            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            val = f"{prefix}-{code}"
-            if not Customer.objects.filter(identifier=val).exists():
-                return val
+        # Block-reserved sequence: unique by construction, no exists() probe.
+        return allocate_customer_identifiers(1)[0]
 
     def generate_otp(self):
-        code = ''.join(random.choices(string.digits, k=6))
-        self.otp = code
-        self.otp_expired = timezone.now() + timedelta(minutes=10)
-        self.is_verified = False
-        self.save()
+        code = ''.join(secrets.choice(string.digits) for _ in range(6))
+        get_otp_store().issue(self.pk, code)
+        self._set_verified(False)
         return code
 
     def check_otp(self, input_code):
-        if not self.otp or self.otp != input_code:
-            return False, "Invalid code."
-        if timezone.now() > self.otp_expired:
-            return False, "OTP expired."
-
-        self.is_verified = True
-        self.otp = None
-        self.save()
+        success, msg = get_otp_store().consume(self.pk, str(input_code or ''))
+        if not success:
+            return False, msg
+
+        self._set_verified(True)
         return True, "Verified successfully."
 
+    def _set_verified(self, value):
+        # Only write the customer row when the flag actually flips.
+        if self.is_verified != value:
+            self.is_verified = value
+            self.save(update_fields=['is_verified'])
+
+    def __str__(self):
+        return f"{self.email or self.phone} ({self.shop.name})"
+
+
+class CustomerOtp(models.Model):
+    """Pending OTP for a customer, kept off the wide customers row."""
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name='pending_otp')
+    code_hash = models.CharField(max_length=64)
+    expires_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        db_table = 'customer_otp'
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+
+class CustomerCredential(models.Model):
+    """
+    Normalized login handle (email or phone) per shop. Lets a login resolve
+    `shop_id = ? AND credential = ?` with one unique-index probe instead of
+    an OR across two columns.
+    """
+    KIND_CHOICES = [('email', 'Email'), ('phone', 'Phone')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey('shop.Shop', on_delete=models.CASCADE, related_name='customer_credentials')
+    credential = models.CharField(max_length=255)
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='credentials')
+
+    class Meta:
+        db_table = 'customer_credentials'
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'credential'], name='unique_credential_per_shop'),
+        ]
+
+
+class IdentifierSequence(models.Model):
+    """High-water mark for block-reserved identifier sequences."""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'identifier_sequences'
+
+
+class LoyaltyTier(models.Model):
+    """
+    Per-shop tier threshold. Shops without rows use
+    CUSTOMER_TIER_THRESHOLDS.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey('shop.Shop', on_delete=models.CASCADE, related_name='loyalty_tiers')
+    name = models.CharField(max_length=10)
+    min_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'loyalty_tiers'
+        ordering = ['shop', 'min_spent']
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'name'], name='unique_tier_per_shop'),
+        ]
+
     def __str__(self):
-        return f"{self.email or self.phone} ({self.shop.name})"
\ No newline at end of file
+        return f"{self.name} >= {self.min_spent}"
+
+
+class TierWatermark(models.Model):
+    """How far the incremental tier engine has processed spent_updated_at."""
+    name = models.CharField(max_length=50, primary_key=True)
+    high_water = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tier_watermarks'
@@ -0,0 +1,155 @@
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
+from pre_registration.reaper import expiry_reaper
+
+OTP_TTL = timedelta(minutes=10)
+MAX_ATTEMPTS = 5
+
+
+def hash_code(customer_id, code):
+    """Keyed hash so stored OTPs are useless without SECRET_KEY."""
+    message = f"{customer_id}:{code}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+# ==========================================
+# 1. DATABASE STORE
+# ==========================================
+
+class DbOtpStore:
+    """
+    One narrow `customer_otp` row per customer. Issuing is a single upsert;
+    verifying is a single conditional DELETE, so two concurrent checks of
+    the same code can never both succeed.
+    """
+
+    @staticmethod
+    def _model():
+        from customers.models import CustomerOtp
+        return CustomerOtp
+
+    def issue(self, customer_id, code, ttl=OTP_TTL):
+        CustomerOtp = self._model()
+        CustomerOtp.objects.bulk_create(
+            [CustomerOtp(
+                customer_id=customer_id,
+                code_hash=hash_code(customer_id, code),
+                expires_at=timezone.now() + ttl,
+                attempts=0,
+            )],
+            update_conflicts=True,
+            unique_fields=['customer'],
+            update_fields=['code_hash', 'expires_at', 'attempts'],
+        )
+        expiry_reaper.ensure_started()
+
+    def consume(self, customer_id, code):
+        CustomerOtp = self._model()
+        now = timezone.now()
+        deleted, _ = CustomerOtp.objects.filter(
+            customer_id=customer_id,
+            code_hash=hash_code(customer_id, code),
+            expires_at__gt=now,
+            attempts__lt=MAX_ATTEMPTS,
+        ).delete()
+        if deleted:
+            return True, None
+
+        # Failure path only: work out why, and count the attempt.
+        pending = CustomerOtp.objects.filter(customer_id=customer_id)
+        state = pending.values_list('expires_at', 'attempts').first()
+        if state is None:
+            return False, "Invalid code."
+        expires_at, attempts = state
+        if expires_at <= now:
+            pending.delete()
+            return False, "OTP expired."
+        if attempts + 1 >= MAX_ATTEMPTS:
+            pending.delete()
+            return False, "Too many attempts. Request a new code."
+        pending.update(attempts=F('attempts') + 1)
+        return False, "Invalid code."
+
+    def discard(self, customer_id):
+        self._model().objects.filter(customer_id=customer_id).delete()
+
+
+# ==========================================
+# 2. CACHE STORE (DB FALLBACK)
+# ==========================================
+
+class CacheOtpStore:
+    """
+    Keeps OTPs in a Django cache with native expiry. Only use it with a
+    cache shared by all workers (e.g. redis); locmem is per-process.
+    If the cache is unreachable, codes go to the database store instead, and
+    verification checks both.
+    """
+
+    def __init__(self, alias=None):
+        self.alias = alias or getattr(settings, 'CUSTOMER_OTP_CACHE', 'default')
+        self.fallback = DbOtpStore()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def _key(customer_id):
+        return f"customer-otp:{customer_id}"
+
+    def issue(self, customer_id, code, ttl=OTP_TTL):
+        expires = timezone.now() + ttl
+        entry = {'hash': hash_code(customer_id, code), 'attempts': 0, 'expires': expires.timestamp()}
+        try:
+            self.cache.set(self._key(customer_id), entry, int(ttl.total_seconds()))
+        except Exception:
+            self.fallback.issue(customer_id, code, ttl)
+
+    def consume(self, customer_id, code):
+        key = self._key(customer_id)
+        try:
+            entry = self.cache.get(key)
+        except Exception:
+            entry = None
+        if entry is None:
+            return self.fallback.consume(customer_id, code)
+
+        if hmac.compare_digest(entry['hash'], hash_code(customer_id, code)):
+            # delete() reports whether this caller removed the key, so only
+            # one of several concurrent verifications wins.
+            if self.cache.delete(key):
+                return True, None
+            return False, "Invalid code."
+
+        entry['attempts'] += 1
+        if entry['attempts'] >= MAX_ATTEMPTS:
+            self.cache.delete(key)
+            return False, "Too many attempts. Request a new code."
+        remaining = entry['expires'] - timezone.now().timestamp()
+        if remaining > 0:
+            self.cache.set(key, entry, max(1, int(remaining)))
+        return False, "Invalid code."
+
+    def discard(self, customer_id):
+        self.cache.delete(self._key(customer_id))
+        self.fallback.discard(customer_id)
+
+
+_store = None
+
+
+def get_otp_store():
+    """CUSTOMER_OTP_STORE selects 'db' (default) or 'cache'."""
+    global _store
+    if _store is None:
+        choice = getattr(settings, 'CUSTOMER_OTP_STORE', 'db')
+        _store = CacheOtpStore() if choice == 'cache' else DbOtpStore()
+    return _store
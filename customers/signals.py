@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from customers.models import LoyaltyTier
+from customers.tiers import mark_shop_dirty
+
+
+# ==========================================
+# LOYALTY TIER CONFIGURATION
+# ==========================================
+
+@receiver([post_save, post_delete], sender=LoyaltyTier)
+def requeue_shop_tiers(sender, instance, **kwargs):
+    shop_id = instance.shop_id
+    transaction.on_commit(lambda: mark_shop_dirty(shop_id))
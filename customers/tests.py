@@ -1,3 +1,206 @@
-from django.test import TestCase
+import re
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
 
-# Create your tests here.
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from customers.hashing import get_customer_hasher
+from customers.identifiers import BlockAllocator, encode
+from customers.models import Customer, CustomerCredential, CustomerOtp, TierWatermark
+from customers.otp_store import MAX_ATTEMPTS, DbOtpStore
+from customers.tiers import SAFETY_LAG, WATERMARK, run_incremental
+from shop.models import Shop
+
+
+class IncrementalTierTests(TestCase):
+    """The watermark engine re-tiers changed customers, late commits included."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        cls.customer, _ = Customer.objects.register(cls.shop.pk, 'customer-secret', email='buyer@example.com')
+
+    def spend(self, amount, at):
+        # A spending write that bypasses apply_spending's own re-tiering.
+        Customer.objects.filter(pk=self.customer.pk).update(total_spent=amount, spent_updated_at=at)
+
+    def tier(self):
+        self.customer.refresh_from_db()
+        return self.customer.tier
+
+    def test_changed_customers_are_tiered_and_the_mark_advances(self):
+        now = timezone.now()
+        self.spend(Decimal('600'), now - SAFETY_LAG * 3)
+        self.assertEqual(run_incremental(now=now), (1, 1))
+        self.assertEqual(self.tier(), 'SILVER')
+        self.assertEqual(TierWatermark.objects.get(name=WATERMARK).high_water, now - SAFETY_LAG)
+        # Nothing changed since: nothing is scanned.
+        self.assertEqual(run_incremental(now=now + timedelta(seconds=1)), (0, 0))
+
+    def test_write_committed_late_behind_the_clock_is_still_tiered(self):
+        now = timezone.now()
+        run_incremental(now=now)
+
+        # Stamped inside the lag window of that run, but committed after it:
+        # the run could not have seen it.
+        self.spend(Decimal('2500'), now - SAFETY_LAG / 2)
+        self.assertEqual(self.tier(), 'BRONZE')
+        self.assertEqual(run_incremental(now=now + SAFETY_LAG * 2), (1, 1))
+        self.assertEqual(self.tier(), 'GOLD')
+
+    def test_writes_inside_the_lag_wait_for_a_later_run(self):
+        now = timezone.now()
+        self.spend(Decimal('600'), now - SAFETY_LAG / 2)
+        self.assertEqual(run_incremental(now=now), (0, 0))
+        self.assertEqual(run_incremental(now=now + SAFETY_LAG), (1, 1))
+        self.assertEqual(self.tier(), 'SILVER')
+
+
+class DbOtpStoreTests(TestCase):
+    """Codes are consumed by one conditional DELETE: once, and only while valid."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        cls.customer, _ = Customer.objects.register(cls.shop.pk, 'customer-secret', email='buyer@example.com')
+
+    def setUp(self):
+        self.store = DbOtpStore()
+
+    def test_a_code_is_consumed_once(self):
+        self.store.issue(self.customer.pk, '123456')
+        self.assertEqual(self.store.consume(self.customer.pk, '123456'), (True, None))
+        self.assertEqual(self.store.consume(self.customer.pk, '123456'), (False, "Invalid code."))
+        self.assertFalse(CustomerOtp.objects.exists())
+
+    def test_reissuing_replaces_the_code(self):
+        self.store.issue(self.customer.pk, '111111')
+        self.store.issue(self.customer.pk, '222222')
+        self.assertFalse(self.store.consume(self.customer.pk, '111111')[0])
+        self.assertTrue(self.store.consume(self.customer.pk, '222222')[0])
+
+    def test_wrong_codes_use_up_the_attempts(self):
+        self.store.issue(self.customer.pk, '123456')
+        self.assertEqual(self.store.consume(self.customer.pk, '000000'), (False, "Invalid code."))
+        for _ in range(MAX_ATTEMPTS - 2):
+            self.store.consume(self.customer.pk, '000000')
+        self.assertEqual(
+            self.store.consume(self.customer.pk, '000000'), (False, "Too many attempts. Request a new code."),
+        )
+        self.assertFalse(CustomerOtp.objects.exists())
+        self.assertFalse(self.store.consume(self.customer.pk, '123456')[0])
+
+    def test_an_expired_code_is_not_consumable(self):
+        self.store.issue(self.customer.pk, '123456', ttl=timedelta(minutes=10))
+        CustomerOtp.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.store.consume(self.customer.pk, '123456'), (False, "OTP expired."))
+        self.assertFalse(CustomerOtp.objects.exists())
+        self.assertFalse(self.store.consume(self.customer.pk, '123456')[0])
+
+
+class CustomerCredentialTests(TestCase):
+    """Normalized logins are unique per shop, and stored hashes follow the shop's profile."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop, cls.other_shop = Shop.objects.create(), Shop.objects.create()
+        cls.customer, _ = Customer.objects.register(
+            cls.shop.pk, 'customer-secret', email='Buyer@Example.com', phone='+1 (555) 010-0000',
+        )
+
+    def test_credentials_are_unique_per_shop_once_normalized(self):
+        for handles in ({'email': 'buyer@example.COM'}, {'phone': '+15550100000'}):
+            customer, message = Customer.objects.register(self.shop.pk, 'secret', **handles)
+            self.assertIsNone(customer, handles)
+        customer, _ = Customer.objects.register(self.other_shop.pk, 'secret', email='buyer@example.com')
+        self.assertIsNotNone(customer)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CustomerCredential.objects.create(
+                shop=self.shop, customer=customer, kind='email', credential='buyer@example.com',
+            )
+
+    def test_login_resolves_normalized_handles_and_follows_changes(self):
+        self.assertEqual(Customer.objects.find_by_credential(self.shop.pk, 'BUYER@example.com'), self.customer)
+        self.assertEqual(Customer.objects.find_by_credential(self.shop.pk, '+1 555 010 0000'), self.customer)
+        self.assertIsNone(Customer.objects.find_by_credential(self.other_shop.pk, 'buyer@example.com'))
+
+        self.customer.email = 'new@example.com'
+        self.customer.save()
+        self.assertIsNone(Customer.objects.find_by_credential(self.shop.pk, 'buyer@example.com'))
+        self.assertEqual(Customer.objects.find_by_credential(self.shop.pk, 'new@example.com'), self.customer)
+
+    def test_login_rehashes_with_the_shops_current_profile(self):
+        with override_settings(CUSTOMER_PASSWORD_PROFILES={'default': {'algorithm': 'pbkdf2_sha256', 'iterations': 1000}}):
+            customer, _ = Customer.objects.register(self.other_shop.pk, 'old-secret', email='legacy@example.com')
+        self.assertEqual(customer.password.split('$')[1], '1000')
+
+        customer, _ = Customer.objects.authenticate_customer(self.other_shop.pk, 'legacy@example.com', 'old-secret')
+        self.assertIsNotNone(customer)
+        stored = Customer.objects.get(pk=customer.pk).password
+        self.assertEqual(stored.split('$')[1], str(get_customer_hasher(self.other_shop.pk).iterations))
+        self.assertIsNotNone(
+            Customer.objects.authenticate_customer(self.other_shop.pk, 'legacy@example.com', 'old-secret')[0]
+        )
+
+    def test_backfill_stops_on_colliding_handles(self):
+        backfill = import_module('customers.migrations.0003_customer_credentials').backfill_credentials
+        twin, _ = Customer.objects.register(self.shop.pk, 'secret', email='twin@example.com')
+        CustomerCredential.objects.all().delete()
+        backfill(apps, None)
+        self.assertEqual(
+            set(CustomerCredential.objects.values_list('customer_id', 'credential')),
+            {(self.customer.pk, 'buyer@example.com'), (self.customer.pk, '+15550100000'),
+             (twin.pk, 'twin@example.com')},
+        )
+
+        # Only differs in case from the first customer's email.
+        Customer.objects.filter(pk=twin.pk).update(email='BUYER@example.com')
+        CustomerCredential.objects.all().delete()
+        with self.assertRaisesMessage(RuntimeError, "'buyer@example.com' is used by customers"):
+            backfill(apps, None)
+
+
+class IdentifierTests(TransactionTestCase):
+    """Sequence blocks never overlap, across allocators and across refills."""
+
+    def test_identifiers_are_unique_across_blocks(self):
+        first, second = BlockAllocator('test', block_size=3), BlockAllocator('test', block_size=3)
+        values = []
+        for _ in range(4):
+            values += first.allocate(2) + second.allocate(1)
+        values += first.allocate(7)
+        self.assertEqual(len(set(values)), len(values))
+        # Each refill took a fresh block, so no more than the blocks were used.
+        self.assertLessEqual(max(values), 3 * 9)
+
+        codes = [encode(value) for value in values]
+        self.assertEqual(len(set(codes)), len(codes))
+        for code in codes:
+            self.assertRegex(code, r'\ACID-[0-9A-Z]{8}\Z')
+
+    def test_bulk_registered_customers_get_encoded_identifiers_and_logins(self):
+        shop = Shop.objects.create()
+        Customer.objects.register(shop.pk, 'secret', email='taken@example.com')
+        customers, errors = Customer.objects.bulk_register(shop.pk, [
+            {'email': 'one@example.com', 'password': 'one-secret'},
+            {'phone': '+1 555 010 0002', 'first_name': 'Two'},
+            {'email': 'TAKEN@example.com'},
+            {'email': 'one@example.com'},
+            {},
+        ], batch_size=1)
+
+        self.assertEqual([index for index, _ in errors], [2, 3, 4])
+        stored = {customer.pk: customer for customer in Customer.objects.filter(pk__in=[c.pk for c in customers])}
+        self.assertEqual(len(stored), 2)
+        for customer in customers:
+            self.assertRegex(customer.identifier, r'\ACID-[0-9A-Z]{8}\Z')
+            self.assertEqual(stored[customer.pk].identifier, customer.identifier)
+        self.assertEqual(stored[customers[1].pk].first_name, 'Two')
+        self.assertIsNotNone(Customer.objects.authenticate_customer(shop.pk, 'ONE@example.com', 'one-secret')[0])
+        self.assertEqual(Customer.objects.find_by_credential(shop.pk, '+15550100002'), customers[1])
+        self.assertTrue(stored[customers[1].pk].password.startswith('!'))
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+WATERMARK = 'customer-tiers'
+
+# Spending writes that commit later than this behind the clock would be
+# skipped by the watermark, so the engine never reads that close to "now".
+SAFETY_LAG = timedelta(seconds=5)
+
+
+def default_thresholds():
+    configured = getattr(settings, 'CUSTOMER_TIER_THRESHOLDS', {'BRONZE': 0})
+    return sorted(((Decimal(str(floor)), name) for name, floor in configured.items()), reverse=True)
+
+
+def shop_thresholds(shop_ids):
+    """{shop_id: [(min_spent, name), ...] highest first}, in one query."""
+    from customers.models import LoyaltyTier
+
+    shop_ids = set(shop_ids)
+    tiers = {}
+    for shop_id, name, floor in (
+        LoyaltyTier.objects.filter(shop_id__in=shop_ids).values_list('shop_id', 'name', 'min_spent')
+    ):
+        tiers.setdefault(shop_id, []).append((floor, name))
+    defaults = default_thresholds()
+    return {
+        shop_id: sorted(tiers[shop_id], reverse=True) if shop_id in tiers else defaults
+        for shop_id in shop_ids
+    }
+
+
+def tier_for(total_spent, thresholds):
+    for floor, name in thresholds:
+        if total_spent >= floor:
+            return name
+    return thresholds[-1][1] if thresholds else 'BRONZE'
+
+
+def refresh_tiers(queryset, batch_size=1000):
+    """
+    Recomputes the tier of every customer in `queryset` and writes back
+    only the ones that changed, with one bulk_update per batch.
+    Returns (scanned, changed).
+    """
+    from customers.models import Customer
+
+    scanned = changed = 0
+    rows = queryset.order_by().only('id', 'shop_id', 'total_spent', 'tier').iterator(chunk_size=batch_size)
+    batch = []
+
+    def flush(batch):
+        thresholds = shop_thresholds(customer.shop_id for customer in batch)
+        moved = []
+        for customer in batch:
+            tier = tier_for(customer.total_spent, thresholds[customer.shop_id])
+            if tier != customer.tier:
+                customer.tier = tier
+                moved.append(customer)
+        Customer.objects.bulk_update(moved, ['tier'], batch_size=batch_size)
+        return len(moved)
+
+    for customer in rows:
+        batch.append(customer)
+        if len(batch) >= batch_size:
+            scanned, changed = scanned + len(batch), changed + flush(batch)
+            batch = []
+    if batch:
+        scanned, changed = scanned + len(batch), changed + flush(batch)
+    return scanned, changed
+
+
+def run_incremental(batch_size=1000, now=None):
+    """
+    Re-evaluates customers whose spending changed since the last run, then
+    advances the high-water mark. Cost follows the number of changed rows,
+    not the size of the customers table. Returns (scanned, changed).
+    """
+    from customers.models import Customer, TierWatermark
+
+    cutoff = (now or timezone.now()) - SAFETY_LAG
+    with transaction.atomic():
+        mark, _ = TierWatermark.objects.select_for_update().get_or_create(
+            name=WATERMARK, defaults={'high_water': datetime.min.replace(tzinfo=dt_timezone.utc)},
+        )
+        if cutoff <= mark.high_water:
+            return 0, 0
+        dirty = Customer.objects.filter(spent_updated_at__gt=mark.high_water, spent_updated_at__lte=cutoff)
+        result = refresh_tiers(dirty, batch_size=batch_size)
+        mark.high_water = cutoff
+        mark.save(update_fields=['high_water'])
+    return result
+
+
+def mark_shop_dirty(shop_id):
+    """Queues every customer of a shop after its tier table changed."""
+    from customers.models import Customer
+
+    return Customer.objects.filter(shop_id=shop_id).update(spent_updated_at=timezone.now())
@@ -1,8 +1,10 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import permissions, status
 from django.http import HttpResponse
 from .models import Customer  # Ensure your model is named Customer
+from access.permissions import IsCustomer
+from access.tokens import issue_token
 
 # Basic index to resolve your routing error
 def index(request):
@@ -13,6 +15,8 @@ def index(request):
 # ==========================================
 
 class RegisterView(APIView):
+    permission_classes = [permissions.AllowAny]
+
     def post(self, request):
         data = request.data
         customer, msg = Customer.objects.register(
@@ -28,6 +32,8 @@ class RegisterView(APIView):
         return Response({"error": msg}, status=status.HTTP_400_BAD_REQUEST)
 
 class LoginView(APIView):
+    permission_classes = [permissions.AllowAny]
+
     def post(self, request):
         data = request.data
         customer, msg = Customer.objects.authenticate_customer(
@@ -36,10 +42,13 @@ class LoginView(APIView):
             password=data.get('password')
         )
         if customer:
+            key, token = issue_token(customer)
             return Response({
                 "message": msg,
                 "identifier": customer.identifier,
-                "email": customer.email
+                "email": customer.email,
+                "token": key,
+                "expires_at": token.expires_at,
             }, status=status.HTTP_200_OK)
         return Response({"error": msg}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -48,6 +57,8 @@ class LoginView(APIView):
 # ==========================================
 
 class RequestOTPView(APIView):
+    permission_classes = [permissions.AllowAny]
+
     def post(self, request):
         data = request.data
         customer, result = Customer.objects.request_otp(
@@ -60,6 +71,8 @@ class RequestOTPView(APIView):
         return Response({"error": result}, status=status.HTTP_404_NOT_FOUND)
 
 class VerifyOTPView(APIView):
+    permission_classes = [permissions.AllowAny]
+
     def post(self, request):
         data = request.data
         success, msg = Customer.objects.verify_otp(
@@ -70,6 +83,8 @@ class VerifyOTPView(APIView):
         return Response({"message": msg}, status=status.HTTP_200_OK if success else status.HTTP_400_BAD_REQUEST)
 
 class ResetPasswordView(APIView):
+    permission_classes = [permissions.AllowAny]
+
     def post(self, request):
         data = request.data
         success, msg = Customer.objects.reset_password_via_otp(
@@ -83,24 +98,29 @@ class ResetPasswordView(APIView):
 # ==========================================
 # 3. PROFILE & ACCOUNT MANAGEMENT
 # ==========================================
+# The customer comes from the bearer token (see LoginView), not the body.
 
 class UpdateProfileView(APIView):
+    permission_classes = [IsCustomer]
+
     def patch(self, request):
         data = request.data
         success, msg = Customer.objects.update_basic_info(
-            shop_id=data.get('shop_id'),
-            identifier=data.get('identifier'),
+            shop_id=request.user.shop_id,
+            identifier=request.user.identifier,
             first_name=data.get('first_name'),
             last_name=data.get('last_name')
         )
         return Response({"message": msg}, status=status.HTTP_200_OK if success else status.HTTP_400_BAD_REQUEST)
 
 class UpdatePhoneView(APIView):
+    permission_classes = [IsCustomer]
+
     def patch(self, request):
         data = request.data
         success, msg = Customer.objects.update_contact_phone(
-            shop_id=data.get('shop_id'),
-            identifier=data.get('identifier'),
+            shop_id=request.user.shop_id,
+            identifier=request.user.identifier,
             new_phone=data.get('new_phone')
         )
         return Response({"message": msg}, status=status.HTTP_200_OK if success else status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -1,6 +1,8 @@
 import uuid
 from django.db import models
 
+from shop.tenancy import TenantManager
+
 class Details(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     shop = models.OneToOneField('shop.Shop', on_delete=models.CASCADE, related_name='details')
@@ -12,6 +14,16 @@ class Details(models.Model):
     url = models.SlugField(max_length=255, unique=True, blank=True, null=True)
     title = models.CharField(max_length=255,default='new Shop')
 
+    objects = models.Manager()
+    tenant = TenantManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the slug resolver drop the old url after a change.
+        instance._saved_url = instance.__dict__.get('url')
+        return instance
+
     class Meta:
         db_table = 'details'
         verbose_name = 'detail'
@@ -1,9 +1,19 @@
-from rest_framework import viewsets
-from admin import serializers
+from rest_framework import permissions, viewsets
+
+from access.permissions import IsShopMember
 from details.models import Details
 from details.serializer import DetailsSerializer
 
 class DetailsViewSets(viewsets.ModelViewSet):
-    queryset = Details.objects.all()
     serializer_class = DetailsSerializer
-    lookup_field = 'shop_id'
\ No newline at end of file
+    lookup_field = 'shop_id'
+
+    def get_queryset(self):
+        # Only the shop resolved by TenantMiddleware (lookup id or X-Shop).
+        return Details.tenant.all()
+
+    def get_permissions(self):
+        # Storefront details are edited by the shop's admins only.
+        if self.request.method not in permissions.SAFE_METHODS:
+            return [IsShopMember()]
+        return super().get_permissions()
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ImageConfig(AppConfig):
     name = 'image'
+
+    def ready(self):
+        from image import signals  # noqa: F401
@@ -0,0 +1,223 @@
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_ROOT = 'derivatives'
+
+# Pillow save() arguments per output format.
+FORMAT_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'avif': {'format': 'AVIF', 'quality': 55, 'speed': 8},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+MIME_TYPES = {'webp': 'image/webp', 'avif': 'image/avif', 'jpeg': 'image/jpeg'}
+
+
+def _widths():
+    return tuple(sorted(set(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 640, 1280)))))
+
+
+def _formats():
+    return tuple(getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ('webp',)))
+
+
+# ==========================================
+# 1. RENDERING (runs in worker processes)
+# ==========================================
+
+def render_variants(data, widths, formats):
+    """
+    Decodes the original once and encodes every (width, format) pair.
+    Never upscales: widths above the original collapse to the original size.
+    Returns (width, height, [(variant_width, variant_height, format, bytes)]).
+    """
+    from PIL import Image as PILImage, ImageOps, features
+
+    with PILImage.open(io.BytesIO(data)) as original:
+        original = ImageOps.exif_transpose(original)
+        original.load()
+    has_alpha = original.mode in ('RGBA', 'LA') or 'transparency' in original.info
+    original = original.convert('RGBA' if has_alpha else 'RGB')
+    width, height = original.size
+
+    rendered = []
+    # Largest first, so each step shrinks the previous result instead of the
+    # (possibly multi-megapixel) original.
+    source = original
+    for target in sorted({min(w, width) for w in widths}, reverse=True):
+        if target != source.width:
+            size = (target, max(1, round(height * target / width)))
+            source = source.resize(size, PILImage.Resampling.LANCZOS, reducing_gap=3.0)
+        for fmt in formats:
+            if fmt != 'jpeg' and not features.check(fmt):
+                continue
+            frame = source.convert('RGB') if fmt == 'jpeg' else source
+            buffer = io.BytesIO()
+            frame.save(buffer, **FORMAT_OPTIONS[fmt])
+            rendered.append((source.width, source.height, fmt, buffer.getvalue()))
+    rendered.reverse()
+    return width, height, rendered
+
+
+_pool = None
+_dispatcher = None
+_pool_lock = threading.Lock()
+
+
+def _executors():
+    """
+    Lazily starts the render process pool plus a small thread pool that
+    feeds it, so request threads only pay for scheduling.
+    """
+    global _pool, _dispatcher
+    with _pool_lock:
+        if _pool is None:
+            workers = max(1, getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2))
+            # spawn: forking a threaded server process is unsafe.
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+            _dispatcher = ThreadPoolExecutor(workers, thread_name_prefix='image-derivatives')
+        return _pool, _dispatcher
+
+
+def shutdown():
+    global _pool, _dispatcher
+    with _pool_lock:
+        if _pool is not None:
+            _dispatcher.shutdown(wait=True)
+            _pool.shutdown(wait=True)
+        _pool = _dispatcher = None
+
+
+# ==========================================
+# 2. STORAGE
+# ==========================================
+
+def build_manifest(data, render=render_variants):
+    """
+    Stores the derivatives of `data` under a path derived from its content
+    and the render settings, and returns their manifest. Identical uploads
+    share one set of files, and changing the settings yields new paths, so
+    derivative URLs can be cached forever.
+    """
+    widths, formats = _widths(), _formats()
+    digest = hashlib.sha256(data)
+    digest.update(json.dumps([widths, formats, [FORMAT_OPTIONS[f] for f in formats]]).encode())
+    content_hash = digest.hexdigest()[:32]
+    base = f"{DERIVATIVE_ROOT}/{content_hash[:2]}/{content_hash}"
+    manifest_name = f"{base}/manifest.json"
+
+    if default_storage.exists(manifest_name):
+        with default_storage.open(manifest_name, 'rb') as fh:
+            return json.load(fh)
+
+    width, height, rendered = render(data, widths, formats)
+    variants = []
+    for variant_width, variant_height, fmt, blob in rendered:
+        name = f"{base}/{variant_width}w.{fmt}"
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(blob))
+        variants.append({
+            'name': name, 'format': fmt, 'width': variant_width,
+            'height': variant_height, 'bytes': len(blob),
+        })
+    manifest = {'hash': content_hash, 'width': width, 'height': height, 'variants': variants}
+    default_storage.save(manifest_name, ContentFile(json.dumps(manifest).encode()))
+    return manifest
+
+
+def srcset(manifest, fmt=None, build_url=None):
+    """Formats a manifest as an HTML srcset string for one format."""
+    if not manifest:
+        return None
+    fmt = fmt or _formats()[0]
+    build_url = build_url or default_storage.url
+    entries = [
+        f"{build_url(variant['name'])} {variant['width']}w"
+        for variant in manifest.get('variants', [])
+        if variant['format'] == fmt
+    ]
+    return ', '.join(entries) or None
+
+
+# ==========================================
+# 3. SCHEDULING
+# ==========================================
+
+def stale_fields(instance, fields):
+    """File fields whose current upload has no matching derivatives."""
+    variants = instance.variants or {}
+    stale = []
+    for field in fields:
+        upload = getattr(instance, field)
+        entry = variants.get(field)
+        if upload:
+            if entry is None or entry.get('source') != upload.name:
+                stale.append(field)
+        elif entry is not None:
+            stale.append(field)
+    return stale
+
+
+def generate_variants(model, pk, fields, render=render_variants):
+    """
+    Renders derivatives for `fields` of one row and saves the manifests on
+    its `variants` JSON field. Safe to re-run: already-built content is
+    reused from storage.
+    """
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return None
+    variants = dict(instance.variants or {})
+    for field in stale_fields(instance, fields):
+        upload = getattr(instance, field)
+        if not upload:
+            variants.pop(field, None)
+            continue
+        try:
+            with upload.open('rb') as fh:
+                data = fh.read()
+            manifest = build_manifest(data, render=render)
+        except Exception:
+            logger.exception("Could not build derivatives for %s %s.%s", model.__name__, pk, field)
+            continue
+        manifest['source'] = upload.name
+        variants[field] = manifest
+    if variants != (instance.variants or {}):
+        instance.variants = variants
+        instance.save(update_fields=['variants'])
+    return variants
+
+
+def _generate_in_pool(model, pk, fields):
+    pool, _ = _executors()
+    try:
+        generate_variants(model, pk, fields, render=lambda *args: pool.submit(render_variants, *args).result())
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(instance, fields):
+    """
+    Queues derivative generation for changed uploads once the surrounding
+    transaction commits. With IMAGE_DERIVATIVE_WORKERS = 0 the work is done
+    inline instead (tests, management commands).
+    """
+    stale = stale_fields(instance, fields)
+    if not stale:
+        return
+    model, pk = type(instance), instance.pk
+    if getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2) <= 0:
+        transaction.on_commit(lambda: generate_variants(model, pk, stale))
+    else:
+        transaction.on_commit(lambda: _executors()[1].submit(_generate_in_pool, model, pk, stale))
@@ -0,0 +1,35 @@
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from image import derivatives
+from image.models import Image
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Builds missing image derivatives for shop images and products."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rebuild manifests even if present.")
+
+    def handle(self, *args, **options):
+        _, dispatcher = derivatives._executors()
+        futures = []
+        try:
+            for model in (Image, Product):
+                fields = model.VARIANT_FIELDS
+                rows = model.objects.only('pk', 'variants', *fields).iterator(chunk_size=500)
+                for instance in rows:
+                    if options['force']:
+                        instance.variants = {}
+                        model.objects.filter(pk=instance.pk).update(variants={})
+                    if derivatives.stale_fields(instance, fields):
+                        futures.append(dispatcher.submit(
+                            derivatives._generate_in_pool, model, instance.pk, fields
+                        ))
+            wait(futures)
+        finally:
+            derivatives.shutdown()
+        failed = sum(1 for future in futures if future.exception())
+        self.stdout.write(f"Processed {len(futures)} rows, {failed} failed.")
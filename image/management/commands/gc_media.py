@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from image import storage
+from image.models import Image
+from products.models import Product
+
+MODELS = (Image, Product)
+
+
+class Command(BaseCommand):
+    help = "Deletes media blobs that no shop image or product references."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=3600,
+                            help="Keep blobs uploaded within this many seconds (default 3600).")
+        parser.add_argument('--reconcile', action='store_true',
+                            help="Recount references from the tables before collecting.")
+        parser.add_argument('--adopt', action='store_true',
+                            help="Move files uploaded before content addressing into blobs first.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['adopt'] and not options['dry_run']:
+            adopted = storage.adopt_legacy_files(MODELS)
+            self.stdout.write(f"Adopted {adopted} legacy file references.")
+        if options['reconcile'] and not options['dry_run']:
+            drifted = storage.reconcile_refcounts(MODELS)
+            self.stdout.write(f"Corrected {drifted} refcounts.")
+
+        removed = storage.collect_garbage(
+            grace=timedelta(seconds=options['grace']), dry_run=options['dry_run'],
+        )
+        verb = "Would remove" if options['dry_run'] else "Removed"
+        self.stdout.write(f"{verb} {len(removed)} blobs.")
+        for name in removed:
+            self.stdout.write(f"  {name}")
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+import image.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('image', '0003_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='image',
+            name='banner',
+            field=models.ImageField(blank=True, null=True, storage=image.storage.get_blob_storage, upload_to='shop/banners/'),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='cover',
+            field=models.ImageField(blank=True, null=True, storage=image.storage.get_blob_storage, upload_to='shop/covers/'),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='logo',
+            field=models.ImageField(blank=True, null=True, storage=image.storage.get_blob_storage, upload_to='shop/logos/'),
+        ),
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('size', models.BigIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'media_blobs',
+                'indexes': [models.Index(fields=['refcount', 'last_seen'], name='media_blobs_refcoun_644755_idx')],
+            },
+        ),
+    ]
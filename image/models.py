@@ -1,16 +1,44 @@
 import uuid
 from django.db import models
 
+from image.storage import BlobReferencesMixin, get_blob_storage
+from shop.tenancy import TenantManager
 
-class Image(models.Model):
+
+class Image(BlobReferencesMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     shop = models.OneToOneField('shop.Shop', on_delete=models.CASCADE, related_name='image')
-    logo = models.ImageField(upload_to='shop/logos/', null=True, blank=True)
-    cover = models.ImageField(upload_to='shop/covers/', null=True, blank=True)
-    banner = models.ImageField(upload_to='shop/banners/', null=True, blank=True)
+    logo = models.ImageField(upload_to='shop/logos/', storage=get_blob_storage, null=True, blank=True)
+    cover = models.ImageField(upload_to='shop/covers/', storage=get_blob_storage, null=True, blank=True)
+    banner = models.ImageField(upload_to='shop/banners/', storage=get_blob_storage, null=True, blank=True)
+    # Resized/compressed renditions per field, see image/derivatives.py
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = models.Manager()
+    tenant = TenantManager()
+
     class Meta:
         db_table = 'image'
         verbose_name = 'image'
 
+    VARIANT_FIELDS = ('logo', 'cover', 'banner')
+
+
+
+class Blob(models.Model):
+    """One stored file in ContentAddressedStorage (image/storage.py)."""
+    name = models.CharField(primary_key=True, max_length=255)
+    size = models.BigIntegerField()
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last time an upload resolved to this blob; protects it from gc_media.
+    last_seen = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'media_blobs'
+        indexes = [models.Index(fields=['refcount', 'last_seen'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
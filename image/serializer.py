@@ -1,10 +1,45 @@
+from image.derivatives import MIME_TYPES, srcset
 from image.models import Image
 from rest_framework import serializers
 
 
+class SrcsetField(serializers.Field):
+    """
+    Read-only responsive-image description of one file field, built from the
+    model's `variants` manifests. None until derivatives exist.
+    """
+
+    def __init__(self, file_field, **kwargs):
+        self.file_field = file_field
+        kwargs.setdefault('source', 'variants')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        manifest = (variants or {}).get(self.file_field)
+        if not manifest:
+            return None
+        request = self.context.get('request')
+        build_url = None
+        if request is not None:
+            from django.core.files.storage import default_storage
+            build_url = lambda name: request.build_absolute_uri(default_storage.url(name))
+        formats = list(dict.fromkeys(variant['format'] for variant in manifest['variants']))
+        sources = {fmt: srcset(manifest, fmt, build_url) for fmt in formats}
+        return {
+            'srcset': sources[formats[0]] if formats else None,
+            'sources': [{'type': MIME_TYPES[fmt], 'srcset': value} for fmt, value in sources.items()],
+            'width': manifest['width'],
+            'height': manifest['height'],
+        }
+
+
 class ImagesSerializer(serializers.ModelSerializer):
+    logo_srcset = SrcsetField('logo')
+    cover_srcset = SrcsetField('cover')
+    banner_srcset = SrcsetField('banner')
+
     class Meta:
         model = Image
-        fields = "__all__"
+        exclude = ("variants",)
         read_only_fields = ("id","shop","created_at","updated_at")
-
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from image.derivatives import schedule_variants
+from image.models import Image
+from image.storage import release_blob_references, track_blob_references
+
+
+# ==========================================
+# DERIVATIVE GENERATION
+# ==========================================
+
+@receiver(post_save, sender=Image)
+def build_shop_image_variants(sender, instance, **kwargs):
+    schedule_variants(instance, Image.VARIANT_FIELDS)
+
+
+# ==========================================
+# BLOB REFERENCE COUNTS
+# ==========================================
+
+@receiver(post_save, sender=Image)
+def track_shop_image_blobs(sender, instance, update_fields=None, **kwargs):
+    track_blob_references(instance, update_fields)
+
+
+@receiver(post_delete, sender=Image)
+def release_shop_image_blobs(sender, instance, **kwargs):
+    release_blob_references(instance)
@@ -0,0 +1,251 @@
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F, FileField
+from django.utils import timezone
+
+BLOB_ROOT = 'blobs'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every upload once, at a path derived from its SHA-256 digest, so
+    re-uploads and images shared between fields resolve to the same file.
+
+    The upload is hashed while it streams to a temporary file, in a single
+    pass; that file is then renamed to its digest, or dropped when the blob
+    already exists. Each blob has a `Blob` row whose refcount follows the
+    model fields that point at it (see BlobReferencesMixin), and
+    `manage.py gc_media` deletes unreferenced ones.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are digests: an existing file always has identical content.
+        return name
+
+    def _save(self, name, content):
+        from image.models import Blob
+
+        temp_path, digest, size = self._spool(content)
+        try:
+            extension = os.path.splitext(name)[1].lower()
+            blob_name = f"{BLOB_ROOT}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+            # Touch the row before checking the file; gc_media relies on this
+            # order to never delete a blob that an upload is about to reuse.
+            if not Blob.objects.filter(name=blob_name).update(last_seen=timezone.now()):
+                Blob.objects.get_or_create(name=blob_name, defaults={'size': size})
+            if not self.exists(blob_name):
+                full_path = self.path(blob_name)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                # Readers never see a partial blob, and concurrent writers of
+                # the same digest simply overwrite each other.
+                os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return blob_name
+
+    def _spool(self, content):
+        """
+        Streams `content` into a temporary file beside the blobs, hashing it
+        on the way. Returns (temp path, hex digest, size).
+        """
+        directory = self.path(f"{BLOB_ROOT}/.incoming")
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        digest, size = hashlib.sha256(), 0
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in _byte_chunks(content):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return temp_path, digest.hexdigest(), size
+
+
+def _byte_chunks(content):
+    for chunk in content.chunks():
+        yield chunk.encode() if isinstance(chunk, str) else chunk
+
+
+_blob_storage = None
+
+
+def get_blob_storage():
+    """Shared storage instance for FileField(storage=...)."""
+    global _blob_storage
+    if _blob_storage is None:
+        _blob_storage = ContentAddressedStorage()
+    return _blob_storage
+
+
+# ==========================================
+# REFERENCE COUNTING
+# ==========================================
+
+def blob_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def _references(instance, fields):
+    return {
+        field.attname: getattr(instance, field.attname).name or None
+        for field in fields
+        # Deferred fields are unknown, not empty.
+        if field.attname in instance.__dict__
+    }
+
+
+class BlobReferencesMixin:
+    """Remembers which blobs a loaded row pointed at, to diff on save."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_blobs = _references(instance, blob_fields(cls))
+        return instance
+
+
+def adjust_refcounts(deltas):
+    """Applies {blob name: delta} with one UPDATE per distinct delta."""
+    from image.models import Blob
+
+    by_delta = {}
+    for name, delta in deltas.items():
+        if name and delta:
+            by_delta.setdefault(delta, []).append(name)
+    for delta, names in by_delta.items():
+        Blob.objects.filter(name__in=names).update(refcount=F('refcount') + delta)
+
+
+def track_blob_references(instance, update_fields=None):
+    """post_save: +1 for newly referenced blobs, -1 for the ones replaced."""
+    fields = blob_fields(type(instance))
+    if update_fields is not None:
+        fields = [field for field in fields if field.name in update_fields]
+    previous = getattr(instance, '_saved_blobs', {})
+    current = _references(instance, fields)
+    deltas = Counter()
+    for attname, name in current.items():
+        old = previous.get(attname)
+        if old != name:
+            deltas[name] += 1
+            # An unknown previous value (deferred at load) is left to
+            # `gc_media --reconcile`: over-counting only delays collection.
+            deltas[old] -= 1
+    adjust_refcounts(deltas)
+    instance._saved_blobs = {**previous, **current}
+
+
+def release_blob_references(instance):
+    """post_delete: drops the references the deleted row held."""
+    deltas = Counter()
+    for name in _references(instance, blob_fields(type(instance))).values():
+        deltas[name] -= 1
+    adjust_refcounts(deltas)
+
+
+# ==========================================
+# GARBAGE COLLECTION
+# ==========================================
+
+def adopt_legacy_files(models):
+    """
+    Moves references to files saved before content addressing into blobs,
+    deduplicating them on the way, and removes the old copies. Returns the
+    number of references rewritten.
+    """
+    storage = get_blob_storage()
+    adopted, legacy = 0, set()
+    for model in models:
+        for field in blob_fields(model):
+            rows = (
+                model._base_manager
+                .exclude(**{f'{field.attname}__startswith': f'{BLOB_ROOT}/'})
+                .exclude(**{field.attname: ''})
+                .exclude(**{f'{field.attname}__isnull': True})
+                .values_list('pk', field.attname)
+            )
+            for pk, old_name in list(rows):
+                if not storage.exists(old_name):
+                    continue
+                with storage.open(old_name, 'rb') as fh:
+                    new_name = storage.save(old_name, fh)
+                model._base_manager.filter(pk=pk).update(**{field.attname: new_name})
+                adjust_refcounts({new_name: 1})
+                legacy.add(old_name)
+                adopted += 1
+    for name in legacy:
+        storage.delete(name)
+    return adopted
+
+
+def count_references(models):
+    """Recounts blob references by scanning every blob-backed field."""
+    counts = Counter()
+    for model in models:
+        names = [field.attname for field in blob_fields(model)]
+        if not names:
+            continue
+        for row in model._base_manager.values_list(*names).iterator(chunk_size=2000):
+            counts.update(name for name in row if name)
+    return counts
+
+
+def reconcile_refcounts(models):
+    """Rewrites drifted refcounts (bulk updates, raw SQL, deferred saves)."""
+    from image.models import Blob
+
+    counts = count_references(models)
+    drifted = []
+    for blob in Blob.objects.only('name', 'refcount').iterator(chunk_size=2000):
+        if blob.refcount != counts.get(blob.name, 0):
+            blob.refcount = counts.get(blob.name, 0)
+            drifted.append(blob)
+    Blob.objects.bulk_update(drifted, ['refcount'], batch_size=1000)
+    return len(drifted)
+
+
+def collect_garbage(grace=timedelta(hours=1), dry_run=False):
+    """
+    Deletes blobs nobody references and nobody has uploaded within `grace`.
+    Each file is first moved aside, then its row is deleted conditionally;
+    if an upload touched the row meanwhile, the file is moved back.
+    Returns the names removed.
+    """
+    from image.models import Blob
+
+    storage = get_blob_storage()
+    cutoff = timezone.now() - grace
+    candidates = Blob.objects.filter(refcount__lte=0, last_seen__lt=cutoff)
+    removed = []
+    for name in candidates.values_list('name', flat=True).iterator(chunk_size=1000):
+        if dry_run:
+            removed.append(name)
+            continue
+        path = storage.path(name)
+        trash = f"{path}.gc"
+        moved = os.path.exists(path)
+        if moved:
+            os.replace(path, trash)
+        deleted, _ = Blob.objects.filter(name=name, refcount__lte=0, last_seen__lt=cutoff).delete()
+        if deleted:
+            removed.append(name)
+            if moved:
+                os.remove(trash)
+        elif moved:
+            os.replace(trash, path)
+    return removed
@@ -1,8 +1,38 @@
-from django.db import models
+import os
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from image.derivatives import DERIVATIVE_ROOT
 from image.models import Image
-from rest_framework import viewsets
+from rest_framework import permissions, viewsets
+
+from access.permissions import IsShopMember
 from image.serializer import ImagesSerializer
 class ImageViewSets(viewsets.ModelViewSet):
-    queryset=Image.objects.all()
     serializer_class=ImagesSerializer
     lookup_field="shop_id"
+
+    def get_queryset(self):
+        return Image.tenant.all()
+
+    def get_permissions(self):
+        # Shop images are changed by the shop's admins only.
+        if self.request.method not in permissions.SAFE_METHODS:
+            return [IsShopMember()]
+        return super().get_permissions()
+
+
+def serve_derivative(request, path):
+    """
+    Serves generated derivatives. Their paths embed a content hash, so they
+    never change and can be cached for a year. In production the web server
+    should serve MEDIA_ROOT/derivatives/ with the same header.
+    """
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, DERIVATIVE_ROOT))
+    patch_cache_control(
+        response, public=True, immutable=True,
+        max_age=getattr(settings, 'IMAGE_DERIVATIVE_MAX_AGE', 60 * 60 * 24 * 365),
+    )
+    return response
@@ -0,0 +1,43 @@
+from django.conf import settings
+
+from notifications.models import OtpOutbox
+from notifications.ratelimit import TokenBucketLimiter
+
+DEFAULT_RATE_LIMITS = {
+    # Per recipient (within a shop): a burst of 3, then one every 2 minutes.
+    'credential': {'capacity': 3, 'per_second': 1 / 120},
+    # Per shop: absorbs login storms without letting one tenant flood the queue.
+    'shop': {'capacity': 300, 'per_second': 5},
+}
+
+_limiters = {}
+
+
+def _limiter(scope):
+    if scope not in _limiters:
+        config = {**DEFAULT_RATE_LIMITS, **getattr(settings, 'OTP_RATE_LIMITS', {})}[scope]
+        _limiters[scope] = TokenBucketLimiter(config['capacity'], config['per_second'], prefix=f'otp-{scope}')
+    return _limiters[scope]
+
+
+def allow_otp(recipient, shop_id=None):
+    """
+    Checks and consumes the per-credential and per-shop token buckets.
+    Call before generating a code so throttled requests never touch the DB.
+    """
+    credential_key = f"{shop_id or '-'}:{recipient.strip().lower()}"
+    shop_key = str(shop_id or '-')
+    if not (_limiter('credential').peek(credential_key) and _limiter('shop').peek(shop_key)):
+        return False
+    return _limiter('credential').consume(credential_key) and _limiter('shop').consume(shop_key)
+
+
+def enqueue_otp(recipient, code, channel='email', purpose='verification', shop_id=None):
+    """Queues an OTP for the delivery worker. Costs exactly one INSERT."""
+    return OtpOutbox.objects.create(
+        shop_id=shop_id,
+        channel=channel,
+        recipient=recipient,
+        purpose=purpose,
+        code=code,
+    )
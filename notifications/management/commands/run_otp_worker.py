@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from notifications.worker import OutboxWorker
+
+
+class Command(BaseCommand):
+    help = "Delivers queued OTP messages from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain due messages once and exit.")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker(batch_size=options['batch_size'], concurrency=options['concurrency'])
+        try:
+            if options['once']:
+                total = 0
+                while processed := worker.run_once():
+                    total += processed
+                self.stdout.write(self.style.SUCCESS(f"Processed {total} messages."))
+            else:
+                self.stdout.write(f"OTP worker {worker.worker_id} started.")
+                worker.run_forever(poll_interval=options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            worker.shutdown()
@@ -0,0 +1,43 @@
+import uuid
+from django.db import models
+from django.utils import timezone
+
+
+class OtpOutbox(models.Model):
+    """Durable queue of OTP messages waiting for the delivery worker."""
+    CHANNEL_CHOICES = [('email', 'Email'), ('sms', 'SMS')]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey('shop.Shop', on_delete=models.CASCADE, related_name='otp_messages', blank=True, null=True)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default='email')
+    recipient = models.CharField(max_length=255)
+    purpose = models.CharField(max_length=32, default='verification')
+    code = models.CharField(max_length=6, blank=True)  # Wiped once delivered
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'otp_outbox'
+        verbose_name = 'OTP Outbox Message'
+        indexes = [
+            # Worker polling: WHERE status = 'pending' AND next_attempt_at <= now
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['claimed_by', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel}:{self.recipient} ({self.status})"
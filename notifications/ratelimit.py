@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by an arbitrary string.
+    Each bucket holds up to `capacity` tokens and refills at `rate` tokens per
+    second.
+
+    With a cache (`cache`, a CACHES alias, by default RATE_LIMIT_CACHE read on
+    every call) the buckets live in it under `prefix`, so every worker spends
+    from the same bucket; use one shared by all workers (file-based on one
+    host, Redis or Memcached across hosts).
+    Updates are read-then-write, so workers racing on one key may each spend
+    the same token: the limit is approximate under contention, but no
+    longer multiplied by the number of workers.
+    Without one the buckets are in-process and the table is bounded;
+    idle buckets are evicted first. Each worker then enforces its own limit.
+    """
+
+    def __init__(self, capacity, rate, max_keys=100_000, prefix='ratelimit', cache=None):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.max_keys = max_keys
+        self.prefix = prefix
+        self._cache = cache
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ==========================================
+    # 1. BUCKET STORAGE
+    # ==========================================
+
+    @property
+    def cache_alias(self):
+        return self._cache or getattr(settings, 'RATE_LIMIT_CACHE', None)
+
+    def _cache_key(self, key):
+        return f"{self.prefix}:{key}"
+
+    def _load(self, key, alias):
+        if alias is None:
+            return self._buckets.get(key)
+        return caches[alias].get(self._cache_key(key))
+
+    def _store(self, key, state, alias):
+        if alias is None:
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            # Once it has had time to refill, a bucket is as good as absent.
+            timeout = max(1, int((self.capacity - state[0]) / self.rate) + 1) if self.rate else None
+            caches[alias].set(self._cache_key(key), state, timeout)
+
+    @staticmethod
+    def _now(alias):
+        # Shared buckets are compared across processes: wall clock there.
+        return time.monotonic() if alias is None else time.time()
+
+    # ==========================================
+    # 2. SPENDING
+    # ==========================================
+
+    def _refill(self, key, now, alias):
+        tokens, updated = self._load(key, alias) or (self.capacity, now)
+        return min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+
+    def peek(self, key, cost=1):
+        alias = self.cache_alias
+        with self._lock:
+            return self._refill(key, self._now(alias), alias) >= cost
+
+    def consume(self, key, cost=1):
+        alias = self.cache_alias
+        with self._lock:
+            now = self._now(alias)
+            tokens = self._refill(key, now, alias)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._store(key, (tokens, now), alias)
+            return allowed
+
+    def reset(self, key=None):
+        """Refills one bucket, or every in-process bucket."""
+        alias = self.cache_alias
+        with self._lock:
+            if key is not None and alias is not None:
+                caches[alias].delete(self._cache_key(key))
+            elif key is not None:
+                self._buckets.pop(key, None)
+            else:
+                self._buckets.clear()
@@ -0,0 +1,164 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications import dispatcher, transports
+from notifications.dispatcher import allow_otp, enqueue_otp
+from notifications.models import OtpOutbox
+from notifications.ratelimit import TokenBucketLimiter
+from notifications.transports import BaseTransport
+from notifications.worker import OutboxWorker
+from shop.models import Shop
+
+
+class RecordingTransport(BaseTransport):
+    """Test transport: records what it sends, fails for recipients in `failing`."""
+    sent = []
+    failing = set()
+
+    def send_batch(self, messages):
+        RecordingTransport.sent.extend(message.recipient for message in messages)
+        return {message.id: "mailbox full" for message in messages if message.recipient in self.failing}
+
+
+class TokenBucketLimiterTests(TestCase):
+    """Buckets refill over time, and workers sharing a cache share a bucket."""
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_a_bucket_allows_its_capacity_then_refills(self):
+        limiter = TokenBucketLimiter(2, 1, cache='default')
+        with mock.patch('notifications.ratelimit.time.time', return_value=1000.0):
+            self.assertTrue(limiter.consume('a'))
+            self.assertTrue(limiter.consume('a'))
+            self.assertFalse(limiter.peek('a'))
+            self.assertFalse(limiter.consume('a'))
+            self.assertTrue(limiter.consume('b'))
+        with mock.patch('notifications.ratelimit.time.time', return_value=1001.0):
+            self.assertTrue(limiter.consume('a'))
+            self.assertFalse(limiter.consume('a'))
+
+    def test_workers_sharing_a_cache_spend_from_one_bucket(self):
+        # Two instances stand in for the same limiter in two processes.
+        first, second = (TokenBucketLimiter(3, 1 / 60, prefix='login', cache='default') for _ in range(2))
+        self.assertTrue(first.consume('key'))
+        self.assertTrue(second.consume('key'))
+        self.assertTrue(first.consume('key'))
+        self.assertFalse(second.consume('key'))
+
+        other = TokenBucketLimiter(3, 1 / 60, prefix='otp', cache='default')
+        self.assertTrue(other.consume('key'))
+        second.reset('key')
+        self.assertTrue(first.consume('key'))
+
+    @override_settings(RATE_LIMIT_CACHE=None)
+    def test_without_a_cache_buckets_are_per_process(self):
+        first, second = TokenBucketLimiter(1, 1 / 60), TokenBucketLimiter(1, 1 / 60)
+        self.assertTrue(first.consume('key'))
+        self.assertFalse(first.consume('key'))
+        self.assertTrue(second.consume('key'))
+        self.assertFalse(caches['default'].get('ratelimit:key'))
+
+
+@override_settings(RATE_LIMIT_CACHE='default', OTP_RATE_LIMITS={
+    'credential': {'capacity': 2, 'per_second': 1 / 120},
+    'shop': {'capacity': 3, 'per_second': 1 / 120},
+})
+class DispatcherTests(TestCase):
+    """OTP requests are throttled per recipient and per shop, then queued."""
+
+    def setUp(self):
+        caches['default'].clear()
+        dispatcher._limiters.clear()
+        self.addCleanup(dispatcher._limiters.clear)
+
+    def test_recipient_and_shop_budgets(self):
+        shop, other_shop = Shop.objects.create(), Shop.objects.create()
+        self.assertTrue(allow_otp('Buyer@example.com', shop.pk))
+        self.assertTrue(allow_otp(' buyer@example.com', shop.pk))
+        self.assertFalse(allow_otp('BUYER@example.com', shop.pk))
+        # Same recipient, other shop: its own bucket.
+        self.assertTrue(allow_otp('buyer@example.com', other_shop.pk))
+
+        self.assertTrue(allow_otp('second@example.com', shop.pk))
+        # The shop's budget of three is spent; a refused recipient spent nothing.
+        self.assertFalse(allow_otp('third@example.com', shop.pk))
+        self.assertTrue(allow_otp('third@example.com', other_shop.pk))
+
+    def test_enqueue_writes_a_pending_message(self):
+        shop = Shop.objects.create()
+        with self.assertNumQueries(1):
+            message = enqueue_otp('+15550100000', '123456', channel='sms', purpose='customer_otp', shop_id=shop.pk)
+        message.refresh_from_db()
+        self.assertEqual(
+            (message.status, message.channel, message.code, message.attempts), ('pending', 'sms', '123456', 0),
+        )
+
+
+@override_settings(OTP_TRANSPORTS={
+    'email': 'notifications.tests.RecordingTransport',
+    'sms': 'notifications.tests.RecordingTransport',
+})
+class OutboxWorkerTests(TestCase):
+    """The worker delivers due messages once, retries failures and gives up in the end."""
+
+    def setUp(self):
+        transports._transports.clear()
+        self.addCleanup(transports._transports.clear)
+        RecordingTransport.sent, RecordingTransport.failing = [], set()
+        self.worker = OutboxWorker(batch_size=10, concurrency=2, max_attempts=2, backoff_base=60)
+        self.addCleanup(self.worker.shutdown)
+
+    def test_due_messages_are_sent_once_and_their_codes_wiped(self):
+        enqueue_otp('a@example.com', '111111')
+        enqueue_otp('+15550100000', '222222', channel='sms')
+        later = enqueue_otp('b@example.com', '333333')
+        OtpOutbox.objects.filter(pk=later.pk).update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+
+        self.assertEqual(self.worker.run_once(), 2)
+        self.assertCountEqual(RecordingTransport.sent, ['a@example.com', '+15550100000'])
+        self.assertEqual(
+            set(OtpOutbox.objects.exclude(pk=later.pk).values_list('status', 'code', 'claimed_by')), {('sent', '', '')},
+        )
+        self.assertEqual(self.worker.run_once(), 0)
+        self.assertEqual(OtpOutbox.objects.get(pk=later.pk).status, 'pending')
+
+    def test_failures_back_off_then_fail_for_good(self):
+        RecordingTransport.failing = {'a@example.com'}
+        message = enqueue_otp('a@example.com', '111111')
+
+        self.assertEqual(self.worker.run_once(), 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), ('pending', 1, 'mailbox full'))
+        self.assertGreater(message.next_attempt_at, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(self.worker.run_once(), 0)
+
+        OtpOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(self.worker.run_once(), 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.code), ('failed', 2, ''))
+
+    def test_a_transport_error_fails_the_whole_batch(self):
+        enqueue_otp('a@example.com', '111111')
+        with mock.patch.object(RecordingTransport, 'send_batch', side_effect=ConnectionError("down")), \
+                self.assertLogs('notifications.worker', 'ERROR'):
+            self.assertEqual(self.worker.run_once(), 1)
+        self.assertEqual(OtpOutbox.objects.get().last_error, 'down')
+
+    def test_claims_are_per_worker_and_stale_ones_are_requeued(self):
+        message = enqueue_otp('a@example.com', '111111')
+        other = OutboxWorker(batch_size=10, concurrency=1)
+        self.addCleanup(other.shutdown)
+        self.assertEqual([claimed.pk for claimed in other.claim()], [message.pk])
+        # Claimed by the other worker: nothing left for this one.
+        self.assertEqual(self.worker.run_once(), 0)
+
+        self.assertEqual(self.worker.requeue_stale(), 0)
+        OtpOutbox.objects.update(claimed_at=timezone.now() - timedelta(seconds=self.worker.claim_timeout + 1))
+        self.assertEqual(self.worker.requeue_stale(), 1)
+        self.assertEqual(self.worker.run_once(), 1)
+        self.assertEqual(OtpOutbox.objects.get().status, 'sent')
@@ -0,0 +1,91 @@
+import json
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail import get_connection, EmailMessage
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BaseTransport:
+    """
+    Delivers a batch of outbox messages. send_batch() returns a dict of
+    {message_id: error_string} for the messages that failed; everything not
+    listed is treated as delivered.
+    """
+
+    def send_batch(self, messages):
+        raise NotImplementedError
+
+    @staticmethod
+    def render(message):
+        return f"Your verification code is {message.code}. It expires in 10 minutes."
+
+
+class ConsoleTransport(BaseTransport):
+    """Development stand-in: logs each message instead of sending it."""
+
+    def send_batch(self, messages):
+        for message in messages:
+            logger.info("OTP %s -> %s: %s", message.channel, message.recipient, self.render(message))
+        return {}
+
+
+class FileTransport(BaseTransport):
+    """Development stand-in: appends each message as a JSON line to a file."""
+    _lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = Path(path or getattr(settings, 'OTP_FILE_TRANSPORT_PATH', settings.BASE_DIR / 'otp_outbox.jsonl'))
+
+    def send_batch(self, messages):
+        lines = [
+            json.dumps({
+                "id": str(message.id),
+                "channel": message.channel,
+                "recipient": message.recipient,
+                "purpose": message.purpose,
+                "body": self.render(message),
+                "at": timezone.now().isoformat(),
+            })
+            for message in messages
+        ]
+        with self._lock, self.path.open('a') as handle:
+            handle.write('\n'.join(lines) + '\n')
+        return {}
+
+
+class EmailTransport(BaseTransport):
+    """Sends through Django's EMAIL_BACKEND over a single connection per batch."""
+
+    def send_batch(self, messages):
+        failures = {}
+        with get_connection() as connection:
+            for message in messages:
+                email = EmailMessage(
+                    subject="Your verification code",
+                    body=self.render(message),
+                    to=[message.recipient],
+                    connection=connection,
+                )
+                try:
+                    email.send()
+                except Exception as exc:
+                    failures[message.id] = str(exc)
+        return failures
+
+
+_transports = {}
+
+
+def get_transport(channel):
+    """Resolves OTP_TRANSPORTS[channel] once per process."""
+    if channel not in _transports:
+        paths = getattr(settings, 'OTP_TRANSPORTS', {})
+        path = paths.get(channel, 'notifications.transports.ConsoleTransport')
+        _transports[channel] = import_string(path)()
+    return _transports[channel]
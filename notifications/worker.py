@@ -0,0 +1,124 @@
+import logging
+import random
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from notifications.models import OtpOutbox
+from notifications.transports import get_transport
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    """
+    Drains the OTP outbox: claims due messages in batches, hands each
+    channel's batch to its transport on a thread pool, then records the
+    outcome with one bulk UPDATE. Failed sends are retried with exponential
+    backoff until OTP_MAX_ATTEMPTS is reached.
+    Several workers can run side by side; claims are tagged per worker.
+    """
+
+    def __init__(self, batch_size=100, concurrency=4, max_attempts=None,
+                 backoff_base=None, backoff_cap=900, claim_timeout=300):
+        self.worker_id = uuid.uuid4().hex
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts or getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+        self.backoff_base = backoff_base or getattr(settings, 'OTP_RETRY_BACKOFF', 5)
+        self.backoff_cap = backoff_cap
+        self.claim_timeout = claim_timeout
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='otp-send')
+
+    # ==========================================
+    # 1. CLAIMING
+    # ==========================================
+
+    def requeue_stale(self):
+        """Returns messages claimed by a worker that died mid-send."""
+        cutoff = timezone.now() - timedelta(seconds=self.claim_timeout)
+        return OtpOutbox.objects.filter(status='sending', claimed_at__lt=cutoff).update(
+            status='pending', claimed_by='', claimed_at=None
+        )
+
+    def claim(self):
+        now = timezone.now()
+        due = list(
+            OtpOutbox.objects
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:self.batch_size]
+        )
+        if not due:
+            return []
+        OtpOutbox.objects.filter(id__in=due, status='pending').update(
+            status='sending', claimed_by=self.worker_id, claimed_at=now
+        )
+        return list(OtpOutbox.objects.filter(claimed_by=self.worker_id, status='sending'))
+
+    # ==========================================
+    # 2. SENDING
+    # ==========================================
+
+    @staticmethod
+    def _send(channel, messages):
+        try:
+            return get_transport(channel).send_batch(messages)
+        except Exception as exc:
+            logger.exception("OTP transport %s failed for a batch of %d", channel, len(messages))
+            return {message.id: str(exc) for message in messages}
+
+    def backoff(self, attempts):
+        delay = min(self.backoff_cap, self.backoff_base * 2 ** (attempts - 1))
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    def run_once(self):
+        messages = self.claim()
+        if not messages:
+            return 0
+
+        by_channel = defaultdict(list)
+        for message in messages:
+            by_channel[message.channel].append(message)
+        futures = [self.executor.submit(self._send, channel, batch) for channel, batch in by_channel.items()]
+        failures = {}
+        for future in futures:
+            failures.update(future.result())
+
+        now = timezone.now()
+        for message in messages:
+            message.claimed_by, message.claimed_at = '', None
+            if message.id in failures:
+                message.attempts += 1
+                message.last_error = failures[message.id][:1000]
+                if message.attempts >= self.max_attempts:
+                    message.status, message.code = 'failed', ''
+                else:
+                    message.status = 'pending'
+                    message.next_attempt_at = now + self.backoff(message.attempts)
+            else:
+                message.status, message.code, message.sent_at = 'sent', '', now
+
+        OtpOutbox.objects.bulk_update(messages, [
+            'status', 'code', 'attempts', 'last_error', 'next_attempt_at',
+            'claimed_by', 'claimed_at', 'sent_at',
+        ])
+        logger.info("OTP worker %s: %d sent, %d failed", self.worker_id, len(messages) - len(failures), len(failures))
+        return len(messages)
+
+    def run_forever(self, poll_interval=1.0, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        self.requeue_stale()
+        while not stop_event.is_set():
+            close_old_connections()
+            if not self.run_once():
+                stop_event.wait(poll_interval)
+                self.requeue_stale()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
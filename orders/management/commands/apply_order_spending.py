@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from orders.spending import SpendingAggregator
+
+
+class Command(BaseCommand):
+    help = "Rolls placed orders into customers' total_spent and tier."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Apply pending orders once and exit.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--poll-interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        aggregator = SpendingAggregator(batch_size=options['batch_size'])
+        if options['once']:
+            applied = aggregator.flush_all()
+            self.stdout.write(self.style.SUCCESS(f"Applied {applied} orders."))
+            return
+        self.stdout.write("Order spending aggregator started.")
+        try:
+            aggregator.run_forever(poll_interval=options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
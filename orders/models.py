@@ -0,0 +1,65 @@
+import uuid
+from django.db import models
+
+from orders.order_manager import OrderManager
+from shop.tenancy import TenantManager
+
+
+class Order(models.Model):
+    PLACED = 'placed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (PLACED, 'Placed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey('shop.Shop', on_delete=models.CASCADE, related_name='orders')
+    customer = models.ForeignKey('customers.Customer', on_delete=models.CASCADE, related_name='orders')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PLACED)
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    item_count = models.PositiveIntegerField()
+
+    # Set by the spending aggregator when the total has been added to the
+    # customer's total_spent (orders/spending.py).
+    spending_batch = models.UUIDField(null=True, blank=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = OrderManager()
+    tenant = TenantManager()
+
+    class Meta:
+        db_table = 'orders'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['shop', 'created_at', 'id']),
+            models.Index(fields=['customer', 'created_at']),
+            # The aggregator only ever scans orders it has not applied yet.
+            models.Index(
+                fields=['created_at'], name='order_spending_pending_idx',
+                condition=models.Q(spending_batch__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Order {self.pk} ({self.total})"
+
+
+class OrderLine(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines')
+    # Lines keep their own copy of what was sold, so history survives
+    # product edits and deletion.
+    product = models.ForeignKey('products.Product', on_delete=models.SET_NULL, null=True, related_name='order_lines')
+    sku = models.CharField(max_length=100, blank=True, default='')
+    name = models.CharField(max_length=255)
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+    line_total = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        db_table = 'order_lines'
+
+    def __str__(self):
+        return f"{self.quantity} x {self.name}"
@@ -0,0 +1,85 @@
+import uuid
+
+from django.db import models, transaction
+
+
+class OrderManager(models.Manager):
+
+    # ==========================================
+    # 1. CHECKOUT
+    # ==========================================
+
+    def checkout(self, customer, items=None, reservation=None):
+        """
+        Places an order for `customer` in one transaction: a single in_bulk
+        fetch prices every line, one conditional UPDATE takes the stock and
+        two INSERTs store the order. The customer's row is not touched here;
+        spending is applied later by the aggregator (orders/spending.py).
+        `items` is {product_id: qty} or [(product_id, qty), ...]. With a held
+        `reservation` of the customer its lines are bought instead: its stock
+        is already taken, so the reservation is committed, not the stock
+        taken a second time. Returns (order, message).
+        """
+        from orders.models import OrderLine
+        from orders.spending import spending_aggregator
+        from products.models import Product
+        from products.product_manager import normalize_items
+
+        if reservation is not None:
+            if reservation.customer_id != customer.pk:
+                return None, "Reservation not found."
+            items = reservation.lines.values_list('product_id', 'quantity')
+        try:
+            quantities = normalize_items(items or ())
+        except (TypeError, ValueError) as exc:
+            return None, str(exc)
+        if not quantities:
+            return None, "Cart is empty."
+
+        shop_id = customer.shop_id
+        with transaction.atomic(using=self.db):
+            products = Product.objects.filter(shop_id=shop_id).in_bulk([uuid.UUID(pk) for pk in quantities])
+
+            lines, unavailable, short = [], [], []
+            for product_id, quantity in quantities.items():
+                product = products.get(uuid.UUID(product_id))
+                if product is None or not product.is_available or product.price is None:
+                    unavailable.append(product.sku if product else product_id)
+                    continue
+                if reservation is None and product.stock < quantity:
+                    short.append(product.sku)
+                lines.append(OrderLine(
+                    product=product,
+                    sku=product.sku or '',
+                    name=product.name,
+                    unit_price=product.price,
+                    quantity=quantity,
+                    line_total=product.price * quantity,
+                ))
+            if unavailable:
+                return None, f"Unavailable: {', '.join(unavailable)}"
+
+            if reservation is not None:
+                # Only one checkout can commit it; expired ones fail here.
+                committed, message = Product.objects.commit(reservation)
+                if not committed:
+                    transaction.set_rollback(True)
+                    return None, message
+            # The fetch above may be stale; the conditional UPDATE decides.
+            elif short or Product.objects.take_stock(quantities, shop_id) != len(quantities):
+                transaction.set_rollback(True)
+                return None, f"Insufficient stock for: {', '.join(short) or 'one or more items'}"
+
+            order = self.create(
+                shop_id=shop_id,
+                customer=customer,
+                total=sum(line.line_total for line in lines),
+                item_count=sum(line.quantity for line in lines),
+            )
+            for line in lines:
+                line.order = order
+            OrderLine.objects.bulk_create(lines)
+            transaction.on_commit(spending_aggregator.notify, using=self.db)
+
+        order._prefetched_objects_cache = {'lines': lines}
+        return order, "Order placed."
@@ -0,0 +1,32 @@
+from rest_framework import serializers
+
+from orders.models import Order, OrderLine
+from products.serializers import ReservationItemSerializer
+
+
+class CheckoutSerializer(serializers.Serializer):
+    MAX_ITEMS = 200
+
+    items = ReservationItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS, required=False)
+    # A held reservation (POST /api/products/shop/<id>/reserve/) to buy instead.
+    reservation = serializers.UUIDField(required=False)
+
+    def validate(self, attrs):
+        if ('items' in attrs) == ('reservation' in attrs):
+            raise serializers.ValidationError("Send either items or a reservation.")
+        return attrs
+
+
+class OrderLineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderLine
+        fields = ('product', 'sku', 'name', 'unit_price', 'quantity', 'line_total')
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    lines = OrderLineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ('id', 'shop', 'customer', 'status', 'total', 'item_count', 'created_at', 'lines')
+        read_only_fields = fields
@@ -0,0 +1,121 @@
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Sum
+
+logger = logging.getLogger(__name__)
+
+
+class SpendingAggregator:
+    """
+    Rolls placed orders into Customer.total_spent and tier in coalesced
+    batches. The orders table is the queue: a flush claims unapplied orders
+    with a batch token, sums them per customer and applies one UPDATE per
+    customer, all in one transaction. A customer placing many orders in a
+    burst therefore costs one row write per flush instead of one per
+    checkout, and nothing is lost if the process dies before flushing.
+
+    ORDER_SPENDING_MODE selects who flushes:
+      'thread' - a daemon thread per process, woken after each checkout and
+                 waiting ORDER_SPENDING_COALESCE seconds to gather a burst;
+      'worker' - only `manage.py apply_order_spending`;
+      'inline' - right after each checkout commits (tests).
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ==========================================
+    # 1. FLUSHING
+    # ==========================================
+
+    def flush(self):
+        """Applies one batch of unapplied orders. Returns how many."""
+        from customers.models import Customer
+        from orders.models import Order
+
+        token = uuid.uuid4()
+        with transaction.atomic():
+            pending = list(
+                Order.objects
+                .filter(spending_batch__isnull=True)
+                .order_by('created_at')
+                .values_list('pk', flat=True)[:self.batch_size]
+            )
+            if not pending:
+                return 0
+            # Several flushers may race for the same rows; the token tells
+            # each one exactly which orders it won.
+            claimed = Order.objects.filter(pk__in=pending, spending_batch__isnull=True).update(
+                spending_batch=token
+            )
+            totals = (
+                Order.objects
+                .filter(spending_batch=token, status=Order.PLACED)
+                .values('customer_id')
+                .annotate(amount=Sum('total'))
+            )
+            Customer.objects.apply_spending({row['customer_id']: row['amount'] for row in totals})
+        return claimed
+
+    def flush_all(self):
+        applied = 0
+        while processed := self.flush():
+            applied += processed
+        return applied
+
+    # ==========================================
+    # 2. SCHEDULING
+    # ==========================================
+
+    def notify(self):
+        """Called after a checkout commits."""
+        mode = getattr(settings, 'ORDER_SPENDING_MODE', 'thread')
+        if mode == 'inline':
+            self.flush_all()
+        elif mode == 'thread':
+            self._ensure_thread()
+            self._wake.set()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run_forever, name='order-spending', daemon=True)
+                self._thread.start()
+
+    def run_forever(self, poll_interval=None):
+        """
+        Flushes whenever woken (or every `poll_interval` seconds, to pick up
+        orders placed by other processes), after a short coalescing pause.
+        """
+        coalesce = getattr(settings, 'ORDER_SPENDING_COALESCE', 1.0)
+        poll_interval = poll_interval or getattr(settings, 'ORDER_SPENDING_POLL_INTERVAL', 30.0)
+        while not self._stop.is_set():
+            self._wake.wait(poll_interval)
+            if self._stop.wait(coalesce):
+                break
+            self._wake.clear()
+            try:
+                self.flush_all()
+            except Exception:
+                logger.exception("Applying order spending failed; will retry.")
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+spending_aggregator = SpendingAggregator()
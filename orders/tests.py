@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from access.tokens import issue_token
+from customers.models import Customer
+from orders.models import Order
+from products.models import Product, StockReservation
+from shop.models import Shop
+
+
+class CheckoutReservationTests(TestCase):
+    """A reserved cart is bought with the stock it holds, by its customer only."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        cls.product = Product.objects.create(shop=cls.shop, name='mug', price=Decimal('4'), stock=5)
+        cls.customer, _ = Customer.objects.register(cls.shop.pk, 'customer-secret', email='buyer@example.com')
+        cls.neighbour, _ = Customer.objects.register(cls.shop.pk, 'customer-secret', email='other@example.com')
+
+    def client_for(self, customer):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_token(customer)[0]}')
+        return client
+
+    def reserve(self, client, quantity=2):
+        response = client.post(f'/api/products/shop/{self.shop.pk}/reserve/', {
+            'items': [{'product': str(self.product.pk), 'quantity': quantity}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def stock(self):
+        self.product.refresh_from_db()
+        return self.product.stock
+
+    def test_checkout_of_a_reservation_takes_its_stock_once(self):
+        client = self.client_for(self.customer)
+        reservation = self.reserve(client)
+        self.assertEqual(self.stock(), 3)
+
+        response = client.post('/api/orders/checkout/', {'reservation': reservation}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['item_count'], 2)
+        self.assertEqual(self.stock(), 3)
+        self.assertEqual(StockReservation.objects.get(pk=reservation).status, StockReservation.COMMITTED)
+
+        # Committed: neither a second checkout nor the reaper gives it back.
+        response = client.post('/api/orders/checkout/', {'reservation': reservation}, format='json')
+        self.assertEqual(response.status_code, 409, response.content)
+        self.assertEqual(Product.objects.release_expired(), 0)
+        self.assertEqual((self.stock(), Order.objects.count()), (3, 1))
+
+    def test_other_customers_cannot_check_out_a_reservation(self):
+        reservation = self.reserve(self.client_for(self.customer))
+        response = self.client_for(self.neighbour).post(
+            '/api/orders/checkout/', {'reservation': reservation}, format='json',
+        )
+        self.assertEqual(response.status_code, 404, response.content)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(StockReservation.objects.get(pk=reservation).status, StockReservation.HELD)
+
+    def test_items_or_a_reservation(self):
+        client = self.client_for(self.customer)
+        reservation = self.reserve(client)
+        response = client.post('/api/orders/checkout/', {
+            'reservation': reservation, 'items': [{'product': str(self.product.pk), 'quantity': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post('/api/orders/checkout/', {
+            'items': [{'product': str(self.product.pk), 'quantity': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.stock(), 2)
@@ -0,0 +1,12 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+
+from orders import views
+
+router = DefaultRouter()
+router.register('', views.ShopOrderViewSet, basename='order')
+
+urlpatterns = [
+    path('checkout/', views.CheckoutView.as_view(), name='checkout'),
+    path('shop/<uuid:shop_id>/', include(router.urls)),
+]
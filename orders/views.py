@@ -0,0 +1,55 @@
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from access.permissions import IsCustomer, IsShopMember
+from config.pagination import KeysetPagination
+from customers.models import Customer
+from orders.models import Order
+from orders.serializers import CheckoutSerializer, OrderSerializer
+from products.models import StockReservation
+
+
+class CheckoutView(APIView):
+    """
+    URL: POST /api/orders/checkout/
+    Body: {"items": [{"product": <id>, "quantity": n}]} or {"reservation": <id>}
+    The customer, and so the shop, come from the bearer token. A
+    reservation buys the stock it already holds.
+    """
+    permission_classes = [IsCustomer]
+
+    def post(self, request):
+        payload = CheckoutSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+
+        customer = Customer.objects.filter(
+            shop_id=request.user.shop_id, identifier=request.user.identifier, is_active=True
+        ).first()
+        if customer is None:
+            return Response({"error": "Customer not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if 'reservation' in data:
+            reservation = StockReservation.objects.filter(pk=data['reservation'], customer=customer).first()
+            if reservation is None:
+                return Response({"error": "Reservation not found."}, status=status.HTTP_404_NOT_FOUND)
+            order, msg = Order.objects.checkout(customer, reservation=reservation)
+        else:
+            order, msg = Order.objects.checkout(
+                customer, [(item['product'], item['quantity']) for item in data['items']]
+            )
+        if order is None:
+            return Response({"error": msg}, status=status.HTTP_409_CONFLICT)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+class ShopOrderViewSet(viewsets.ReadOnlyModelViewSet):
+    """URL: GET /api/orders/shop/<shop_id>/[<id>/]"""
+    permission_classes = [IsShopMember]
+    serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
+    lookup_field = "id"
+
+    def get_queryset(self):
+        return Order.tenant.prefetch_related('lines')
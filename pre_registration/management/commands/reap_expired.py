@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from pre_registration.reaper import ExpiryReaper
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired pre-registrations, customer OTPs and access tokens and releases "
+        "expired stock reservations, in small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Reap once and exit.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.05, help="Seconds between batches.")
+        parser.add_argument('--interval', type=float, default=300.0)
+
+    def handle(self, *args, **options):
+        reaper = ExpiryReaper(batch_size=options['batch_size'], pause=options['pause'])
+        if options['once']:
+            reaper.reap()
+            self.stdout.write(json.dumps(reaper.last_run))
+            return
+        self.stdout.write("Expiry reaper started.")
+        try:
+            reaper.run_forever(interval=options['interval'])
+        except KeyboardInterrupt:
+            pass
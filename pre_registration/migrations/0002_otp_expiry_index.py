@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pre_registration', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='preregistration',
+            index=models.Index(fields=['otp_expires_at'], name='pre_registr_otp_exp_61bc0c_idx'),
+        ),
+    ]
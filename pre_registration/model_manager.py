@@ -1,37 +1,61 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 import random
 from django.utils import timezone
 from datetime import timedelta
 
+from notifications.dispatcher import allow_otp, enqueue_otp
+from pre_registration.reaper import expiry_reaper
+
 class ModelManager(models.Manager):
     def create_pre_registration(self, identifier):
-        from pre_registration.models import PreRegistration
-        if PreRegistration.objects.filter(identifier=identifier).exists():
-            return None, "Pre-registration with this identifier already exists."
+        """
+        Starts a signup. A pending signup whose OTP expired is taken over in
+        place with one UPDATE, so abandoned ones never block the identifier;
+        otherwise one INSERT, where the unique identifier column does the
+        duplicate check. Either way the request stays within the signup
+        query budget.
+        """
+        if not allow_otp(identifier):
+            return None, "Too many OTP requests. Please try again later."
 
+        now = timezone.now()
         otp = str(random.randint(10000, 999999))
-        registration = PreRegistration.objects.create(
-            identifier=identifier,
-            otp=otp,
-            updated_at=timezone.now(),
-            otp_expires_at=timezone.now() + timedelta(minutes=15)
-            )
+        expires_at = now + timedelta(minutes=15)
+        if self.filter(identifier=identifier, otp_expires_at__lt=now).update(
+            otp=otp, otp_expires_at=expires_at, updated_at=now,
+        ):
+            registration = self.model(identifier=identifier, otp=otp, otp_expires_at=expires_at)
+        else:
+            try:
+                with transaction.atomic(using=self.db):
+                    registration = self.create(
+                        identifier=identifier,
+                        otp=otp,
+                        updated_at=now,
+                        otp_expires_at=expires_at,
+                    )
+            except IntegrityError:
+                return None, "Pre-registration with this identifier already exists."
+        enqueue_otp(identifier, otp, channel="email", purpose="admin_signup")
+        expiry_reaper.ensure_started()
         return registration
 
     def verify_otp(self, identifier, otp):
-        from pre_registration.models import PreRegistration
-        pending = PreRegistration.objects.filter(identifier=identifier).first()
-
-        if not pending:
-            return False,None, "No registration session found."
-        
-        if pending.otp_expires_at < timezone.now():
-            pending.delete()
-            return None, None,"OTP expired. Please start over."
-
-        if pending.otp != str(otp):
-            return False,None, "Invalid OTP code."
-        
-        pending.delete()
+        """
+        Consumes the pending signup if the code matches and is still valid,
+        in a single conditional DELETE: the row count is the verdict, and two
+        concurrent verifications can never both win. Only failures pay for a
+        second query, to say why. Returns (verified, message).
+        """
+        now = timezone.now()
+        deleted, _ = self.filter(identifier=identifier, otp=str(otp), otp_expires_at__gte=now).delete()
+        if deleted:
+            return True, "OTP verified successfully."
 
-        return True, pending, "OTP verified successfully."
\ No newline at end of file
+        expires_at = self.filter(identifier=identifier).values_list('otp_expires_at', flat=True).first()
+        if expires_at is None:
+            return False, "No registration session found."
+        if expires_at < now:
+            self.filter(identifier=identifier, otp_expires_at__lt=now).delete()
+            return False, "OTP expired. Please start over."
+        return False, "Invalid OTP code."
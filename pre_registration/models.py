@@ -21,4 +21,8 @@ class PreRegistration(models.Model):
     class Meta:
         db_table = "pre_registration"
         verbose_name = "Pre Registration"
-        verbose_name_plural = "Pre Registrations"
\ No newline at end of file
+        verbose_name_plural = "Pre Registrations"
+        indexes = [
+            # The expiry reaper (pre_registration/reaper.py) seeks on this.
+            models.Index(fields=['otp_expires_at']),
+        ]
\ No newline at end of file
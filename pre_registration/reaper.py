@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _targets():
+    """(metric name, model, expiry field) for every table with expiring rows."""
+    from access.models import AccessToken
+    from customers.models import CustomerOtp
+    from pre_registration.models import PreRegistration
+
+    return [
+        ('pre_registrations', PreRegistration, 'otp_expires_at'),
+        ('customer_otps', CustomerOtp, 'expires_at'),
+        ('access_tokens', AccessToken, 'expires_at'),
+    ]
+
+
+class ExpiryReaper:
+    """
+    Deletes expired pre-registrations, customer OTPs and access tokens, and
+    releases expired stock reservations (Product.objects.release_expired).
+    Rows are found through their expiry index and deleted by primary key
+    in batches of `batch_size`, each in its own short transaction with a pause between,
+    so request traffic never waits long for the write lock.
+
+    EXPIRY_REAPER_MODE selects who reaps:
+      'thread' - a daemon thread per process, started by the first OTP or
+                 reservation issued there and running every
+                 EXPIRY_REAPER_INTERVAL;
+      'worker' - only `manage.py reap_expired`.
+    """
+
+    def __init__(self, batch_size=500, pause=0.05):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.totals = {}
+        self.last_run = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ==========================================
+    # 1. REAPING
+    # ==========================================
+
+    def reap_batch(self, model, field, now):
+        with transaction.atomic():
+            expired = list(
+                model.objects.filter(**{f'{field}__lt': now})
+                .order_by(field)
+                .values_list('pk', flat=True)[:self.batch_size]
+            )
+            if not expired:
+                return 0
+            # Re-checked, a row renewed since the SELECT must survive.
+            deleted, _ = model.objects.filter(pk__in=expired, **{f'{field}__lt': now}).delete()
+        return deleted
+
+    def reap(self, now=None):
+        """Runs until nothing is expired. Returns {metric name: rows reclaimed}."""
+        from products.models import Product
+
+        now = now or timezone.now()
+        started = time.perf_counter()
+        reclaimed = {}
+        for name, model, field in _targets():
+            count = 0
+            while deleted := self.reap_batch(model, field, now):
+                count += deleted
+                if deleted < self.batch_size:
+                    break
+                time.sleep(self.pause)
+            reclaimed[name] = count
+        # Expired reservations are not deleted but released: their stock goes
+        # back on the shelf.
+        reclaimed['stock_reservations'] = Product.objects.release_expired(batch_size=self.batch_size, now=now)
+        for name, count in reclaimed.items():
+            self.totals[name] = self.totals.get(name, 0) + count
+        self.last_run = {
+            'at': now.isoformat(),
+            'seconds': round(time.perf_counter() - started, 3),
+            'reclaimed': reclaimed,
+        }
+        if any(reclaimed.values()):
+            logger.info(
+                "Reaped expired rows in %.3fs: %s", self.last_run['seconds'],
+                ', '.join(f"{name}={count}" for name, count in reclaimed.items()),
+            )
+        return reclaimed
+
+    def stats(self):
+        return {'totals': dict(self.totals), 'last_run': self.last_run}
+
+    # ==========================================
+    # 2. SCHEDULING
+    # ==========================================
+
+    def ensure_started(self):
+        """Called when expiring rows are written; starts the thread once."""
+        if getattr(settings, 'EXPIRY_REAPER_MODE', 'thread') != 'thread':
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self.run_forever, name='expiry-reaper', daemon=True)
+                self._thread.start()
+
+    def run_forever(self, interval=None):
+        interval = interval or getattr(settings, 'EXPIRY_REAPER_INTERVAL', 300)
+        while not self._stop.wait(interval):
+            try:
+                self.reap()
+            except Exception:
+                logger.exception("Reaping expired rows failed; will retry.")
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+expiry_reaper = ExpiryReaper(
+    batch_size=getattr(settings, 'EXPIRY_REAPER_BATCH_SIZE', 500),
+)
@@ -1,3 +1,91 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+
+from access.models import AccessToken
+from access.tokens import issue_token
+from customers.models import Customer, CustomerOtp
+from customers.otp_store import DbOtpStore
+from pre_registration.models import PreRegistration
+from pre_registration.reaper import ExpiryReaper
+from products.models import Product, StockReservation
+from shop.models import Shop
+
+
+class ExpiryReaperTests(TestCase):
+    """The reaper reclaims exactly the rows whose expiry has passed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        cls.shop = Shop.objects.create()
+        cls.product = Product.objects.create(shop=cls.shop, name='mug', price=Decimal('4'), stock=10)
+        cls.customers = [
+            Customer.objects.register(cls.shop.pk, 'secret', email=f'buyer{index}@example.com')[0]
+            for index in range(2)
+        ]
+
+        for index, minutes in enumerate((-30, -20, -10, 10)):
+            PreRegistration.objects.create(
+                identifier=f'signup{index}@example.com', otp='123456',
+                otp_expires_at=cls.now + timedelta(minutes=minutes),
+            )
+        for customer, minutes in zip(cls.customers, (-5, 5)):
+            DbOtpStore().issue(customer.pk, '123456', ttl=timedelta(minutes=10))
+            CustomerOtp.objects.filter(pk=customer.pk).update(expires_at=cls.now + timedelta(minutes=minutes))
+        for minutes in (-1, 1):
+            _, token = issue_token(cls.customers[0])
+            AccessToken.objects.filter(pk=token.pk).update(expires_at=cls.now + timedelta(minutes=minutes))
+
+        cls.reservations = [
+            Product.objects.reserve({str(cls.product.pk): 2}, shop_id=cls.shop.pk)[0] for _ in range(3)
+        ]
+        # Expired since, but bought in time: not the reaper's to give back.
+        Product.objects.commit(cls.reservations[1])
+        for reservation, minutes in zip(cls.reservations, (-2, -1, 1)):
+            StockReservation.objects.filter(pk=reservation.pk).update(expires_at=cls.now + timedelta(minutes=minutes))
+
+    def assert_only_live_rows_left(self):
+        self.assertEqual(
+            list(PreRegistration.objects.values_list('identifier', flat=True)), ['signup3@example.com'],
+        )
+        self.assertEqual(list(CustomerOtp.objects.values_list('pk', flat=True)), [self.customers[1].pk])
+        self.assertEqual(
+            list(AccessToken.objects.values_list('expires_at', flat=True)), [self.now + timedelta(minutes=1)],
+        )
+        self.assertEqual(
+            [StockReservation.objects.get(pk=reservation.pk).status for reservation in self.reservations],
+            [StockReservation.EXPIRED, StockReservation.COMMITTED, StockReservation.HELD],
+        )
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 6)
+
+    def test_reap_removes_and_releases_exactly_the_expired_rows(self):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 4)
+
+        reaper = ExpiryReaper(batch_size=2, pause=0)
+        reclaimed = reaper.reap(now=self.now)
+        self.assertEqual(reclaimed, {
+            'pre_registrations': 3, 'customer_otps': 1, 'access_tokens': 1, 'stock_reservations': 1,
+        })
+        self.assert_only_live_rows_left()
+
+        # Nothing left to reclaim; the totals keep the first run.
+        self.assertEqual(set(reaper.reap(now=self.now).values()), {0})
+        self.assertEqual(reaper.stats()['totals']['pre_registrations'], 3)
+        self.assertEqual(reaper.stats()['last_run']['reclaimed']['stock_reservations'], 0)
 
-# Create your tests here.
+    def test_reap_expired_command(self):
+        out = StringIO()
+        call_command('reap_expired', '--once', '--batch-size', '2', '--pause', '0', stdout=out)
+        # The command reaps as of now, when all but the future rows have expired.
+        self.assertEqual(json.loads(out.getvalue())['reclaimed'], {
+            'pre_registrations': 3, 'customer_otps': 1, 'access_tokens': 1, 'stock_reservations': 1,
+        })
+        self.assert_only_live_rows_left()
@@ -0,0 +1,284 @@
+import codecs
+import csv
+import json
+import secrets
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+from products.catalog_stats import refresh_shop
+from products.models import Product
+from products.search import index_products
+
+# Columns accepted on import and written on export, in file order.
+IMPORT_FIELDS = [
+    'sku', 'name', 'category', 'description',
+    'price', 'compare_at_price', 'stock', 'is_available',
+]
+EXPORT_FIELDS = ['id'] + IMPORT_FIELDS + ['slug', 'created_at', 'updated_at']
+
+FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_ERRORS = 1000
+
+_TRUE = {'1', 'true', 'yes', 'y', 't'}
+_FALSE = {'0', 'false', 'no', 'n', 'f'}
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": line, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+# ==========================================
+# 1. READING
+# ==========================================
+
+def detect_format(filename, default='csv'):
+    for fmt in FORMATS:
+        if filename and filename.lower().endswith(f'.{fmt}'):
+            return fmt
+    return default
+
+
+def read_rows(stream, fmt):
+    """
+    Yields (line_number, dict) pairs one at a time from a binary or text
+    stream, so the file is never fully loaded. Malformed JSON lines are
+    yielded as (line_number, None).
+    """
+    if isinstance(stream.read(0), bytes):
+        stream = codecs.getreader('utf-8-sig')(stream)
+
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def clean_row(raw):
+    """Validates one row against the model fields. Returns (values, errors)."""
+    values, errors = {}, {}
+    for name in IMPORT_FIELDS:
+        if name not in raw:
+            continue
+        value = raw[name]
+        if isinstance(value, str):
+            value = value.strip()
+        model_field = Product._meta.get_field(name)
+        if value == '':
+            if model_field.null:
+                value = None
+            elif model_field.has_default():
+                continue
+        if name == 'is_available' and isinstance(value, str):
+            lowered = value.lower()
+            if lowered not in _TRUE | _FALSE:
+                errors[name] = ["Must be true or false."]
+                continue
+            value = lowered in _TRUE
+        try:
+            values[name] = model_field.clean(value, None)
+        except ValidationError as exc:
+            errors[name] = exc.messages
+    return values, errors
+
+
+# ==========================================
+# 2. IMPORT
+# ==========================================
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_products(shop_id, rows, chunk_size=1000):
+    """
+    Upserts products by `sku` for one shop, chunk by chunk.
+    `rows` is an iterable of (line_number, dict) as produced by read_rows().
+    Each chunk costs one ownership lookup, one INSERT ... ON CONFLICT and one
+    re-read for the search index, regardless of how many rows it holds.
+    """
+    shop_id = uuid.UUID(str(shop_id))
+    report = ImportReport()
+    for chunk in _chunks(rows, chunk_size):
+        _import_chunk(shop_id, chunk, report)
+    if report.created or report.updated:
+        # bulk_create skips the signals that keep facet counters current.
+        refresh_shop(shop_id)
+    return report
+
+
+def _import_chunk(shop_id, chunk, report):
+    by_sku = {}
+    for line, raw in chunk:
+        report.rows += 1
+        if raw is None:
+            report.add_error(line, {"row": ["Malformed row."]})
+            continue
+        values, errors = clean_row(raw)
+        if errors:
+            report.add_error(line, errors)
+            continue
+        if not values.get('sku'):
+            values['sku'] = f"PROD-{secrets.token_hex(4).upper()}"
+        # Later rows win when a file repeats a sku.
+        by_sku[values['sku']] = (line, values)
+
+    if not by_sku:
+        return
+
+    # sku is unique platform-wide: never let one shop overwrite another's row.
+    owners = dict(Product.objects.filter(sku__in=by_sku).values_list('sku', 'shop_id'))
+    for sku, owner in owners.items():
+        if owner != shop_id:
+            line, _ = by_sku.pop(sku)
+            report.add_error(line, {"sku": ["SKU belongs to another shop."]})
+
+    # Existing products may be patched partially; new ones need a name.
+    for sku in [sku for sku, (_, values) in by_sku.items() if sku not in owners and not values.get('name')]:
+        line, _ = by_sku.pop(sku)
+        report.add_error(line, {"name": ["This field is required for new products."]})
+
+    while by_sku:
+        try:
+            with transaction.atomic():
+                _upsert(shop_id, by_sku)
+        except _ForeignSkus as exc:
+            for sku in exc.skus:
+                line, _ = by_sku.pop(sku)
+                report.add_error(line, {"sku": ["SKU belongs to another shop."]})
+            continue
+        except IntegrityError as exc:
+            for line, _ in by_sku.values():
+                report.add_error(line, {"row": [str(exc)]})
+            return
+        break
+    if not by_sku:
+        return
+
+    report.updated += len(owners.keys() & by_sku.keys())
+    report.created += len(by_sku) - len(owners.keys() & by_sku.keys())
+
+    # bulk_create skips post_save, so refresh the search index directly.
+    index_products(
+        Product.objects
+        .filter(sku__in=by_sku)
+        .only('id', 'shop_id', 'name', 'category', 'description')
+    )
+
+
+class _ForeignSkus(Exception):
+    def __init__(self, skus):
+        super().__init__(skus)
+        self.skus = skus
+
+
+def _upsert(shop_id, by_sku):
+    """
+    Upserts one chunk by sku. Raises _ForeignSkus, rolling the chunk back,
+    when a conflict hit another shop's row: one inserted since the
+    ownership check outside the transaction.
+    """
+    # Rows only overwrite the columns they carry, so JSONL rows with
+    # different keys are upserted in separate statements.
+    groups = defaultdict(list)
+    for line, values in by_sku.values():
+        if values.get('stock', 1) <= 0:
+            # As Product.save() does: sold out means unavailable.
+            values['is_available'] = False
+        product = Product(shop_id=shop_id, **values)
+        if 'name' in values:
+            product.slug = slugify(product.name)
+        groups[frozenset(values)].append(product)
+
+    for columns, products in groups.items():
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=['sku'],
+            update_fields=sorted(
+                columns - {'sku'} | {'updated_at'} | ({'slug'} if 'name' in columns else set())
+            ),
+        )
+    # shop_id is never updated, so an overwritten row still names its owner;
+    # the upsert holds it locked until this transaction ends.
+    foreign = set(Product.objects.filter(sku__in=by_sku).exclude(shop_id=shop_id).values_list('sku', flat=True))
+    if foreign:
+        raise _ForeignSkus(foreign)
+
+
+# ==========================================
+# 3. EXPORT
+# ==========================================
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def _encode(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if value is not None and not isinstance(value, (bool, int, float, str)):
+        return str(value)
+    return value
+
+
+def export_products(queryset, fmt, chunk_size=2000):
+    """
+    Yields the catalog as CSV or JSONL text, one row at a time, reading the
+    database with a server-side iterator so memory stays flat.
+    """
+    rows = queryset.order_by().values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            yield writer.writerow([_encode(value) for value in row])
+    elif fmt == 'jsonl':
+        for row in rows:
+            yield json.dumps(dict(zip(EXPORT_FIELDS, map(_encode, row)))) + '\n'
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
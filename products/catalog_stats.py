@@ -0,0 +1,235 @@
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Case, Count, F, Max, Min, Q, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+# Product fields a catalog state is built from (attnames, as from_db sees them).
+CATALOG_STATE_FIELDS = frozenset({'shop_id', 'category', 'stock', 'price'})
+
+
+def catalog_state(product):
+    """
+    What one product contributes to ShopCatalogStats:
+    (shop_id, category, in stock, price), or None for products without a shop.
+    """
+    if product.shop_id is None:
+        return None
+    return (product.shop_id, product.category, product.stock > 0, product.price)
+
+
+# ==========================================
+# 1. DELTA UPDATES
+# ==========================================
+
+def _empty_delta():
+    return {'products': 0, 'in_stock': 0, 'added': [], 'removed': []}
+
+
+def diff_states(old, new):
+    """{(shop_id, category): delta} that turns `old` into `new`."""
+    deltas = defaultdict(_empty_delta)
+    if old == new:
+        return deltas
+    same_price = old is not None and new is not None and old[:2] == new[:2] and old[3] == new[3]
+    if old is not None:
+        delta = deltas[old[:2]]
+        delta['products'] -= 1
+        delta['in_stock'] -= old[2]
+        if old[3] is not None and not same_price:
+            delta['removed'].append(old[3])
+    if new is not None:
+        delta = deltas[new[:2]]
+        delta['products'] += 1
+        delta['in_stock'] += new[2]
+        if new[3] is not None and not same_price:
+            delta['added'].append(new[3])
+    return deltas
+
+
+def apply_deltas(deltas):
+    """
+    One UPDATE per (shop, category) with F() arithmetic, so concurrent
+    writers never overwrite each other's counts. A new price widens the
+    range in the same statement; removing the current minimum or maximum
+    only flags the range as stale, since the next one is unknown here.
+    """
+    from products.models import ShopCatalogStats
+
+    for (shop_id, category), delta in deltas.items():
+        changes = {}
+        if delta['products']:
+            changes['product_count'] = F('product_count') + delta['products']
+        if delta['in_stock']:
+            changes['in_stock_count'] = F('in_stock_count') + delta['in_stock']
+        if delta['removed']:
+            # Evaluated against the values before this UPDATE.
+            changes['price_range_stale'] = Case(
+                When(Q(min_price__in=delta['removed']) | Q(max_price__in=delta['removed']), then=Value(True)),
+                default=F('price_range_stale'),
+                output_field=BooleanField(),
+            )
+        if delta['added']:
+            low, high = Value(min(delta['added'])), Value(max(delta['added']))
+            changes['min_price'] = Least(Coalesce(F('min_price'), low), low)
+            changes['max_price'] = Greatest(Coalesce(F('max_price'), high), high)
+        if not changes:
+            continue
+
+        rows = ShopCatalogStats.objects.filter(shop_id=shop_id, category=category)
+        if rows.update(**changes) or delta['products'] <= 0:
+            continue
+        # First product of the category.
+        try:
+            with transaction.atomic():
+                ShopCatalogStats.objects.create(
+                    shop_id=shop_id,
+                    category=category,
+                    product_count=delta['products'],
+                    in_stock_count=max(delta['in_stock'], 0),
+                    min_price=min(delta['added'], default=None),
+                    max_price=max(delta['added'], default=None),
+                )
+        except IntegrityError:
+            # Another writer created it in between.
+            rows.update(**changes)
+
+
+def record_product_change(old, new):
+    apply_deltas(diff_states(old, new))
+
+
+def record_stock_crossings(rows, direction):
+    """
+    `rows` are (shop_id, category) of products whose stock just crossed
+    zero; `direction` is -1 when they sold out and +1 when restocked.
+    """
+    deltas = defaultdict(_empty_delta)
+    for key, count in Counter(rows).items():
+        if key[0] is not None:
+            deltas[key]['in_stock'] += direction * count
+    apply_deltas(deltas)
+
+
+# ==========================================
+# 2. RECOUNTS & RECONCILIATION
+# ==========================================
+
+def count_catalog(shop_id, categories=None):
+    """{category: counters} straight from Product, via the (shop, category, price) index."""
+    from products.models import Product
+
+    products = Product.objects.filter(shop_id=shop_id)
+    if categories is not None:
+        products = products.filter(category__in=categories)
+    return {
+        row['category']: row
+        for row in products.values('category').order_by().annotate(
+            product_count=Count('pk'),
+            in_stock_count=Count('pk', filter=Q(stock__gt=0)),
+            min_price=Min('price'),
+            max_price=Max('price'),
+        )
+    }
+
+
+def refresh_shop(shop_id, categories=None):
+    """
+    Recounts a shop's stats (or some categories of it) and writes only the
+    rows that drifted. Returns the number of rows corrected.
+
+    The stored rows are locked before the recount and stay locked until
+    the write commits. apply_deltas updates the same rows, so a concurrent
+    delta either commits first and is part of the count, or waits and
+    lands on the recounted value. It is never overwritten. A category
+    without a row gets one only if no writer created it in between; a row
+    created in between already holds its writer's delta and is kept.
+    """
+    from products.models import ShopCatalogStats
+
+    fields = ('product_count', 'in_stock_count', 'min_price', 'max_price')
+    now = timezone.now()
+    with transaction.atomic():
+        stored = ShopCatalogStats.objects.select_for_update().filter(shop_id=shop_id)
+        if categories is not None:
+            stored = stored.filter(category__in=categories)
+        stored = {stats.category: stats for stats in stored}
+        counted = count_catalog(shop_id, categories)
+
+        changed, added = [], []
+        for category, row in counted.items():
+            stats = stored.get(category)
+            if stats is None:
+                added.append(ShopCatalogStats(shop_id=shop_id, category=category,
+                                              **{field: row[field] for field in fields}))
+            elif stats.price_range_stale or any(getattr(stats, field) != row[field] for field in fields):
+                for field in fields:
+                    setattr(stats, field, row[field])
+                stats.price_range_stale, stats.updated_at = False, now
+                changed.append(stats)
+        gone = [stats.pk for category, stats in stored.items() if category not in counted]
+
+        if changed:
+            ShopCatalogStats.objects.bulk_update(changed, [*fields, 'price_range_stale', 'updated_at'])
+        if added:
+            ShopCatalogStats.objects.bulk_create(added, ignore_conflicts=True)
+        if gone:
+            ShopCatalogStats.objects.filter(pk__in=gone).delete()
+    return len(changed) + len(added) + len(gone)
+
+
+def reconcile(shop_ids=None):
+    """
+    Recounts every shop (or `shop_ids`) to repair drift from writes that
+    bypass the signals: raw SQL, fixtures, partial failures.
+    Returns (shops checked, rows corrected).
+    """
+    from shop.models import Shop
+
+    if shop_ids is None:
+        shop_ids = list(Shop.objects.order_by().values_list('pk', flat=True))
+    shops = corrected = 0
+    for shop_id in shop_ids:
+        shops += 1
+        corrected += refresh_shop(shop_id)
+    return shops, corrected
+
+
+# ==========================================
+# 3. FACETS
+# ==========================================
+
+def shop_facets(shop_id):
+    """
+    Category counts, in-stock counts and price ranges of a shop, read from
+    one row per category. Stale price ranges are recomputed first, for the
+    affected categories only.
+    """
+    from products.models import ShopCatalogStats
+
+    rows = list(ShopCatalogStats.objects.filter(shop_id=shop_id).order_by('category'))
+    stale = [stats.category for stats in rows if stats.price_range_stale]
+    if stale:
+        refresh_shop(shop_id, stale)
+        rows = list(ShopCatalogStats.objects.filter(shop_id=shop_id).order_by('category'))
+
+    categories = [
+        {
+            'category': stats.category,
+            'products': stats.product_count,
+            'in_stock': stats.in_stock_count,
+            'min_price': stats.min_price,
+            'max_price': stats.max_price,
+        }
+        for stats in rows if stats.product_count > 0
+    ]
+    prices = [row['min_price'] for row in categories if row['min_price'] is not None]
+    top_prices = [row['max_price'] for row in categories if row['max_price'] is not None]
+    return {
+        'products': sum(row['products'] for row in categories),
+        'in_stock': sum(row['in_stock'] for row in categories),
+        'min_price': min(prices, default=None),
+        'max_price': max(top_prices, default=None),
+        'categories': categories,
+    }
@@ -0,0 +1,99 @@
+from collections import namedtuple
+
+from django.db.models import F, Q
+from rest_framework import exceptions
+
+# Query parameters handled here; anything else (cursor, page_size) is not.
+FILTER_PARAMS = ('category', 'min_price', 'max_price', 'available', 'in_stock', 'on_sale', 'sort')
+
+SORT_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+}
+
+# An access path: the Product index a listing seeks. Each plan walks its
+# index in the order of the sorts it is chosen for, so a page stops after
+# page_size rows instead of sorting the shop.
+Plan = namedtuple('Plan', 'name index')
+
+PLANS = {
+    'shop_newest': Plan('shop_newest', ('shop', 'created_at', 'id')),
+    'shop_available_newest': Plan('shop_available_newest', ('shop', 'is_available', 'created_at', 'id')),
+    'shop_category_newest': Plan('shop_category_newest', ('shop', 'category', 'created_at', 'id')),
+    'shop_category_price': Plan('shop_category_price', ('shop', 'category', 'price', 'id')),
+}
+
+
+def choose_plan(filters):
+    """
+    Picks the index that answers `filters` within one shop, or raises
+    ValidationError for combinations no index covers, which would read
+    every product of the shop (or of the platform) to answer one page.
+
+    A price range in date order may instead be seeked on the price index
+    and sorted, whichever the database estimates cheaper; both stay inside
+    the category. in_stock, on_sale and, with a category, available are
+    checked on the rows the index reaches.
+    """
+    sort = filters.get('sort', 'newest')
+    priced = 'min_price' in filters or 'max_price' in filters
+    if 'category' in filters:
+        return PLANS['shop_category_newest' if sort == 'newest' else 'shop_category_price']
+    if priced:
+        raise exceptions.ValidationError({"min_price": "A price range can only be used together with a category."})
+    if sort != 'newest':
+        raise exceptions.ValidationError({"sort": "Sorting by price requires a category."})
+    if 'available' in filters:
+        return PLANS['shop_available_newest']
+    return PLANS['shop_newest']
+
+
+def parse_filters(query_params):
+    """
+    Validated filters from the query string, or None when it has none.
+    Raises ValidationError for bad values.
+    """
+    from products.serializers import ProductFilterSerializer
+
+    if not any(name in query_params for name in FILTER_PARAMS):
+        return None
+    serializer = ProductFilterSerializer(data={
+        name: query_params[name] for name in FILTER_PARAMS if name in query_params
+    })
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def filter_products(queryset, filters):
+    """
+    Applies validated `filters` to a shop-scoped product queryset.
+    Returns (queryset, plan, keyset ordering).
+    """
+    plan = choose_plan(filters)
+    sort = filters.get('sort', 'newest')
+
+    if 'category' in filters:
+        queryset = queryset.filter(category=filters['category'])
+    if 'min_price' in filters:
+        queryset = queryset.filter(price__gte=filters['min_price'])
+    if 'max_price' in filters:
+        queryset = queryset.filter(price__lte=filters['max_price'])
+    if sort != 'newest':
+        # Keyset cursors cannot hold NULL; unpriced products are not listed.
+        queryset = queryset.filter(price__isnull=False)
+    if 'available' in filters:
+        # `is_available=True` compiles to a bare `WHERE is_available`, which
+        # SQLite cannot seek an index with; IN (...) is an equality it can.
+        # Only the availability plan seeks it, so a category index is not
+        # traded for the much less selective availability one.
+        if plan.name == 'shop_available_newest':
+            queryset = queryset.filter(is_available__in=[filters['available']])
+        else:
+            queryset = queryset.filter(is_available=filters['available'])
+    if 'in_stock' in filters:
+        queryset = queryset.filter(stock__gt=0) if filters['in_stock'] else queryset.filter(stock__lte=0)
+    if 'on_sale' in filters:
+        on_sale = Q(compare_at_price__gt=F('price'))
+        queryset = queryset.filter(on_sale if filters['on_sale'] else ~on_sale | Q(compare_at_price__isnull=True))
+    return queryset, plan, SORT_ORDERINGS[sort]
@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+
+# Worker processes are spawned and import this module before django.setup(),
+# so nothing here may import models at module level.
+
+def _hammer(product_id, attempts, quantity, release_every):
+    """Reserve-then-commit loop for one thread. Returns its tallies."""
+    from products.models import Product
+
+    tally = {'committed': 0, 'released': 0, 'rejected': 0, 'errors': 0, 'latencies': []}
+    try:
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                reservation, _ = Product.objects.reserve([(product_id, quantity)])
+                if reservation is None:
+                    tally['rejected'] += 1
+                elif release_every and attempt % release_every == 0:
+                    Product.objects.release(reservation)
+                    tally['released'] += quantity
+                else:
+                    ok, _ = Product.objects.commit(reservation)
+                    tally['committed' if ok else 'errors'] += quantity if ok else 1
+            except OperationalError:
+                # SQLite "database is locked" under heavy contention.
+                tally['errors'] += 1
+            tally['latencies'].append(time.perf_counter() - started)
+    finally:
+        connection.close()
+    return tally
+
+
+def _run_threads(product_id, threads, attempts, quantity, release_every):
+    results = [None] * threads
+
+    def run(index):
+        results[index] = _hammer(product_id, attempts, quantity, release_every)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def _process_main(product_id, threads, attempts, quantity, release_every):
+    import django
+    django.setup()
+    return _run_threads(product_id, threads, attempts, quantity, release_every)
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammers one hot product from many threads and processes through "
+        "reserve/commit and verifies that stock is never oversold. Creates a "
+        "throwaway shop and deletes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=8, help="Threads per process.")
+        parser.add_argument('--processes', type=int, default=2, help="0 runs the threads in this process.")
+        parser.add_argument('--attempts', type=int, default=100, help="Reservations tried per thread.")
+        parser.add_argument('--quantity', type=int, default=1)
+        parser.add_argument('--release-every', type=int, default=10,
+                            help="Release instead of commit every Nth reservation (0 = never).")
+        parser.add_argument('--keep', action='store_true', help="Keep the benchmark shop.")
+
+    def handle(self, *args, **options):
+        from products.models import Product
+        from shop.models import Shop
+
+        shop = Shop.objects.create()
+        product = Product.objects.create(shop=shop, name="bench hot sku", stock=options['stock'])
+        job = (str(product.pk), options['threads'], options['attempts'],
+               options['quantity'], options['release_every'])
+        try:
+            started = time.perf_counter()
+            if options['processes']:
+                context = multiprocessing.get_context('spawn')
+                with context.Pool(options['processes']) as pool:
+                    results = [t for batch in pool.starmap(_process_main, [job] * options['processes']) for t in batch]
+            else:
+                results = _run_threads(*job)
+            elapsed = time.perf_counter() - started
+
+            product.refresh_from_db()
+            self.report(options, product, results, elapsed)
+        finally:
+            if not options['keep']:
+                shop.delete()
+
+    def report(self, options, product, results, elapsed):
+        from customers.management.commands.bench_login import percentile
+
+        committed = sum(t['committed'] for t in results)
+        released = sum(t['released'] for t in results)
+        rejected = sum(t['rejected'] for t in results)
+        errors = sum(t['errors'] for t in results)
+        latencies = [sample for t in results for sample in t['latencies']]
+        expected = options['stock'] - committed
+
+        workers = max(options['processes'], 1) * options['threads']
+        self.stdout.write(f"workers:        {workers} ({options['processes']} processes x {options['threads']} threads)")
+        self.stdout.write(f"attempts:       {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s)")
+        self.stdout.write(f"committed:      {committed} units, released {released}, rejected {rejected}, errors {errors}")
+        self.stdout.write(f"stock:          {options['stock']} -> {product.stock} (expected {expected})")
+        self.stdout.write(f"is_available:   {product.is_available}")
+        self.stdout.write(f"p50 / p99:      {percentile(latencies, 50) * 1000:.2f} / {percentile(latencies, 99) * 1000:.2f} ms")
+        self.stdout.write(f"mean:           {statistics.fmean(latencies) * 1000:.2f} ms, cores {os.cpu_count()}")
+
+        if product.stock < 0 or committed > options['stock'] or product.stock != expected:
+            raise CommandError("Oversold: stock accounting does not match committed reservations.")
+        if product.is_available != (product.stock > 0):
+            raise CommandError("is_available does not match the remaining stock.")
+        self.stdout.write(self.style.SUCCESS("No overselling detected."))
@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from products.catalog_io import FORMATS, export_products
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Streams a shop's catalog (or the whole platform) as CSV or JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', help="Only export this shop's products.")
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help="Defaults to stdout.")
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['shop']:
+            queryset = queryset.filter(shop_id=options['shop'])
+
+        stream = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in export_products(queryset, options['format']):
+                stream.write(chunk)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.catalog_io import FORMATS, detect_format, import_products, read_rows
+from shop.models import Shop
+
+
+class Command(BaseCommand):
+    help = "Streams a CSV or JSONL catalog into a shop, upserting products by sku."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file to import.")
+        parser.add_argument('--shop', required=True, help="Target shop id.")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not Shop.objects.filter(pk=options['shop']).exists():
+            raise CommandError(f"Shop {options['shop']} not found.")
+
+        fmt = options['format'] or detect_format(options['path'])
+        with open(options['path'], 'rb') as stream:
+            report = import_products(
+                options['shop'],
+                read_rows(stream, fmt),
+                chunk_size=options['chunk_size'],
+            )
+
+        self.stdout.write(json.dumps(report.as_dict(), indent=2))
+        style = self.style.SUCCESS if not report.failed else self.style.WARNING
+        self.stdout.write(style(
+            f"{report.rows} rows: {report.created} created, "
+            f"{report.updated} updated, {report.failed} failed."
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from products.catalog_stats import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts ShopCatalogStats from the product table and fixes rows that "
+        "drifted. Runs once, or every --interval seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', action='append', help="Limit to this shop (repeatable).")
+        parser.add_argument('--interval', type=float, help="Keep running, one pass every N seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            shops, corrected = reconcile(options['shop'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Checked {shops} shops in {time.perf_counter() - started:.2f}s, corrected {corrected} rows."
+            ))
+            if not options['interval']:
+                return
+            close_old_connections()
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
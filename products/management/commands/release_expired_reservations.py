@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Returns the stock of held reservations that passed their expiry."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        released = Product.objects.release_expired(batch_size=options['batch_size'])
+        self.stdout.write(f"Released {released} expired reservations.")
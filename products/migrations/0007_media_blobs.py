@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+import image.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=image.storage.get_blob_storage, upload_to='products/%Y/%m/'),
+        ),
+    ]
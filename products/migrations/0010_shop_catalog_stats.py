@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-18 15:49
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q
+
+
+def backfill_catalog_stats(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ShopCatalogStats = apps.get_model('products', 'ShopCatalogStats')
+    rows = (
+        Product.objects.filter(shop__isnull=False)
+        .values('shop_id', 'category').order_by()
+        .annotate(
+            product_count=Count('pk'),
+            in_stock_count=Count('pk', filter=Q(stock__gt=0)),
+            min_price=Min('price'),
+            max_price=Max('price'),
+        )
+    )
+    ShopCatalogStats.objects.bulk_create(
+        [ShopCatalogStats(**row) for row in rows.iterator()], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_tenant_leading_indexes'),
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopCatalogStats',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('category', models.CharField(max_length=100)),
+                ('product_count', models.IntegerField(default=0)),
+                ('in_stock_count', models.IntegerField(default=0)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('price_range_stale', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='catalog_stats', to='shop.shop')),
+            ],
+            options={
+                'verbose_name': 'Shop Catalog Stats',
+                'db_table': 'shop_catalog_stats',
+                'constraints': [models.UniqueConstraint(fields=('shop', 'category'), name='unique_shop_catalog_category')],
+            },
+        ),
+        migrations.RunPython(backfill_catalog_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_shop_catalog_stats'),
+        ('shop', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_shop_id_e50bcb_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['shop', 'category', 'created_at', 'id'], name='product_shop_id_124bad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['shop', 'category', 'price', 'id'], name='product_shop_id_20160f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['shop', 'is_available', 'created_at', 'id'], name='product_shop_id_829e1a_idx'),
+        ),
+    ]
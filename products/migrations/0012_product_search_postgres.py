@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# Same expression as products.search.PG_DOCUMENT; they must not diverge.
+DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    """PostgreSQL searches the product table itself through this index."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS product_search_document_idx ON product USING gin (({DOCUMENT}))"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS product_search_document_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
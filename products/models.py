@@ -1,7 +1,13 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
-class Product(models.Model):
+
+from image.storage import BlobReferencesMixin, get_blob_storage
+from products.catalog_stats import CATALOG_STATE_FIELDS, catalog_state
+from products.product_manager import ProductManager
+from shop.tenancy import TenantManager
+
+class Product(BlobReferencesMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     shop = models.ForeignKey('shop.Shop', on_delete=models.CASCADE,blank=True, null=True)
 
@@ -11,7 +17,8 @@ class Product(models.Model):
     description = models.TextField(blank=True, null=True)
     sku = models.CharField(max_length=100, unique=True, db_index=True,null=True,blank=True)
     # Media
-    image = models.ImageField(upload_to='products/%Y/%m/', null=True, blank=True)
+    image = models.ImageField(upload_to='products/%Y/%m/', storage=get_blob_storage, null=True, blank=True)
+    variants = models.JSONField(default=dict, blank=True, editable=False)  # see image/derivatives.py
 
     # Financials & Inventory
     price = models.DecimalField(max_digits=12, decimal_places=2,blank=True,null=True)
@@ -22,27 +29,138 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductManager()
+    tenant = TenantManager()  # scoped to the current shop, see shop/tenancy.py
 
     class Meta:
         db_table = 'product'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['slug']),
+            # Storefront lookups are always within one shop: shop leads.
+            models.Index(fields=['shop', 'slug']),
+            # Filtered listings (products/filters.py): category pages by date
+            # or by price, and availability by date.
+            models.Index(fields=['shop', 'category', 'created_at', 'id']),
+            models.Index(fields=['shop', 'category', 'price', 'id']),
+            models.Index(fields=['shop', 'is_available', 'created_at', 'id']),
             models.Index(fields=['sku']),
+            # Keyset pagination seeks on (created_at, id), per shop and platform-wide.
+            models.Index(fields=['shop', 'created_at', 'id']),
+            models.Index(fields=['created_at', 'id']),
         ]
 
+    VARIANT_FIELDS = ('image',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the row contributed to ShopCatalogStats when it was loaded;
+        # the signals apply the difference after a save or delete.
+        # Not taken for .only() loads, which would query the missing fields.
+        if CATALOG_STATE_FIELDS.issubset(field_names):
+            instance._saved_catalog_state = catalog_state(instance)
+        return instance
+
     def save(self, *args, **kwargs):
         import secrets
         if not self.slug:
             self.slug = slugify(self.name)
         if not self.sku:
             self.sku = f"PROD-{secrets.token_hex(4).upper()}"
-        super().save(*args, **kwargs)
+        if self.stock <= 0:
+            self.is_available = False
+        # The row and its ShopCatalogStats delta (post_save) commit together,
+        # so a recount never sees one without the other.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
 
     def get_product_url(self):
-        if self.shop and self.slug:
-            return f"/{self.shop.url}/products/{self.slug}/"
+        from shop.slugs import slug_resolver
+
+        # The storefront slug lives on Details; the resolver keeps it in
+        # memory, so listing products does not query per row.
+        shop_slug = slug_resolver.slug_for(self.shop_id)
+        if shop_slug and self.slug:
+            return f"/{shop_slug}/products/{self.slug}/"
         return "#"
 
     def __str__(self):
-        return f"{self.name} ({self.sku})"
\ No newline at end of file
+        return f"{self.name} ({self.sku})"
+
+
+class ShopCatalogStats(models.Model):
+    """
+    Per-category counters of a shop's catalog for storefront facets, kept
+    up to date by products/catalog_stats.py. `price_range_stale` is set
+    when the product holding the minimum or maximum price went away; the
+    range is recomputed for that category on the next read.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey('shop.Shop', on_delete=models.CASCADE, related_name='catalog_stats')
+    category = models.CharField(max_length=100)
+    product_count = models.IntegerField(default=0)
+    in_stock_count = models.IntegerField(default=0)
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    price_range_stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'shop_catalog_stats'
+        verbose_name = 'Shop Catalog Stats'
+        constraints = [
+            # Also the index facets are read through.
+            models.UniqueConstraint(fields=['shop', 'category'], name='unique_shop_catalog_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.category}: {self.product_count} products ({self.shop_id})"
+
+
+class StockReservation(models.Model):
+    """Stock held for a checkout until it is committed, released or expires."""
+    HELD = 'held'
+    COMMITTED = 'committed'
+    RELEASED = 'released'
+    EXPIRED = 'expired'
+    STATUS_CHOICES = [
+        (HELD, 'Held'),
+        (COMMITTED, 'Committed'),
+        (RELEASED, 'Released'),
+        (EXPIRED, 'Expired'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    shop = models.ForeignKey('shop.Shop', on_delete=models.CASCADE, null=True, blank=True)
+    # The storefront customer holding the stock; only they may close it.
+    customer = models.ForeignKey(
+        'customers.Customer', on_delete=models.CASCADE, null=True, blank=True, related_name='reservations',
+    )
+    reference = models.CharField(max_length=100, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=HELD)
+    expires_at = models.DateTimeField()
+    closed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'stock_reservations'
+        indexes = [
+            # The expiry reaper scans held reservations by expiry.
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"Reservation {self.pk} ({self.status})"
+
+
+class StockReservationLine(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    reservation = models.ForeignKey(StockReservation, on_delete=models.CASCADE, related_name='lines')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservation_lines')
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'stock_reservation_lines'
+        constraints = [
+            models.UniqueConstraint(fields=['reservation', 'product'], name='unique_reservation_product'),
+        ]
@@ -0,0 +1,206 @@
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import BooleanField, Case, ExpressionWrapper, F, Q, Value, When
+from django.utils import timezone
+
+from pre_registration.reaper import expiry_reaper
+from products.catalog_stats import record_stock_crossings
+
+
+def normalize_items(items):
+    """
+    Accepts {product_id: qty} or [(product_id, qty), ...] and merges
+    repeated products. Raises ValueError for non-positive quantities.
+    """
+    pairs = items.items() if isinstance(items, dict) else items
+    quantities = Counter()
+    for product_id, quantity in pairs:
+        quantity = int(quantity)
+        if quantity <= 0:
+            raise ValueError("Quantities must be positive.")
+        quantities[str(uuid.UUID(str(product_id)))] += quantity
+    return quantities
+
+
+def _per_product(quantities):
+    """CASE id WHEN ... THEN qty END, for one UPDATE across many products."""
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        default=Value(0),
+        output_field=models.IntegerField(),
+    )
+
+
+class ProductManager(models.Manager):
+
+    # ==========================================
+    # 1. STOCK RESERVATIONS
+    # ==========================================
+
+    def take_stock(self, quantities, shop_id=None):
+        """
+        Decrements stock for every product in one conditional UPDATE:
+        `stock = stock - qty WHERE stock >= qty`. Returns the number of
+        products updated; anything short of len(quantities) means at least
+        one line could not be covered and the caller must roll back.
+        Products the merchant has hidden are never sold or held.
+        `is_available` is cleared in the same statement when stock hits zero,
+        and ShopCatalogStats in-stock counts in the same transaction.
+        """
+        amount = _per_product(quantities)
+        queryset = self.filter(pk__in=list(quantities), stock__gte=amount, is_available=True)
+        if shop_id is not None:
+            queryset = queryset.filter(shop_id=shop_id)
+        with transaction.atomic(using=self.db, savepoint=False):
+            updated = queryset.update(
+                stock=F('stock') - amount,
+                is_available=ExpressionWrapper(Q(stock__gt=amount) & Q(is_available=True), output_field=BooleanField()),
+            )
+            # Every line was covered, so whatever is at zero now just sold out.
+            # (A partial update is rolled back by the caller, stats included.)
+            if updated == len(quantities):
+                record_stock_crossings(
+                    self.filter(pk__in=list(quantities), stock__lte=0).values_list('shop_id', 'category'), -1
+                )
+        return updated
+
+    def restore_stock(self, quantities):
+        """
+        Adds stock back in one UPDATE. Products that were sold out become
+        available again; products hidden by the merchant stay hidden.
+        """
+        if not quantities:
+            return 0
+        amount = _per_product(quantities)
+        with transaction.atomic(using=self.db, savepoint=False):
+            restored = self.filter(pk__in=list(quantities)).update(
+                stock=F('stock') + amount,
+                is_available=Case(When(stock__lte=0, then=Value(True)), default=F('is_available')),
+            )
+            # Back above zero, and no more than `qty` above it: was sold out.
+            record_stock_crossings(
+                self.filter(pk__in=list(quantities), stock__gt=0, stock__lte=amount).values_list('shop_id', 'category'), 1
+            )
+        return restored
+
+    def reserve(self, items, ttl=None, reference='', shop_id=None, customer_id=None):
+        """
+        Holds stock for a multi-product order. All lines are reserved in one
+        transaction or none are. With `shop_id`, products of other shops are
+        treated as unavailable. A customer may hold at most
+        STOCK_RESERVATION_MAX_HELD reservations at a time.
+        Returns (reservation, message).
+        """
+        from products.models import StockReservation, StockReservationLine
+
+        try:
+            quantities = normalize_items(items)
+        except (TypeError, ValueError) as exc:
+            return None, str(exc)
+        if not quantities:
+            return None, "No items to reserve."
+        if customer_id is not None:
+            held = StockReservation.objects.filter(
+                customer_id=customer_id, status=StockReservation.HELD, expires_at__gt=timezone.now(),
+            ).count()
+            if held >= getattr(settings, 'STOCK_RESERVATION_MAX_HELD', 3):
+                return None, "Too many reservations held; commit or release one first."
+
+        ttl = ttl or getattr(settings, 'STOCK_RESERVATION_TTL', 15 * 60)
+        with transaction.atomic(using=self.db):
+            if self.take_stock(quantities, shop_id) == len(quantities):
+                reservation = StockReservation.objects.create(
+                    shop_id=shop_id,
+                    customer_id=customer_id,
+                    reference=reference,
+                    expires_at=timezone.now() + timedelta(seconds=ttl),
+                )
+                StockReservationLine.objects.bulk_create([
+                    StockReservationLine(reservation=reservation, product_id=product_id, quantity=quantity)
+                    for product_id, quantity in quantities.items()
+                ])
+            else:
+                reservation = None
+                transaction.set_rollback(True)
+
+        if reservation is None:
+            found = self.filter(pk__in=list(quantities))
+            if shop_id is not None:
+                found = found.filter(shop_id=shop_id)
+            found = {
+                str(pk): (sku, stock if available else 0)
+                for pk, sku, stock, available in found.values_list('pk', 'sku', 'stock', 'is_available')
+            }
+            missing = [
+                found[product_id][0] if product_id in found else product_id
+                for product_id, quantity in quantities.items()
+                if product_id not in found or found[product_id][1] < quantity
+            ]
+            return None, f"Insufficient stock for: {', '.join(missing)}"
+        # Held stock the customer abandons goes back on the shelf once it expires.
+        expiry_reaper.ensure_started()
+        return reservation, "Stock reserved."
+
+    def _close(self, reservation, status, **conditions):
+        """Flips a held reservation to `status`; only one caller can win."""
+        from products.models import StockReservation
+
+        return StockReservation.objects.filter(
+            pk=reservation.pk, status=StockReservation.HELD, **conditions
+        ).update(status=status, closed_at=timezone.now())
+
+    def commit(self, reservation):
+        """Makes a held, unexpired reservation permanent. Returns (ok, message)."""
+        from products.models import StockReservation
+
+        if not self._close(reservation, StockReservation.COMMITTED, expires_at__gt=timezone.now()):
+            return False, "Reservation is no longer held."
+        reservation.status = StockReservation.COMMITTED
+        return True, "Reservation committed."
+
+    def release(self, reservation):
+        """Returns a held reservation's stock. Returns (ok, message)."""
+        from products.models import StockReservation
+
+        with transaction.atomic(using=self.db):
+            if not self._close(reservation, StockReservation.RELEASED):
+                return False, "Reservation is no longer held."
+            self.restore_stock(Counter(dict(
+                reservation.lines.values_list('product_id', 'quantity')
+            )))
+        reservation.status = StockReservation.RELEASED
+        return True, "Reservation released."
+
+    def release_expired(self, batch_size=500, now=None):
+        """Releases held reservations past their expiry. Returns how many."""
+        from products.models import StockReservation, StockReservationLine
+
+        released = 0
+        while True:
+            with transaction.atomic(using=self.db):
+                ids = list(
+                    StockReservation.objects
+                    .filter(status=StockReservation.HELD, expires_at__lte=now or timezone.now())
+                    .values_list('pk', flat=True)[:batch_size]
+                )
+                if not ids:
+                    return released
+                # One conditional UPDATE per reservation: a concurrent commit or
+                # another reaper wins the row, and only the winner restocks.
+                expired = [
+                    pk for pk in ids
+                    if StockReservation.objects.filter(pk=pk, status=StockReservation.HELD).update(
+                        status=StockReservation.EXPIRED, closed_at=timezone.now()
+                    )
+                ]
+                quantities = Counter()
+                for product_id, quantity in StockReservationLine.objects.filter(
+                    reservation_id__in=expired
+                ).values_list('product_id', 'quantity'):
+                    quantities[str(uuid.UUID(str(product_id)))] += quantity
+                self.restore_stock(quantities)
+                released += len(expired)
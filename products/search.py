@@ -0,0 +1,326 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+FTS_TABLE = 'product_search'
+
+# Relative importance of each indexed field, shared by all backends.
+FIELD_WEIGHTS = {'name': 10.0, 'category': 4.0, 'description': 1.0}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Lower-cases, strips diacritics and splits on non-word characters."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _document(product):
+    return {field: getattr(product, field) or '' for field in FIELD_WEIGHTS}
+
+
+# ==========================================
+# 1. SQLITE FTS5 BACKEND
+# ==========================================
+
+class FTS5Backend:
+    """
+    Uses the `product_search` FTS5 table created by migration 0005.
+    The shop and product ids are indexed columns with zero weight, so both
+    shop scoping and per-product deletes are index lookups.
+    """
+    name = 'fts5'
+
+    @staticmethod
+    def is_available():
+        if connection.vendor != 'sqlite':
+            return False
+        return FTS_TABLE in connection.introspection.table_names()
+
+    def index(self, products):
+        products = list(products)
+        if not products:
+            return
+        self.remove([product.pk for product in products])
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (name, category, description, product_id, shop_id) "
+                f"VALUES (%s, %s, %s, %s, %s)",
+                [
+                    (
+                        product.name or '',
+                        product.category or '',
+                        product.description or '',
+                        product.pk.hex,
+                        product.shop_id.hex if product.shop_id else '',
+                    )
+                    for product in products
+                ],
+            )
+
+    def remove(self, product_ids):
+        with connection.cursor() as cursor:
+            for product_id in product_ids:
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid IN "
+                    f"(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+                    [f'product_id:"{uuid.UUID(str(product_id)).hex}"'],
+                )
+
+    def search(self, query, shop_id, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        terms = ' '.join(f'"{token}"*' for token in tokens)
+        match = f'shop_id:"{uuid.UUID(str(shop_id)).hex}" AND {{name category description}}: ({terms})'
+        weights = ', '.join(str(w) for w in FIELD_WEIGHTS.values())
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT product_id, bm25({FTS_TABLE}, {weights}, 0, 0) AS rank "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+                [match, limit],
+            )
+            # bm25() is negative, lower is better; flip it for callers.
+            return [(uuid.UUID(pid), -rank) for pid, rank in cursor.fetchall()]
+
+
+# ==========================================
+# 2. POSTGRESQL FULL-TEXT BACKEND
+# ==========================================
+
+# Must stay identical to the expression of the GIN index created by
+# migration 0012, or PostgreSQL cannot use the index.
+PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+
+
+class PostgresBackend:
+    """
+    Searches the product table itself through a GIN index on a weighted
+    tsvector, so every process sees every committed change and there is
+    no separate index to maintain.
+    """
+    name = 'postgres'
+
+    @staticmethod
+    def is_available():
+        return connection.vendor == 'postgresql'
+
+    def index(self, products):
+        pass
+
+    def remove(self, product_ids):
+        pass
+
+    def search(self, query, shop_id, limit=20):
+        # Diacritics are kept: the 'simple' configuration does not strip them.
+        tokens = _TOKEN_RE.findall(str(query or '').lower())
+        if not tokens:
+            return []
+        terms = ' & '.join(f"{token}:*" for token in tokens)
+        # ts_rank weights are listed {D, C, B, A}.
+        weights = '{0, %s, %s, %s}' % tuple(
+            FIELD_WEIGHTS[field] / FIELD_WEIGHTS['name'] for field in ('description', 'category', 'name')
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, ts_rank(%s::float4[], {PG_DOCUMENT}, query) AS rank "
+                f"FROM product, to_tsquery('simple', %s) AS query "
+                f"WHERE shop_id = %s AND {PG_DOCUMENT} @@ query "
+                f"ORDER BY rank DESC LIMIT %s",
+                [weights, terms, uuid.UUID(str(shop_id)), limit],
+            )
+            return [(product_id, rank) for product_id, rank in cursor.fetchall()]
+
+
+# ==========================================
+# 3. PURE-PYTHON FALLBACK
+# ==========================================
+
+class _Partition:
+    """Inverted index for one shop."""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)   # term -> {product_id: weighted tf}
+        self.doc_terms = {}                 # product_id -> {term: weighted tf}
+        self.doc_len = {}
+        self.total_len = 0.0
+        self.vocab = []                     # sorted terms, for prefix expansion
+
+    def add(self, product_id, document):
+        self.discard(product_id)
+        terms = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(document[field]):
+                terms[token] += weight
+        for term, tf in terms.items():
+            if term not in self.postings:
+                bisect.insort(self.vocab, term)
+            self.postings[term][product_id] = tf
+        self.doc_terms[product_id] = dict(terms)
+        self.doc_len[product_id] = sum(terms.values())
+        self.total_len += self.doc_len[product_id]
+
+    def discard(self, product_id):
+        terms = self.doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            docs = self.postings[term]
+            docs.pop(product_id, None)
+            if not docs:
+                del self.postings[term]
+                del self.vocab[bisect.bisect_left(self.vocab, term)]
+        self.total_len -= self.doc_len.pop(product_id)
+
+    def expand(self, prefix):
+        start = bisect.bisect_left(self.vocab, prefix)
+        end = bisect.bisect_left(self.vocab, prefix + '\uffff')
+        return self.vocab[start:end]
+
+    def search(self, tokens, limit, k1=1.2, b=0.75):
+        n_docs = len(self.doc_len)
+        if not n_docs:
+            return []
+        avg_len = self.total_len / n_docs or 1.0
+
+        scores = None
+        for token in tokens:
+            token_scores = defaultdict(float)
+            for term in self.expand(token):
+                docs = self.postings[term]
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for product_id, tf in docs.items():
+                    norm = tf + k1 * (1 - b + b * self.doc_len[product_id] / avg_len)
+                    token_scores[product_id] += idf * tf * (k1 + 1) / norm
+            # Every query token must match, as with FTS5's implicit AND.
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {pid: s + token_scores[pid] for pid, s in scores.items() if pid in token_scores}
+            if not scores:
+                return []
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+class MemoryBackend:
+    """
+    Per-process BM25 index, loaded lazily per shop on first search.
+    Used when neither FTS5 nor PostgreSQL is available.
+
+    Signals only reach the index of the process that saved the product, so
+    a shop is reloaded from the database once it is `ttl` seconds old: that
+    bounds how long other processes serve stale results.
+    """
+    name = 'memory'
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._partitions = {}
+        self._loaded_at = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_available():
+        return True
+
+    def _load(self, shop_id):
+        from products.models import Product
+
+        partition = _Partition()
+        rows = (
+            Product.objects
+            .filter(shop_id=shop_id)
+            .values_list('id', *FIELD_WEIGHTS)
+            .iterator(chunk_size=2000)
+        )
+        for product_id, *values in rows:
+            partition.add(product_id, {f: v or '' for f, v in zip(FIELD_WEIGHTS, values)})
+        return partition
+
+    def index(self, products):
+        with self._lock:
+            for product in products:
+                for partition in self._partitions.values():
+                    partition.discard(product.pk)
+                # Unloaded shops pick the change up when they are first loaded.
+                partition = self._partitions.get(product.shop_id)
+                if partition is not None:
+                    partition.add(product.pk, _document(product))
+
+    def remove(self, product_ids):
+        with self._lock:
+            for partition in self._partitions.values():
+                for product_id in product_ids:
+                    partition.discard(product_id)
+
+    def search(self, query, shop_id, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        shop_id = uuid.UUID(str(shop_id))
+        with self._lock:
+            loaded_at = self._loaded_at.get(shop_id)
+            if loaded_at is None or loaded_at + self.ttl < time.monotonic():
+                self._partitions[shop_id] = self._load(shop_id)
+                self._loaded_at[shop_id] = time.monotonic()
+            return self._partitions[shop_id].search(tokens, limit)
+
+    def reset(self):
+        with self._lock:
+            self._partitions.clear()
+            self._loaded_at.clear()
+
+
+# ==========================================
+# 4. BACKEND SELECTION
+# ==========================================
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    Resolves PRODUCT_SEARCH_BACKEND ('auto', 'fts5', 'postgres' or 'memory')
+    once per process. 'auto' prefers FTS5 on SQLite and PostgreSQL full-text
+    search on PostgreSQL, and falls back to the in-memory index.
+    """
+    global _backend
+    if _backend is None:
+        choice = getattr(settings, 'PRODUCT_SEARCH_BACKEND', 'auto')
+        if choice == 'fts5' or (choice == 'auto' and FTS5Backend.is_available()):
+            _backend = FTS5Backend()
+        elif choice == 'postgres' or (choice == 'auto' and PostgresBackend.is_available()):
+            _backend = PostgresBackend()
+        else:
+            _backend = MemoryBackend(ttl=getattr(settings, 'PRODUCT_SEARCH_MEMORY_TTL', 60))
+    return _backend
+
+
+def search_products(query, shop_id, limit=20):
+    """Returns [(product_id, score), ...] best match first."""
+    return get_search_backend().search(query, shop_id, limit=limit)
+
+
+def index_products(products):
+    get_search_backend().index(products)
+
+
+def remove_products(product_ids):
+    get_search_backend().remove(product_ids)
@@ -1,9 +1,69 @@
 from rest_framework import serializers
-from .models import Product
+from image.serializer import SrcsetField
+from .models import Product, StockReservation, StockReservationLine
+
+
+class ProductUrlListSerializer(serializers.ListSerializer):
+
+     def to_representation(self, data):
+          from shop.slugs import slug_resolver
+
+          data = list(data.all() if hasattr(data, 'all') else data)
+          # One query at most for every shop on the page.
+          slug_resolver.slugs_for(product.shop_id for product in data)
+          return super().to_representation(data)
 
 
 class ProductSerializer(serializers.ModelSerializer):
+     image_srcset = SrcsetField('image')
+     url = serializers.CharField(source='get_product_url', read_only=True)
+
      class Meta:
         model = Product
-        fields = "__all__"
-        read_only_fields = ('created_at', 'updated_at',"slug")
\ No newline at end of file
+        exclude = ("variants",)
+        read_only_fields = ('created_at', 'updated_at',"slug")
+        list_serializer_class = ProductUrlListSerializer
+
+
+class ProductFilterSerializer(serializers.Serializer):
+     """Query string of the product list, see products/filters.py. All optional."""
+     category = serializers.CharField(required=False, max_length=100)
+     min_price = serializers.DecimalField(required=False, max_digits=12, decimal_places=2, min_value=0)
+     max_price = serializers.DecimalField(required=False, max_digits=12, decimal_places=2, min_value=0)
+     available = serializers.BooleanField(required=False)
+     in_stock = serializers.BooleanField(required=False)
+     on_sale = serializers.BooleanField(required=False)
+     sort = serializers.ChoiceField(required=False, choices=['newest', 'price', '-price'])
+
+     def validate(self, data):
+          if 'min_price' in data and 'max_price' in data and data['min_price'] > data['max_price']:
+               raise serializers.ValidationError({"max_price": "Must not be below min_price."})
+          return data
+
+
+class ReservationItemSerializer(serializers.Serializer):
+     product = serializers.UUIDField()
+     quantity = serializers.IntegerField(min_value=1)
+
+
+class ReservationRequestSerializer(serializers.Serializer):
+     MAX_ITEMS = 200
+
+     items = ReservationItemSerializer(many=True, allow_empty=False, max_length=MAX_ITEMS)
+     ttl = serializers.IntegerField(required=False, min_value=30, max_value=60 * 60)
+     reference = serializers.CharField(required=False, allow_blank=True, max_length=100, default='')
+
+
+class ReservationLineSerializer(serializers.ModelSerializer):
+     class Meta:
+        model = StockReservationLine
+        fields = ('product', 'quantity')
+
+
+class ReservationSerializer(serializers.ModelSerializer):
+     lines = ReservationLineSerializer(many=True, read_only=True)
+
+     class Meta:
+        model = StockReservation
+        fields = ('id', 'shop', 'reference', 'status', 'expires_at', 'closed_at', 'created_at', 'lines')
+        read_only_fields = fields
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from image.derivatives import schedule_variants
+from image.storage import release_blob_references, track_blob_references
+from products.catalog_stats import catalog_state, record_product_change, refresh_shop
+from products.models import Product
+from products.search import index_products, remove_products
+
+
+# ==========================================
+# SEARCH INDEX MAINTENANCE
+# ==========================================
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, **kwargs):
+    transaction.on_commit(lambda: index_products([instance]))
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_on_delete(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: remove_products([product_id]))
+
+
+# ==========================================
+# IMAGE DERIVATIVES
+# ==========================================
+
+@receiver(post_save, sender=Product)
+def build_product_image_variants(sender, instance, **kwargs):
+    schedule_variants(instance, Product.VARIANT_FIELDS)
+
+
+# ==========================================
+# BLOB REFERENCE COUNTS
+# ==========================================
+
+@receiver(post_save, sender=Product)
+def track_product_image_blobs(sender, instance, update_fields=None, **kwargs):
+    track_blob_references(instance, update_fields)
+
+
+@receiver(post_delete, sender=Product)
+def release_product_image_blobs(sender, instance, **kwargs):
+    release_blob_references(instance)
+
+
+# ==========================================
+# CATALOG STATS (FACETS)
+# ==========================================
+
+_STATE_FIELDS = {'shop', 'shop_id', 'category', 'stock', 'price'}
+
+
+@receiver(post_save, sender=Product)
+def update_catalog_stats_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not _STATE_FIELDS.intersection(update_fields):
+        return
+    new = catalog_state(instance)
+    if created:
+        record_product_change(None, new)
+    elif hasattr(instance, '_saved_catalog_state'):
+        record_product_change(instance._saved_catalog_state, new)
+    elif new is not None:
+        # Saved without having been loaded whole: the old state is unknown.
+        refresh_shop(new[0])
+    instance._saved_catalog_state = new
+
+
+@receiver(post_delete, sender=Product)
+def update_catalog_stats_on_delete(sender, instance, **kwargs):
+    old = getattr(instance, '_saved_catalog_state', None) or catalog_state(instance)
+    record_product_change(old, None)
@@ -1,3 +1,460 @@
-from django.test import TestCase
+import itertools
+import re
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
+
+from access.tokens import issue_token
+from config.pagination import KeysetPagination
+from customers.models import Customer
+from shop.models import Shop
+from shop.tenancy import tenant_context
+from .catalog_io import _ForeignSkus, _upsert, import_products
+from .catalog_stats import refresh_shop
+from .filters import choose_plan, filter_products
+from .models import Product, ShopCatalogStats
+from .search import FTS5Backend, MemoryBackend, PostgresBackend, search_products
+
+# Every value each filter can take; None leaves the filter out.
+FILTER_VALUES = {
+    'category': [None, 'Home'],
+    'price_range': [None, (Decimal('5'), None), (None, Decimal('50')), (Decimal('5'), Decimal('50'))],
+    'available': [None, True, False],
+    'in_stock': [None, True, False],
+    'on_sale': [None, True, False],
+    'sort': ['newest', 'price', '-price'],
+}
+
+
+def filter_combinations():
+    for values in itertools.product(*FILTER_VALUES.values()):
+        combination = dict(zip(FILTER_VALUES, values))
+        price_range = combination.pop('price_range') or (None, None)
+        combination['min_price'], combination['max_price'] = price_range
+        yield {name: value for name, value in combination.items() if value is not None}
+
+
+class ProductFilterPlanTests(TestCase):
+    """
+    Every filter combination the engine accepts must be answered through an
+    index, first page and later pages alike. Checked with EXPLAIN.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        other = Shop.objects.create()
+        Product.objects.bulk_create([
+            Product(
+                shop=shop, name=f'product {index}', slug=f'{shop.pk}-{index}', sku=f'FILTER-{shop.pk}-{index}',
+                category=['Home', 'Apparel', 'Kitchen'][index % 3], price=Decimal(index % 40 + 1),
+                compare_at_price=Decimal(index % 40 + 5) if index % 4 == 0 else None,
+                stock=index % 5, is_available=index % 7 != 0,
+            )
+            for shop in (cls.shop, other) for index in range(120)
+        ])
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Tables this small are always cheaper to read whole.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assert_uses_index(self, queryset, filters, label):
+        """
+        The seek must narrow the shop by the category, or by availability
+        when there is no category, so price bounds only ever apply within
+        one category, and sorting after the seek only happens inside one.
+        """
+        explained = self.explain(queryset)
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan on product', explained, f"{label}\n{explained}")
+            return
+        if connection.vendor != 'sqlite':
+            return
+        self.assertNotRegex(explained, r'\bSCAN product\b', f"{label}: full scan\n{explained}")
+        search = re.search(r'SEARCH product USING (?:COVERING )?INDEX \S+ \((.*?)\)', explained)
+        self.assertIsNotNone(search, f"{label}\n{explained}")
+        seek = search.group(1)
+        self.assertIn('shop_id=?', seek, f"{label}\n{explained}")
+        needs_category = {'category', 'min_price', 'max_price'} & filters.keys() or filters.get('sort', 'newest') != 'newest'
+        if needs_category:
+            self.assertIn('category=?', seek, f"{label}: category not seeked\n{explained}")
+        elif 'available' in filters:
+            self.assertIn('is_available=?', seek, f"{label}: availability not seeked\n{explained}")
+        if 'category=?' not in seek:
+            self.assertNotIn('TEMP B-TREE FOR ORDER BY', explained, f"{label}: sorts the whole shop\n{explained}")
+
+    def test_every_accepted_combination_uses_an_index(self):
+        accepted = 0
+        paginator = KeysetPagination()
+        for filters in filter_combinations():
+            try:
+                choose_plan(filters)
+            except exceptions.ValidationError:
+                continue
+            accepted += 1
+            with tenant_context(self.shop.pk):
+                queryset, _, ordering = filter_products(Product.tenant.all(), filters)
+                page = queryset.order_by(*ordering)
+                position = [
+                    timezone.now() if name == 'created_at' else Decimal('10') if name == 'price' else uuid.uuid4()
+                    for name in (term.lstrip('-') for term in ordering)
+                ]
+                self.assert_uses_index(page[:51], filters, f"{filters} first page")
+                self.assert_uses_index(
+                    page.filter(paginator._seek(ordering, position))[:51], filters, f"{filters} next page",
+                )
+        self.assertGreater(accepted, 0)
+
+    def test_combinations_without_an_index_are_rejected(self):
+        for filters in (
+            {'min_price': Decimal('5')},
+            {'max_price': Decimal('5'), 'available': True},
+            {'sort': 'price'},
+            {'sort': '-price', 'in_stock': True},
+        ):
+            with self.assertRaises(exceptions.ValidationError, msg=filters):
+                choose_plan(filters)
+
+
+class ProductFilterApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        cls.cheap = Product.objects.create(shop=cls.shop, name='mug', category='Kitchen', price=Decimal('4'), stock=3)
+        cls.sale = Product.objects.create(
+            shop=cls.shop, name='pan', category='Kitchen', price=Decimal('20'),
+            compare_at_price=Decimal('30'), stock=0,
+        )
+        Product.objects.create(shop=cls.shop, name='scarf', category='Apparel', price=Decimal('12'), stock=1)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def names(self, **params):
+        response = self.client.get(f'/api/products/shop/{self.shop.pk}/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['name'] for row in response.json()['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.names(category='Kitchen', sort='price'), ['mug', 'pan'])
+        self.assertEqual(self.names(category='Kitchen', sort='-price'), ['pan', 'mug'])
+        self.assertEqual(self.names(category='Kitchen', min_price='5'), ['pan'])
+        self.assertEqual(self.names(category='Kitchen', on_sale='true'), ['pan'])
+        self.assertEqual(self.names(in_stock='true'), ['scarf', 'mug'])
+        self.assertEqual(self.names(available='false'), ['pan'])
+
+    def test_price_order_pages(self):
+        response = self.client.get(
+            f'/api/products/shop/{self.shop.pk}/', {'category': 'Kitchen', 'sort': 'price', 'page_size': 1}
+        )
+        page = response.json()
+        self.assertEqual([row['name'] for row in page['results']], ['mug'])
+        self.assertEqual([row['name'] for row in self.client.get(page['next']).json()['results']], ['pan'])
+
+    def test_invalid_and_unindexed_filters_are_rejected(self):
+        url = f'/api/products/shop/{self.shop.pk}/'
+        self.assertEqual(self.client.get(url, {'sort': 'name'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'category': 'Kitchen', 'min_price': '9', 'max_price': '1'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'min_price': '5'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/products/', {'category': 'Kitchen'}).status_code, 400)
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursors round-trip, bad ones are a 404, and equal timestamps neither repeat nor skip rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        cls.products = [
+            Product.objects.create(shop=cls.shop, name=f'item {index}', price=Decimal('1')) for index in range(5)
+        ]
+        # Four rows share one created_at, so only the id orders them.
+        Product.objects.filter(pk__in=[product.pk for product in cls.products[1:]]).update(
+            created_at=cls.products[0].created_at + timedelta(seconds=1),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f'/api/products/shop/{self.shop.pk}/'
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPagination()
+        paginator.request = Request(APIRequestFactory().get(self.url))
+        paginator.model = Product
+        position = paginator._position(self.products[0])
+        for reverse in (False, True):
+            link = paginator.encode_cursor(position, reverse)
+            token = link.split('cursor=')[1]
+            request = Request(APIRequestFactory().get(self.url, {'cursor': token}))
+            decoded, decoded_reverse = paginator.decode_cursor(request)
+            self.assertEqual(decoded, [self.products[0].created_at, self.products[0].pk])
+            self.assertIs(decoded_reverse, reverse)
+
+    def test_invalid_cursors_are_not_found(self):
+        for token in ('not-base64!', 'e30', 'eyJwIjpbMV19', 'eyJwIjpbIngiLCJ5Il19'):
+            response = self.client.get(self.url, {'cursor': token})
+            self.assertEqual(response.status_code, 404, token)
+            self.assertEqual(response.json()['detail'], 'Invalid cursor.')
+
+    def walk(self, link, direction):
+        # Bounded, so a seek that fails to advance fails the test instead of hanging it.
+        pages = []
+        for _ in range(len(self.products) + 1):
+            if not link:
+                break
+            page = self.client.get(link).json()
+            pages.append(page)
+            link = page[direction]
+        return pages
+
+    def test_equal_timestamps_are_ordered_by_id(self):
+        expected = [product.name for product in sorted(
+            self.products, key=lambda product: (product.pk != self.products[0].pk, product.pk), reverse=True,
+        )]
+        pages = self.walk(f'{self.url}?page_size=2', 'next')
+        self.assertEqual([row['name'] for page in pages for row in page['results']], expected)
+
+        # And back again from the last page.
+        pages = self.walk(pages[-1]['previous'], 'previous')
+        self.assertEqual([row['name'] for page in reversed(pages) for row in page['results']], expected[:-1])
+
+    def test_page_size_setting_is_read_per_request(self):
+        with override_settings(KEYSET_PAGE_SIZE=3):
+            self.assertEqual(len(self.client.get(self.url).json()['results']), 3)
+        self.assertEqual(len(self.client.get(self.url).json()['results']), 5)
+
+
+class ReservationApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        cls.product = Product.objects.create(shop=cls.shop, name='mug', price=Decimal('4'), stock=3)
+        cls.customer, _ = Customer.objects.register(cls.shop.pk, 'customer-secret', email='buyer@example.com')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_token(self.customer)[0]}')
+
+    def reserve(self, client=None, product=None, quantity=2):
+        return (client or self.client).post(
+            f'/api/products/shop/{self.shop.pk}/reserve/',
+            {'reference': 'cart-1', 'items': [{'product': str((product or self.product).pk), 'quantity': quantity}]},
+            format='json',
+        )
+
+    def test_reserve_and_commit(self):
+        response = self.reserve()
+        self.assertEqual(response.status_code, 201, response.content)
+        url = f"/api/products/shop/{self.shop.pk}/reservations/{response.json()['id']}/commit/"
+        self.assertEqual(self.client.post(url).status_code, 200)
+
+    def test_malformed_and_unknown_ids_are_not_found(self):
+        base = f'/api/products/shop/{self.shop.pk}/reservations'
+        self.assertEqual(self.client.post(f'{base}/abc-def/commit/').status_code, 404)
+        self.assertEqual(self.client.post(f'{base}/{uuid.uuid4()}/release/').status_code, 404)
+
+    def test_anonymous_callers_and_other_customers_cannot_hold_stock(self):
+        self.assertIn(self.reserve(APIClient()).status_code, (401, 403))
+        other_shop = Shop.objects.create()
+        outsider, _ = Customer.objects.register(other_shop.pk, 'customer-secret', email='buyer@example.com')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_token(outsider)[0]}')
+        self.assertEqual(self.reserve(client).status_code, 403)
+
+        # Nor close the reservations of others.
+        reservation = self.reserve().json()['id']
+        neighbour, _ = Customer.objects.register(self.shop.pk, 'customer-secret', email='neighbour@example.com')
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {issue_token(neighbour)[0]}')
+        response = client.post(f'/api/products/shop/{self.shop.pk}/reservations/{reservation}/release/')
+        self.assertEqual(response.status_code, 404)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+
+    def test_customers_hold_a_limited_number_of_reservations(self):
+        product = Product.objects.create(shop=self.shop, name='pan', price=Decimal('9'), stock=100)
+        for _ in range(settings.STOCK_RESERVATION_MAX_HELD):
+            self.assertEqual(self.reserve(product=product, quantity=1).status_code, 201)
+        self.assertEqual(self.reserve(product=product, quantity=1).status_code, 409)
+
+    def test_hidden_products_cannot_be_reserved(self):
+        Product.objects.filter(pk=self.product.pk).update(is_available=False)
+        response = self.reserve()
+        self.assertEqual(response.status_code, 409, response.content)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+
+class CatalogStatsRefreshTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        Product.objects.create(shop=cls.shop, name='mug', category='Kitchen', price=Decimal('4'), stock=3)
+        Product.objects.create(shop=cls.shop, name='pan', category='Kitchen', price=Decimal('20'), stock=0)
+
+    def test_refresh_repairs_drift_and_keeps_deltas_working(self):
+        rows = ShopCatalogStats.objects.filter(shop=self.shop)
+        rows.update(product_count=7, in_stock_count=0, price_range_stale=True)
+        ShopCatalogStats.objects.create(shop=self.shop, category='Gone', product_count=1)
+        self.assertEqual(refresh_shop(self.shop.pk), 2)
+        self.assertEqual(
+            list(rows.values_list('category', 'product_count', 'in_stock_count', 'min_price', 'max_price',
+                                  'price_range_stale')),
+            [('Kitchen', 2, 1, Decimal('4'), Decimal('20'), False)],
+        )
+        self.assertEqual(refresh_shop(self.shop.pk), 0)
+
+        # Deltas after a refresh land on the recounted row.
+        Product.objects.create(shop=self.shop, name='bowl', category='Kitchen', price=Decimal('2'), stock=1)
+        self.assertEqual(rows.get().product_count, 3)
+        self.assertEqual(refresh_shop(self.shop.pk), 0)
+
+
+class CatalogImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop, cls.other_shop = Shop.objects.create(), Shop.objects.create()
+        cls.foreign = Product.objects.create(
+            shop=cls.other_shop, name='theirs', sku='SHARED-1', price=Decimal('9'), stock=4,
+        )
+
+    def rows(self, *rows):
+        return list(enumerate(rows, start=2))
+
+    def test_rows_never_overwrite_another_shops_sku(self):
+        report = import_products(self.shop.pk, self.rows(
+            {'sku': 'SHARED-1', 'name': 'mine', 'price': '1', 'stock': '0'},
+            {'sku': 'OWN-1', 'name': 'mine', 'price': '1', 'stock': '2'},
+        ))
+        self.assertEqual((report.created, report.failed), (1, 1))
+        self.foreign.refresh_from_db()
+        self.assertEqual((self.foreign.shop_id, self.foreign.name, self.foreign.stock), (self.other_shop.pk, 'theirs', 4))
+
+    def test_upsert_rolls_back_when_a_sku_was_taken_in_between(self):
+        # As if the other shop inserted SHARED-1 after the ownership check.
+        with self.assertRaises(_ForeignSkus) as raised, transaction.atomic():
+            _upsert(self.shop.pk, {
+                'SHARED-1': (2, {'sku': 'SHARED-1', 'name': 'mine', 'price': Decimal('1'), 'stock': 0}),
+                'OWN-1': (3, {'sku': 'OWN-1', 'name': 'mine', 'price': Decimal('1'), 'stock': 2}),
+            })
+        self.assertEqual(raised.exception.skus, {'SHARED-1'})
+        self.foreign.refresh_from_db()
+        self.assertEqual((self.foreign.name, self.foreign.stock), ('theirs', 4))
+        self.assertFalse(Product.objects.filter(sku='OWN-1').exists())
+
+    def test_sold_out_rows_are_unavailable(self):
+        import_products(self.shop.pk, self.rows(
+            {'sku': 'OWN-1', 'name': 'mug', 'price': '1', 'stock': '0', 'is_available': 'true'},
+            {'sku': 'OWN-2', 'name': 'pan', 'price': '1', 'stock': '3'},
+        ))
+        self.assertEqual(
+            dict(Product.objects.filter(shop=self.shop).values_list('sku', 'is_available')),
+            {'OWN-1': False, 'OWN-2': True},
+        )
+        import_products(self.shop.pk, self.rows({'sku': 'OWN-2', 'stock': '0'}))
+        self.assertFalse(Product.objects.get(sku='OWN-2').is_available)
+
+
+class SearchBackendTests:
+    """Shared by every backend; subclasses provide make_backend()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop, cls.other_shop = Shop.objects.create(), Shop.objects.create()
+
+    def setUp(self):
+        self.backend = self.make_backend()
+        # The signals index into whichever backend the process resolved.
+        patcher = mock.patch('products.search._backend', self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create(self, shop=None, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(shop=shop or self.shop, price=Decimal('1'), **fields)
+
+    def ids(self, query, shop=None):
+        return [product_id for product_id, _ in search_products(query, (shop or self.shop).pk)]
+
+    def test_name_matches_outrank_description_matches(self):
+        described = self.create(name='table', description='with a brass lamp on it')
+        named = self.create(name='brass lamp', category='Home')
+        self.create(name='wool scarf', description='warm')
+        self.assertEqual(self.ids('brass lamp'), [named.pk, described.pk])
+        # Prefixes match, and every term must.
+        self.assertEqual(self.ids('lam'), [named.pk, described.pk])
+        self.assertEqual(self.ids('brass scarf'), [])
+
+    def test_results_stay_inside_the_shop(self):
+        own = self.create(name='clay mug')
+        self.create(shop=self.other_shop, name='clay mug')
+        self.assertEqual(self.ids('mug'), [own.pk])
+
+    def test_index_follows_create_update_and_delete(self):
+        self.assertEqual(self.ids('linen'), [])
+        product = self.create(name='linen shirt')
+        self.assertEqual(self.ids('linen'), [product.pk])
+
+        product.name = 'silk shirt'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.assertEqual(self.ids('linen'), [])
+        self.assertEqual(self.ids('silk'), [product.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertEqual(self.ids('silk'), [])
+
+
+class FTS5SearchTests(SearchBackendTests, TestCase):
+
+    def make_backend(self):
+        # Checked against the test database, which the migrations created.
+        if not FTS5Backend.is_available():
+            self.skipTest("SQLite without FTS5")
+        return FTS5Backend()
+
+
+class PostgresSearchTests(SearchBackendTests, TestCase):
+
+    def make_backend(self):
+        if not PostgresBackend.is_available():
+            self.skipTest("PostgreSQL only")
+        return PostgresBackend()
+
+
+class MemorySearchTests(SearchBackendTests, TestCase):
+
+    def make_backend(self):
+        return MemoryBackend(ttl=60)
+
+    def test_shops_are_reloaded_after_the_ttl(self):
+        product = self.create(name='wool scarf')
+        self.assertEqual(self.ids('wool'), [product.pk])
+        # Changed by another process: no signal reaches this index.
+        Product.objects.filter(pk=product.pk).update(name='silk scarf')
+        self.assertEqual(self.ids('silk'), [])
+        self.backend.ttl = 0
+        self.assertEqual(self.ids('silk'), [product.pk])
+
+    def test_search_endpoint(self):
+        product = self.create(name='oak table')
+        response = APIClient().get(f'/api/products/shop/{self.shop.pk}/search/', {'q': 'oak'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([row['id'] for row in response.json()['results']], [str(product.pk)])
+        self.assertEqual(APIClient().get(f'/api/products/shop/{self.shop.pk}/search/').status_code, 400)
@@ -5,5 +5,9 @@ router=DefaultRouter()
 router.register("",views.ProductViewSets,basename="product")
 
 urlpatterns = [
+    # Shop-scoped routes: writes (create/update/import) are only allowed here.
+    path("shop/<uuid:shop_id>/", include(router.urls)),
+    # Same routes addressed by the storefront slug (Details.url).
+    path("store/<slug:shop_slug>/", include(router.urls)),
     path("",include(router.urls))
-]
\ No newline at end of file
+]
@@ -1,24 +1,74 @@
-from rest_framework import viewsets, permissions, exceptions
+import uuid
+
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, permissions, exceptions, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from access.permissions import IsCustomer, IsShopMember
+from config.pagination import KeysetPagination
 from . import models, serializers
+from .catalog_io import FORMATS, detect_format, export_products, import_products, read_rows
+from .catalog_stats import shop_facets
+from .filters import filter_products, parse_filters
+from .search import search_products
+from shop.tenancy import get_current_shop_id
+
+# Same pattern as the <uuid:> path converter: anything else is a 404 from
+# the router, never a malformed pk reaching the query.
+RESERVATION_PATH = (
+    r'reservations/(?P<reservation_id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})'
+    r'/(?P<operation>commit|release)'
+)
+
 
 class ProductViewSets(viewsets.ModelViewSet):
     permission_classes=[permissions.AllowAny]
     serializer_class = serializers.ProductSerializer
     lookup_field = "id"
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    # Storefront checkout holds stock with a customer token.
+    customer_actions = ('reserve', 'close_reservation')
 
     def get_queryset(self):
-        shop_id = self.kwargs.get('shop_id')
-        if shop_id:
-            return models.Product.objects.filter(shop_id=shop_id)
+        # The shop comes from TenantMiddleware (URL id, storefront slug or
+        # X-Shop header); without one the catalog is platform-wide.
+        if get_current_shop_id():
+            return models.Product.tenant.all()
         return models.Product.objects.all()
 
+    def filter_queryset(self, queryset):
+        """
+        List filters (products/filters.py): ?category=&min_price=&max_price=
+        &available=&in_stock=&on_sale=&sort=newest|price|-price, shop URLs only.
+        """
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+        filters = parse_filters(self.request.query_params)
+        if filters is None:
+            return queryset
+        if not get_current_shop_id():
+            raise exceptions.ValidationError({"detail": "Filters are only available through a shop URL."})
+        queryset, _, self.keyset_ordering = filter_products(queryset, filters)
+        return queryset
+
+    def get_permissions(self):
+        # Catalog writes are for the shop's admins; reads stay public.
+        if self.action in self.customer_actions:
+            return [IsCustomer()]
+        if self.request.method not in permissions.SAFE_METHODS:
+            return [IsShopMember()]
+        return super().get_permissions()
+
     def check_permissions(self, request):
         """
-        Custom check: If no shop_id is in the URL, only allow safe methods (GET).
+        Custom check: If no shop is resolved, only allow safe methods (GET).
         """
         super().check_permissions(request)
         
-        shop_id = self.kwargs.get('shop_id')
+        shop_id = get_current_shop_id()
         
         # If accessing the root /product/ and trying to POST/PUT/DELETE
         if not shop_id and request.method not in permissions.SAFE_METHODS:
@@ -27,9 +77,123 @@ class ProductViewSets(viewsets.ModelViewSet):
             )
 
     def perform_create(self, serializer):
-        shop_id = self.kwargs.get('shop_id')
+        shop_id = get_current_shop_id()
         # This is extra insurance, though check_permissions should catch it
         if not shop_id:
             raise exceptions.ValidationError({"detail": "Shop ID is required to create a product."})
             
-        serializer.save(shop_id=shop_id)
\ No newline at end of file
+        serializer.save(shop_id=shop_id)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request, *args, **kwargs):
+        """
+        Ranked full-text search over name, category and description.
+        URL: GET /api/products/search/?q=<text>&shop=<shop_id>[&limit=20]
+        """
+        query = request.query_params.get('q', '').strip()
+        shop_id = get_current_shop_id() or request.query_params.get('shop')
+        if not query:
+            raise exceptions.ValidationError({"q": "A search query is required."})
+        try:
+            shop_id = uuid.UUID(str(shop_id))
+        except ValueError:
+            raise exceptions.ValidationError({"shop": "A valid shop id is required."})
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            raise exceptions.ValidationError({"limit": "Must be an integer."})
+
+        hits = search_products(query, shop_id, limit=limit)
+        products = models.Product.objects.in_bulk([product_id for product_id, _ in hits])
+        ranked = [products[product_id] for product_id, _ in hits if product_id in products]
+        return Response({
+            "query": query,
+            "count": len(ranked),
+            "results": self.get_serializer(ranked, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request, *args, **kwargs):
+        """
+        Category counts, in-stock counts and price ranges for storefront
+        sidebars, from ShopCatalogStats (one row per category).
+        URL: GET /api/products/shop/<shop_id>/facets/
+        """
+        shop_id = get_current_shop_id()
+        if not shop_id:
+            raise exceptions.ValidationError({"detail": "Facets are only available through a shop URL."})
+        return Response(shop_facets(shop_id))
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_catalog(self, request, *args, **kwargs):
+        """
+        Streams an uploaded CSV/JSONL file into the shop, upserting by sku.
+        URL: POST /api/products/shop/<shop_id>/import/  (multipart field "file")
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise exceptions.ValidationError({"file": "A CSV or JSONL file is required."})
+        fmt = request.query_params.get('type') or detect_format(upload.name)
+        if fmt not in FORMATS:
+            raise exceptions.ValidationError({"type": f"Must be one of {', '.join(FORMATS)}."})
+
+        report = import_products(get_current_shop_id(), read_rows(upload, fmt))
+        return Response(
+            report.as_dict(),
+            status=status.HTTP_200_OK if not report.failed else status.HTTP_207_MULTI_STATUS,
+        )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """
+        Streams the catalog without loading it into memory.
+        URL: GET /api/products/[shop/<shop_id>/]export/?type=csv|jsonl
+        """
+        fmt = request.query_params.get('type', 'csv')
+        if fmt not in FORMATS:
+            raise exceptions.ValidationError({"type": f"Must be one of {', '.join(FORMATS)}."})
+
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(export_products(self.get_queryset(), fmt), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="products.{fmt}"'
+        return response
+
+    @action(detail=False, methods=['post'])
+    def reserve(self, request, *args, **kwargs):
+        """
+        Holds stock for several products at once; all lines or none.
+        Customers of the shop only.
+        URL: POST /api/products/shop/<shop_id>/reserve/
+        Body: {"items": [{"product": <id>, "quantity": n}], "ttl": seconds, "reference": ""}
+        """
+        payload = serializers.ReservationRequestSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+        reservation, message = models.Product.objects.reserve(
+            [(item['product'], item['quantity']) for item in data['items']],
+            ttl=data.get('ttl'),
+            reference=data['reference'],
+            shop_id=get_current_shop_id(),
+            customer_id=request.user.id,
+        )
+        if reservation is None:
+            return Response({"detail": message}, status=status.HTTP_409_CONFLICT)
+        return Response(serializers.ReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path=RESERVATION_PATH)
+    def close_reservation(self, request, reservation_id=None, operation=None, *args, **kwargs):
+        """
+        Commits (order placed) or releases (cart abandoned) one of the
+        customer's reservations.
+        URL: POST /api/products/shop/<shop_id>/reservations/<id>/commit|release/
+        """
+        reservation = models.StockReservation.objects.filter(
+            pk=reservation_id, shop_id=get_current_shop_id(), customer_id=request.user.id,
+        ).first()
+        if reservation is None:
+            raise exceptions.NotFound("Reservation not found.")
+        manager = models.Product.objects
+        ok, message = manager.commit(reservation) if operation == 'commit' else manager.release(reservation)
+        if not ok:
+            return Response({"detail": message}, status=status.HTTP_409_CONFLICT)
+        return Response(serializers.ReservationSerializer(reservation).data)
@@ -1,8 +1,7 @@
 import uuid
-from django.db import models
-from details.models import Details
-from image.models import Image
-from social.models import Social 
+from django.db import models, transaction
+
+from shop.shop_manager import ShopManager
 
 
 class Shop(models.Model):
@@ -11,6 +10,8 @@ class Shop(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ShopManager()
+
     class Meta:
         db_table = 'shop'
         verbose_name = 'Shop'
@@ -18,11 +19,11 @@ class Shop(models.Model):
 
     def save(self, *args, **kwargs):
         is_new = self._state.adding
-        super().save(*args, **kwargs)
-        if is_new:
-            Image.objects.get_or_create(shop=self)
-            Social.objects.get_or_create(shop=self)
-            Details.objects.get_or_create(shop=self)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                # A new shop cannot have companions yet, so skip the lookups.
+                Shop.objects.provision_companions([self])
             
     def __str__(self):
         return str(self.id)
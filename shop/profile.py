@@ -0,0 +1,122 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU used in front of the shared cache."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_local = LRUCache(getattr(settings, 'SHOP_PROFILE_LRU_SIZE', 1024))
+
+
+def _backend():
+    return caches[getattr(settings, 'SHOP_PROFILE_CACHE', 'default')]
+
+
+def _version_key(shop_id):
+    return f"shop-profile:version:{shop_id}"
+
+
+def _profile_key(shop_id, version):
+    return f"shop-profile:{shop_id}:{version}"
+
+
+def get_version(shop_id):
+    """
+    Returns the current profile version of a shop.
+    Versions are random tokens rather than counters, so an evicted version key
+    can never bring back a stale profile.
+    """
+    cache = _backend()
+    key = _version_key(shop_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def build_shop_profile(shop_id):
+    """Assembles the profile from the database in a single joined query."""
+    from shop.models import Shop
+    from shop.serializer import ShopProfileSerializer
+
+    shop = (
+        Shop.objects
+        .select_related('details', 'image', 'socials')
+        .filter(pk=shop_id)
+        .first()
+    )
+    if shop is None:
+        return None
+    return dict(ShopProfileSerializer(shop).data)
+
+
+def get_shop_profile(shop_id):
+    """
+    Read-through lookup: in-process LRU, then the shared cache, then the DB.
+    Returns None for unknown shops.
+    """
+    try:
+        shop_id = str(uuid.UUID(str(shop_id)))
+    except ValueError:
+        return None
+    version = get_version(shop_id)
+
+    hit = _local.get(shop_id)
+    if hit is not None and hit['version'] == version:
+        return hit
+
+    cache = _backend()
+    profile = cache.get(_profile_key(shop_id, version))
+    if profile is None:
+        profile = build_shop_profile(shop_id)
+        if profile is None:
+            return None
+        profile['version'] = version
+        cache.set(_profile_key(shop_id, version), profile)
+
+    _local.set(shop_id, profile)
+    return profile
+
+
+def invalidate_shop_profile(shop_id):
+    """Moves the shop to a fresh version; old entries simply stop matching."""
+    shop_id = str(uuid.UUID(str(shop_id)))
+    _backend().set(_version_key(shop_id), uuid.uuid4().hex, None)
+    _local.delete(shop_id)
@@ -2,10 +2,10 @@ from django.db import transaction
 from rest_framework import serializers
 
 # Import your serializers
-# from details.serializer import DetailsSerializer
-# from image.serializer import ImagesSerializer
-# from social.serializers import SocialSerializer
-# from image.serializer import ImagesSerializer
+from details.models import Details
+from details.serializer import DetailsSerializer
+from image.serializer import ImagesSerializer
+from social.serializers import SocialSerializer
 # from admin.serializers import AdminSerializer
 from shop.models import Shop
 class ShopSerializer(serializers.ModelSerializer):
@@ -15,4 +15,53 @@ class ShopSerializer(serializers.ModelSerializer):
     # admin=AdminSerializer(required=True)
     class Meta:
         model = Shop
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+
+class ShopProfileSerializer(serializers.ModelSerializer):
+    """Read-only storefront header: the shop plus its one-to-one sections."""
+    details = DetailsSerializer(read_only=True)
+    image = ImagesSerializer(read_only=True)
+    socials = SocialSerializer(read_only=True)
+
+    class Meta:
+        model = Shop
+        fields = ['id', 'is_active', 'details', 'image', 'socials', 'updated_at']
+
+
+class DetailsSpecSerializer(DetailsSerializer):
+    class Meta(DetailsSerializer.Meta):
+        # Uniqueness is checked once for the whole batch, not per row.
+        extra_kwargs = {'url': {'validators': []}}
+
+
+class ShopSpecSerializer(serializers.Serializer):
+    is_active = serializers.BooleanField(required=False, default=True)
+    details = DetailsSpecSerializer(required=False)
+    socials = SocialSerializer(required=False)
+
+
+class ShopBulkProvisionSerializer(serializers.Serializer):
+    """Accepts either {"count": n} or {"shops": [spec, ...]}."""
+    MAX_SHOPS = 1000
+
+    count = serializers.IntegerField(required=False, min_value=1, max_value=MAX_SHOPS)
+    shops = ShopSpecSerializer(many=True, required=False, max_length=MAX_SHOPS)
+
+    def validate(self, data):
+        if ('count' in data) == ('shops' in data):
+            raise serializers.ValidationError("Provide exactly one of 'count' or 'shops'.")
+
+        # Details.url is unique: catch clashes before the batch insert fails.
+        urls = [spec['details']['url'] for spec in data.get('shops', [])
+                if spec.get('details', {}).get('url')]
+        if len(urls) != len(set(urls)):
+            raise serializers.ValidationError("Duplicate shop urls in request.")
+        taken = list(Details.objects.filter(url__in=urls).values_list('url', flat=True))
+        if taken:
+            raise serializers.ValidationError({"url": f"Already in use: {', '.join(taken)}"})
+        return data
+
+    def create(self, validated_data):
+        specs = validated_data.get('shops') or validated_data['count']
+        return Shop.objects.bulk_provision(specs)
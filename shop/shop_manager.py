@@ -0,0 +1,60 @@
+from django.db import models, transaction
+
+from details.models import Details
+from image.models import Image
+from shop.profile import invalidate_shop_profile
+from shop.slugs import slug_resolver
+from social.models import Social
+
+
+class ShopManager(models.Manager):
+
+    # ==========================================
+    # 1. PROVISIONING
+    # ==========================================
+
+    def provision_companions(self, shops, specs=None, batch_size=500):
+        """
+        Creates the one-to-one Image, Social and Details rows for freshly
+        inserted shops with one INSERT per table (no get_or_create probes).
+        """
+        specs = specs or [{} for _ in shops]
+        Image.objects.bulk_create(
+            [Image(shop=shop) for shop in shops],
+            batch_size=batch_size,
+        )
+        Social.objects.bulk_create(
+            [Social(shop=shop, **spec.get('socials', {})) for shop, spec in zip(shops, specs)],
+            batch_size=batch_size,
+        )
+        Details.objects.bulk_create(
+            [Details(shop=shop, **spec.get('details', {})) for shop, spec in zip(shops, specs)],
+            batch_size=batch_size,
+        )
+
+    def bulk_provision(self, specs, batch_size=500):
+        """
+        Creates many shops with their companion rows in one transaction.
+        `specs` is either a count or an iterable of dicts shaped like
+        {"is_active": bool, "details": {...}, "socials": {...}}.
+        Raises IntegrityError when a url was taken concurrently.
+        """
+        if isinstance(specs, int):
+            specs = [{} for _ in range(specs)]
+        specs = list(specs)
+        shops = [self.model(is_active=spec.get('is_active', True)) for spec in specs]
+
+        with transaction.atomic(using=self.db):
+            self.bulk_create(shops, batch_size=batch_size)
+            self.provision_companions(shops, specs, batch_size=batch_size)
+            # bulk_create skips the signals that keep these caches current;
+            # a new url may still be cached as unknown.
+            urls = {shop.pk: spec.get('details', {}).get('url') for shop, spec in zip(shops, specs)}
+            transaction.on_commit(lambda: self._invalidate_caches(urls), using=self.db)
+        return shops
+
+    @staticmethod
+    def _invalidate_caches(urls):
+        for shop_id, url in urls.items():
+            invalidate_shop_profile(shop_id)
+            slug_resolver.invalidate(shop_id, url)
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from details.models import Details
+from image.models import Image
+from shop.models import Shop
+from shop.profile import invalidate_shop_profile
+from shop.slugs import slug_resolver
+from social.models import Social
+
+
+# ==========================================
+# SHOP PROFILE INVALIDATION
+# ==========================================
+# Versions move once the change is committed: moved any earlier, a
+# concurrent reader could take the new version, still read the old rows
+# and cache them under it for the full profile TTL.
+
+def _invalidate_profile_on_commit(shop_id):
+    transaction.on_commit(lambda: invalidate_shop_profile(shop_id))
+
+
+@receiver([post_save, post_delete], sender=Shop)
+def invalidate_profile_on_shop_change(sender, instance, **kwargs):
+    _invalidate_profile_on_commit(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Details)
+@receiver([post_save, post_delete], sender=Image)
+@receiver([post_save, post_delete], sender=Social)
+def invalidate_profile_on_section_change(sender, instance, **kwargs):
+    _invalidate_profile_on_commit(instance.shop_id)
+
+
+# ==========================================
+# STOREFRONT SLUG INVALIDATION
+# ==========================================
+
+@receiver([post_save, post_delete], sender=Details)
+def invalidate_slug_on_details_change(sender, instance, **kwargs):
+    # After commit for the same reason as the profile: dropped any earlier,
+    # a concurrent resolve could re-cache the old mapping for SHOP_SLUG_TTL.
+    shop_id, slugs = instance.shop_id, (instance.url, getattr(instance, '_saved_url', None))
+    transaction.on_commit(lambda: slug_resolver.invalidate(shop_id, *slugs))
+    instance._saved_url = instance.url
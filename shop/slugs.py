@@ -0,0 +1,125 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from shop.profile import LRUCache
+
+_MISSING = object()
+
+
+class SlugResolver:
+    """
+    In-process map between storefront slugs (Details.url) and shop ids,
+    in both directions, so slug routes and product URLs cost no query once
+    warm. Unknown slugs are cached too, for a shorter time, so probing bad
+    URLs does not reach the database either.
+
+    Changes made in this process are applied by the Details signals once
+    they commit; the TTLs bound how long other processes may serve an old
+    mapping. Writes that skip the signals (bulk_create, queryset update())
+    must call `invalidate` themselves, or a new slug keeps resolving to
+    nothing for SHOP_SLUG_NEGATIVE_TTL.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300, negative_ttl=30):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._cache = LRUCache(maxsize)
+
+    def _get(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            self._cache.delete(key)
+            return _MISSING
+        return value
+
+    def _put(self, shop_id, slug):
+        now = time.monotonic()
+        if shop_id is not None:
+            self._cache.set(('shop', shop_id), (slug, now + self.ttl))
+        if slug:
+            ttl = self.ttl if shop_id is not None else self.negative_ttl
+            self._cache.set(('slug', slug), (shop_id, now + ttl))
+
+    def resolve(self, slug):
+        """Slug -> shop id (UUID), or None when no shop uses it."""
+        from details.models import Details
+
+        shop_id = self._get(('slug', slug))
+        if shop_id is _MISSING:
+            shop_id = Details.objects.filter(url=slug).values_list('shop_id', flat=True).first()
+            self._put(shop_id, slug)
+        return shop_id
+
+    def slugs_for(self, shop_ids):
+        """{shop id: slug or None}, loading every miss in one query."""
+        from details.models import Details
+
+        found, missing = {}, set()
+        for shop_id in {uuid.UUID(str(shop_id)) for shop_id in shop_ids if shop_id}:
+            slug = self._get(('shop', shop_id))
+            if slug is _MISSING:
+                missing.add(shop_id)
+            else:
+                found[shop_id] = slug
+        if missing:
+            loaded = dict(Details.objects.filter(shop_id__in=missing).values_list('shop_id', 'url'))
+            for shop_id in missing:
+                found[shop_id] = loaded.get(shop_id)
+                self._put(shop_id, found[shop_id])
+        return found
+
+    def slug_for(self, shop_id):
+        if not shop_id:
+            return None
+        return self.slugs_for([shop_id]).get(uuid.UUID(str(shop_id)))
+
+    def warm(self, limit=None):
+        """Preloads the most recently updated storefronts. Returns how many."""
+        from details.models import Details
+
+        limit = limit if limit is not None else self._cache.maxsize // 2
+        rows = (
+            Details.objects.exclude(url__isnull=True).exclude(url='')
+            .order_by('-updated_at').values_list('shop_id', 'url')[:limit]
+        )
+        count = 0
+        for shop_id, slug in rows:
+            self._put(shop_id, slug)
+            count += 1
+        return count
+
+    def invalidate(self, shop_id, *slugs):
+        """
+        Forgets a shop's mapping. `slugs` are its old and new urls: the old
+        one must stop resolving and the new one may be cached as unknown.
+        """
+        shop_id = uuid.UUID(str(shop_id))
+        cached = self._cache.get(('shop', shop_id))
+        self._cache.delete(('shop', shop_id))
+        for slug in {*slugs, cached[0] if cached else None}:
+            if slug:
+                self._cache.delete(('slug', slug))
+
+    def clear(self):
+        self._cache.clear()
+
+
+slug_resolver = SlugResolver(
+    maxsize=getattr(settings, 'SHOP_SLUG_LRU_SIZE', 4096),
+    ttl=getattr(settings, 'SHOP_SLUG_TTL', 300),
+    negative_ttl=getattr(settings, 'SHOP_SLUG_NEGATIVE_TTL', 30),
+)
+
+
+def warm_slug_cache():
+    """Startup warm-up; a database that is not migrated yet is not an error."""
+    try:
+        return slug_resolver.warm(getattr(settings, 'SHOP_SLUG_WARM', None))
+    except DatabaseError:
+        return 0
@@ -0,0 +1,132 @@
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import models
+from django.http import JsonResponse
+
+_current_shop = ContextVar('current_shop_id', default=None)
+
+
+def get_current_shop_id():
+    """The shop the current request (or tenant_context block) acts for."""
+    return _current_shop.get()
+
+
+@contextmanager
+def tenant_context(shop_id):
+    """Scopes tenant managers to `shop_id` for the duration of the block."""
+    token = _current_shop.set(uuid.UUID(str(shop_id)) if shop_id else None)
+    try:
+        yield
+    finally:
+        _current_shop.reset(token)
+
+
+# ==========================================
+# 1. SCOPED MANAGERS
+# ==========================================
+
+class TenantQuerySet(models.QuerySet):
+
+    def for_shop(self, shop_id=None):
+        """Rows of `shop_id`, or of the current tenant when omitted."""
+        shop_id = shop_id or get_current_shop_id()
+        if shop_id is None:
+            return self.none()
+        return self.filter(shop_id=shop_id)
+
+
+class TenantManager(models.Manager.from_queryset(TenantQuerySet)):
+    """
+    Filters every query by the current tenant, so `(shop_id, ...)` index
+    prefixes are always usable and another shop's rows are unreachable.
+
+    With `strict` (the default) there are no rows at all outside a tenant
+    context. Non-strict managers fall back to the whole table there, which
+    suits default managers also used by background jobs.
+    """
+    strict = True
+
+    def __init__(self, strict=None):
+        super().__init__()
+        if strict is not None:
+            self.strict = strict
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        shop_id = get_current_shop_id()
+        if shop_id is not None:
+            return queryset.filter(shop_id=shop_id)
+        return queryset.none() if self.strict else queryset
+
+    def unscoped(self):
+        """Escape hatch for platform-wide jobs."""
+        return super().get_queryset()
+
+
+# ==========================================
+# 2. REQUEST RESOLUTION
+# ==========================================
+
+def resolve_shop_slug(slug):
+    """Details.url -> shop id, through the in-process resolver (shop/slugs.py)."""
+    from shop.slugs import slug_resolver
+
+    return slug_resolver.resolve(slug)
+
+
+def _parse_shop_id(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+class TenantMiddleware:
+    """
+    Resolves the shop once per request and makes it the current tenant.
+    Sources, first match wins: a `shop_id` URL kwarg, a `shop_slug` URL
+    kwarg (Details.url), then the TENANT_HEADER header (id or slug).
+    The id is also exposed as `request.shop_id`.
+    """
+
+    def __init__(self, get_response):
+        from shop.slugs import warm_slug_cache
+
+        self.get_response = get_response
+        self.header = getattr(settings, 'TENANT_HEADER', 'X-Shop')
+        # Middleware is built once per worker: the first storefront requests
+        # then resolve without a query.
+        warm_slug_cache()
+
+    def __call__(self, request):
+        request.shop_id = None
+        request._tenant_token = None
+        try:
+            return self.get_response(request)
+        finally:
+            if request._tenant_token is not None:
+                _current_shop.reset(request._tenant_token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if 'shop_id' in view_kwargs:
+            shop_id = _parse_shop_id(view_kwargs['shop_id'])
+            # Malformed ids fall through to the view, which 404s as before.
+            if shop_id is None:
+                return None
+        elif 'shop_slug' in view_kwargs:
+            shop_id = resolve_shop_slug(view_kwargs['shop_slug'])
+            if shop_id is None:
+                return JsonResponse({"error": "Shop not found."}, status=404)
+        elif request.headers.get(self.header):
+            value = request.headers[self.header]
+            shop_id = _parse_shop_id(value) or resolve_shop_slug(value)
+            if shop_id is None:
+                return JsonResponse({"error": "Shop not found."}, status=404)
+        else:
+            return None
+        request.shop_id = shop_id
+        request._tenant_token = _current_shop.set(shop_id)
+        return None
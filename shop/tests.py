@@ -1,3 +1,165 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from details.models import Details
+from products.models import Product
+from shop.models import Shop
+from shop.profile import _local, get_shop_profile
+from shop.slugs import slug_resolver
+from shop.tenancy import get_current_shop_id, tenant_context
+
+
+class TenantIsolationTests(TestCase):
+    """Tenant managers and TenantMiddleware never let one shop see another's rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop, cls.other_shop = Shop.objects.create(), Shop.objects.create()
+        cls.product = Product.objects.create(shop=cls.shop, name='mug', price=Decimal('4'))
+        cls.other_product = Product.objects.create(shop=cls.other_shop, name='pan', price=Decimal('9'))
+        Details.objects.filter(shop=cls.shop).update(url='shop-a')
+        Details.objects.filter(shop=cls.other_shop).update(url='shop-b')
+        cls.staff = get_user_model().objects.create_user('staff', is_staff=True)
+
+    def setUp(self):
+        # update() skips the Details signals.
+        slug_resolver.invalidate(self.shop.pk, 'shop-a')
+        slug_resolver.invalidate(self.other_shop.pk, 'shop-b')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_strict_managers_return_nothing_outside_a_tenant_context(self):
+        self.assertIsNone(get_current_shop_id())
+        self.assertFalse(Product.tenant.exists())
+        self.assertFalse(Details.tenant.exists())
+        self.assertFalse(Product.tenant.filter(pk=self.product.pk).exists())
+        self.assertEqual(Product.tenant.unscoped().count(), 2)
+
+        with tenant_context(self.shop.pk):
+            self.assertEqual(list(Product.tenant.all()), [self.product])
+            self.assertFalse(Product.tenant.filter(pk=self.other_product.pk).exists())
+            self.assertEqual(Details.tenant.get().shop_id, self.shop.pk)
+        self.assertIsNone(get_current_shop_id())
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_requests_for_one_shop_never_return_another_shops_rows(self):
+        own = [str(self.product.pk)]
+        self.assertEqual(self.ids(self.client.get(f'/api/products/shop/{self.shop.pk}/')), own)
+        self.assertEqual(self.ids(self.client.get('/api/products/store/shop-a/')), own)
+        self.assertEqual(self.ids(self.client.get('/api/products/', HTTP_X_SHOP=str(self.shop.pk))), own)
+        self.assertEqual(self.ids(self.client.get('/api/products/', HTTP_X_SHOP='shop-a')), own)
+
+        response = self.client.get(f'/api/products/shop/{self.shop.pk}/{self.other_product.pk}/')
+        self.assertEqual(response.status_code, 404)
+        # The URL's shop wins over a header naming another one.
+        response = self.client.get(f'/api/products/shop/{self.shop.pk}/', HTTP_X_SHOP=str(self.other_shop.pk))
+        self.assertEqual(self.ids(response), own)
+        self.assertEqual(self.client.get('/api/products/', HTTP_X_SHOP='no-such-shop').status_code, 404)
+        self.assertIsNone(get_current_shop_id())
+
+    def test_details_are_read_for_the_shop_of_the_url_only(self):
+        response = self.client.get(f'/api/details/{self.shop.pk}/', HTTP_X_SHOP=str(self.other_shop.pk))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['url'], 'shop-a')
+        response = self.client.get('/api/details/', HTTP_X_SHOP='shop-b')
+        self.assertEqual([row['url'] for row in response.json()], ['shop-b'])
+
+
+class SlugResolverTests(TestCase):
+    """Storefront slugs are cached both ways, misses included, and follow every change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        cls.product = Product.objects.create(shop=cls.shop, name='Blue Mug', price=Decimal('4'))
+
+    def setUp(self):
+        slug_resolver.clear()
+
+    def set_url(self, url):
+        details = Details.objects.get(shop=self.shop)
+        details.url = url
+        with self.captureOnCommitCallbacks(execute=True):
+            details.save()
+
+    def test_unknown_slugs_are_cached_until_a_shop_takes_them(self):
+        self.assertIsNone(slug_resolver.resolve('new-shop'))
+        with self.assertNumQueries(0):
+            self.assertIsNone(slug_resolver.resolve('new-shop'))
+        self.assertEqual(self.product.get_product_url(), '#')
+
+        self.set_url('new-shop')
+        self.assertEqual(slug_resolver.resolve('new-shop'), self.shop.pk)
+        self.assertEqual(self.product.get_product_url(), '/new-shop/products/blue-mug/')
+        with self.assertNumQueries(0):
+            self.product.get_product_url()
+
+    def test_a_renamed_slug_moves_at_once(self):
+        self.set_url('old-name')
+        self.assertEqual(self.product.get_product_url(), '/old-name/products/blue-mug/')
+        self.assertEqual(slug_resolver.resolve('old-name'), self.shop.pk)
+
+        self.set_url('new-name')
+        self.assertEqual(self.product.get_product_url(), '/new-name/products/blue-mug/')
+        self.assertIsNone(slug_resolver.resolve('old-name'))
+        self.assertEqual(slug_resolver.resolve('new-name'), self.shop.pk)
+
+    def test_a_provisioned_shop_claims_a_slug_cached_as_unknown(self):
+        self.assertIsNone(slug_resolver.resolve('fresh'))
+        with self.captureOnCommitCallbacks(execute=True):
+            shop, = Shop.objects.bulk_provision([{'details': {'url': 'fresh'}}])
+        product = Product.objects.create(shop=shop, name='Pan', price=Decimal('9'))
+        self.assertEqual(slug_resolver.resolve('fresh'), shop.pk)
+        self.assertEqual(product.get_product_url(), '/fresh/products/pan/')
+
+
+class ShopProfileCacheTests(TestCase):
+    """Profiles are served from cache and move to a new version only once a write commits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shop = Shop.objects.create()
+        Details.objects.filter(shop=cls.shop).update(title='Old title')
+
+    def setUp(self):
+        caches[settings.SHOP_PROFILE_CACHE].clear()
+        _local.clear()
+        self.assertEqual(self.title(), 'Old title')
+
+    def title(self):
+        return get_shop_profile(self.shop.pk)['details']['title']
+
+    def rename(self, title):
+        details = Details.objects.get(shop=self.shop)
+        details.title = title
+        details.save()
+
+    def test_a_committed_write_drops_the_cached_profile(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.title(), 'Old title')
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.rename('New title')
+            # Not committed yet: readers keep the old version.
+            self.assertEqual(self.title(), 'Old title')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.title(), 'New title')
 
-# Create your tests here.
+    def test_a_rolled_back_write_leaves_the_cache_alone(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.rename('Never committed')
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.title(), 'Old title')
@@ -1,7 +1,10 @@
-from rest_framework import viewsets, permissions
+from django.db import IntegrityError
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Shop
-from .serializer import ShopSerializer
+from .profile import get_shop_profile
+from .serializer import ShopBulkProvisionSerializer, ShopSerializer
 # from admin.models import Admin 
 
 class ShopViewSet(viewsets.ModelViewSet):
@@ -9,6 +12,35 @@ class ShopViewSet(viewsets.ModelViewSet):
     queryset = Shop.objects.all()
     serializer_class = ShopSerializer
     lookup_field = 'id'
+
+    @action(detail=True, methods=['get'])
+    def profile(self, request, id=None):
+        """
+        Storefront header (shop + details + image + socials) in one call.
+        URL: GET /api/shop/<id>/profile/
+        """
+        profile = get_shop_profile(id)
+        if profile is None:
+            return Response({"error": "Shop not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(profile)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Batch onboarding: creates shops and their companion rows in one transaction.
+        URL: POST /api/shop/bulk/
+        """
+        serializer = ShopBulkProvisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            shops = serializer.save()
+        except IntegrityError:
+            # A url passed the batch check but was taken before the insert.
+            return Response({"error": "One of the shop urls is already in use."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "created": len(shops),
+            "ids": [shop.id for shop in shops],
+        }, status=status.HTTP_201_CREATED)
     
     # def create(self, request, *args, **kwargs):
     #     # 1. Get the admin who is creating this shop
@@ -1,6 +1,8 @@
 import uuid
 from django.db import models
 
+from shop.tenancy import TenantManager
+
 # Create your models here.
 class Social(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -13,6 +15,10 @@ class Social(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     email = models.URLField(blank=True, null=True)
     phone=models.IntegerField(blank=True, null=True)
+
+    objects = models.Manager()
+    tenant = TenantManager()
+
     class Meta:
         db_table = 'shop_socials'
         verbose_name = 'Shop Social'
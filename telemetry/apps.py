@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class TelemetryConfig(AppConfig):
+    name = 'telemetry'
+
+    def ready(self):
+        from django.conf import settings
+
+        if getattr(settings, 'TELEMETRY_ENABLED', False):
+            from telemetry.recorder import instrument_serializers
+            instrument_serializers()
@@ -0,0 +1,231 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import close_old_connections
+
+from telemetry.recorder import percentile
+
+BENCH_PASSWORD = 'bench-password'
+# Customers per shop that get a token for the checkout scenario.
+CHECKOUT_CUSTOMERS = 20
+
+SCENARIOS = {}
+
+
+def scenario(name, default=True):
+    """
+    Registers a benchmark. The function receives (client, dataset, rng) and
+    issues one request; it returns the response. Scenarios that write are
+    kept out of the default set: on SQLite concurrent writers fail with
+    "table is locked", so run them with --clients 1 there.
+    """
+    def register(fn):
+        fn.bench_name, fn.default = name, default
+        SCENARIOS[name] = fn
+        return fn
+    return register
+
+
+# ==========================================
+# 1. SYNTHETIC DATA
+# ==========================================
+
+def seed(shops=5, products=200, customers=200, rng=None):
+    """
+    Creates `shops` storefronts with `products` products and `customers`
+    customers each, through the bulk paths. Returns the ids the scenarios
+    need, so they never have to query for fixtures while being timed.
+    """
+    from django.contrib.auth import get_user_model
+    from access.tokens import issue_token
+    from customers.hashing import make_customer_password
+    from customers.models import Customer
+    from details.models import Details
+    from products.catalog_stats import refresh_shop
+    from products.models import Product
+    from shop.models import Shop
+    from shop.profile import invalidate_shop_profile
+    from shop.slugs import slug_resolver
+
+    rng = rng or random.Random(0)
+    words = ['linen', 'shirt', 'clay', 'mug', 'oak', 'table', 'wool', 'scarf', 'brass', 'lamp', 'silk', 'tie']
+    dataset = {'shops': []}
+    for index in range(shops):
+        shop = Shop.objects.create()
+        slug = f'bench-shop-{index}'
+        Details.objects.filter(shop=shop).update(url=slug, title=f'Bench shop {index}')
+        # update() skips the Details signals.
+        slug_resolver.invalidate(shop.id, slug)
+        invalidate_shop_profile(shop.id)
+        rows = []
+        for number in range(products):
+            name = f"{rng.choice(words)} {rng.choice(words)} {number}"
+            rows.append(Product(
+                shop=shop, name=name, slug=f'{index}-{number}', sku=f'BENCH-{index}-{number}',
+                category=rng.choice(['Home', 'Apparel', 'Kitchen']),
+                description=' '.join(rng.choice(words) for _ in range(12)),
+                price=Decimal(rng.randint(100, 10000)) / 100, stock=10 ** 6,
+            ))
+        Product.objects.bulk_create(rows, batch_size=1000)
+        refresh_shop(shop.id)  # bulk_create skips the facet counters
+        # One hash per shop: bulk_register keeps already-encoded passwords.
+        encoded = make_customer_password(BENCH_PASSWORD, shop.id)
+        created, _ = Customer.objects.bulk_register(shop.id, [
+            {'email': f'bench{number}@shop{index}.example.com', 'password': encoded}
+            for number in range(customers)
+        ])
+        dataset['shops'].append({
+            'id': str(shop.id),
+            'slug': slug,
+            'products': [str(product.id) for product in rows],
+            'customers': [(customer.identifier, customer.email) for customer in created],
+            'tokens': [issue_token(customer)[0] for customer in created[:CHECKOUT_CUSTOMERS]],
+            'terms': words,
+        })
+    dataset['user'] = get_user_model().objects.create_user('bench', password=None, is_staff=True)
+    return dataset
+
+
+# ==========================================
+# 2. SCENARIOS
+# ==========================================
+
+@scenario('product-list')
+def product_list(client, dataset, rng):
+    shop = rng.choice(dataset['shops'])
+    return client.get(f"/api/products/shop/{shop['id']}/")
+
+
+@scenario('product-list-by-slug')
+def product_list_by_slug(client, dataset, rng):
+    shop = rng.choice(dataset['shops'])
+    return client.get(f"/api/products/store/{shop['slug']}/")
+
+
+@scenario('product-detail')
+def product_detail(client, dataset, rng):
+    shop = rng.choice(dataset['shops'])
+    return client.get(f"/api/products/shop/{shop['id']}/{rng.choice(shop['products'])}/")
+
+
+@scenario('product-search')
+def product_search(client, dataset, rng):
+    shop = rng.choice(dataset['shops'])
+    return client.get(f"/api/products/shop/{shop['id']}/search/", {'q': rng.choice(shop['terms'])})
+
+
+@scenario('shop-profile')
+def shop_profile(client, dataset, rng):
+    shop = rng.choice(dataset['shops'])
+    return client.get(f"/api/shop/{shop['id']}/profile/")
+
+
+@scenario('product-facets')
+def product_facets(client, dataset, rng):
+    shop = rng.choice(dataset['shops'])
+    return client.get(f"/api/products/shop/{shop['id']}/facets/")
+
+
+@scenario('customer-login')
+def customer_login(client, dataset, rng):
+    shop = rng.choice(dataset['shops'])
+    _, email = rng.choice(shop['customers'])
+    return client.post('/api/customers/login/', {
+        'shop_id': shop['id'], 'credential': email, 'password': BENCH_PASSWORD,
+    }, format='json')
+
+
+@scenario('checkout', default=False)
+def checkout(client, dataset, rng):
+    shop = rng.choice(dataset['shops'])
+    # Checkout is for the customer of the token, not the staff bench user.
+    client.force_authenticate(None)
+    return client.post('/api/orders/checkout/', {
+        'items': [{'product': product, 'quantity': 1} for product in rng.sample(shop['products'], 3)],
+    }, format='json', HTTP_AUTHORIZATION=f"Bearer {rng.choice(shop['tokens'])}")
+
+
+# ==========================================
+# 3. DRIVER
+# ==========================================
+
+def run(names, dataset, clients=4, requests=200, warmup=10, seed_value=0):
+    """
+    Drives each scenario through the real URL routes with `clients`
+    concurrent in-process API clients, `requests` requests in total.
+    Returns {scenario: {requests, errors, rps, p50_ms, p95_ms, p99_ms}}.
+    """
+    from rest_framework.test import APIClient
+
+    results = {}
+    for name in names:
+        fn = SCENARIOS[name]
+        per_client = max(1, requests // clients)
+        barrier = threading.Barrier(clients)
+
+        def worker(number):
+            rng = random.Random(f'{seed_value}:{name}:{number}')
+            # Server errors are counted, not raised, like a real client sees them.
+            client = APIClient(raise_request_exception=False)
+            client.force_authenticate(dataset['user'])
+            try:
+                for _ in range(warmup):
+                    fn(client, dataset, rng)
+                barrier.wait()
+                samples, errors, began = [], 0, time.perf_counter()
+                for _ in range(per_client):
+                    started = time.perf_counter()
+                    response = fn(client, dataset, rng)
+                    samples.append(time.perf_counter() - started)
+                    errors += response.status_code >= 400
+                return samples, errors, began, time.perf_counter()
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(clients, thread_name_prefix=f'bench-{name}') as pool:
+            outcomes = list(pool.map(worker, range(clients)))
+        samples = [sample for outcome in outcomes for sample in outcome[0]]
+        # Throughput over the timed phase only, from the barrier to the last client.
+        wall = max(outcome[3] for outcome in outcomes) - min(outcome[2] for outcome in outcomes)
+        results[name] = {
+            'requests': len(samples),
+            'errors': sum(outcome[1] for outcome in outcomes),
+            'rps': round(len(samples) / wall, 1) if wall else 0.0,
+            'p50_ms': round(percentile(samples, 50) * 1000, 3),
+            'p95_ms': round(percentile(samples, 95) * 1000, 3),
+            'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        }
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Regressions against a stored baseline: p95 more than `tolerance` slower
+    or throughput more than `tolerance` lower. Returns [(scenario, message)].
+    """
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append((name, f"p95 {before['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms"))
+        if current['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append((name, f"throughput {before['rps']:.1f} -> {current['rps']:.1f} req/s"))
+        if current['errors'] > before.get('errors', 0):
+            regressions.append((name, f"errors {before.get('errors', 0)} -> {current['errors']}"))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)['results']
+
+
+def save_baseline(path, results, meta):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({'meta': meta, 'results': results}, fh, indent=2, sort_keys=True)
@@ -0,0 +1,95 @@
+import logging
+import os
+import platform
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from telemetry import bench
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the REST API in-process: seeds synthetic shops, products and "
+        "customers into a throwaway test database, drives the real URL routes with "
+        "concurrent clients and reports throughput and p50/p95/p99 per scenario. "
+        "With --baseline, fails when a scenario regressed beyond --tolerance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shops', type=int, default=5)
+        parser.add_argument('--products', type=int, default=200, help="Products per shop.")
+        parser.add_argument('--customers', type=int, default=200, help="Customers per shop.")
+        parser.add_argument('--clients', type=int, default=4, help="Concurrent in-process clients.")
+        parser.add_argument('--requests', type=int, default=200, help="Timed requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=10, help="Untimed requests per client.")
+        parser.add_argument(
+            '--scenario', action='append', choices=sorted(bench.SCENARIOS),
+            help="Run only these (repeatable). Default: every read-mostly scenario.",
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--baseline', help="Compare against this JSON file.")
+        parser.add_argument('--save-baseline', help="Write the results to this JSON file.")
+        parser.add_argument('--tolerance', type=float, default=0.2)
+        parser.add_argument('--telemetry', action='store_true', help="Keep the profiling middleware on.")
+
+    def handle(self, *args, **options):
+        names = options['scenario'] or [name for name, fn in bench.SCENARIOS.items() if fn.default]
+        baseline = bench.load_baseline(options['baseline']) if options['baseline'] else None
+
+        # Failed requests are counted per scenario; their tracebacks are noise here.
+        request_logger = logging.getLogger('django.request')
+        previous_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(TELEMETRY_ENABLED=options['telemetry'], ORDER_SPENDING_MODE='worker'):
+                self.stdout.write(
+                    f"seeding {options['shops']} shops x {options['products']} products, "
+                    f"{options['customers']} customers ..."
+                )
+                dataset = bench.seed(
+                    options['shops'], options['products'], options['customers'],
+                    rng=random.Random(options['seed']),
+                )
+                results = bench.run(
+                    names, dataset, clients=options['clients'], requests=options['requests'],
+                    warmup=options['warmup'], seed_value=options['seed'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            request_logger.setLevel(previous_level)
+
+        self.report(results)
+        if options['save_baseline']:
+            bench.save_baseline(options['save_baseline'], results, {
+                'at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'cores': os.cpu_count(),
+                'options': {key: options[key] for key in (
+                    'shops', 'products', 'customers', 'clients', 'requests', 'warmup', 'seed',
+                )},
+            })
+            self.stdout.write(f"baseline written to {options['save_baseline']}")
+        if baseline is not None:
+            regressions = bench.compare(results, baseline, options['tolerance'])
+            for name, message in regressions:
+                self.stdout.write(self.style.ERROR(f"REGRESSION {name}: {message}"))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['baseline']}")
+            self.stdout.write(self.style.SUCCESS("no regressions against baseline"))
+
+    def report(self, results):
+        header = f"{'scenario':<22}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<22}{row['requests']:>9}{row['errors']:>8}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+            )
@@ -0,0 +1,110 @@
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+from config.database import sqlite_profile
+from telemetry.recorder import percentile
+
+ALIAS = 'contention_bench'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures concurrent write throughput on SQLite with Django's stock "
+        "settings and with the tuned profile (config/database.py). Each writer "
+        "runs OTP-save-like transactions: read a row, then insert or update it. "
+        "Uses throwaway database files; db.sqlite3 is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--transactions', type=int, default=200, help="Per writer.")
+        parser.add_argument('--keys', type=int, default=500, help="Distinct rows written.")
+        parser.add_argument('--profile', action='append', choices=['sqlite-stock', 'sqlite'])
+
+    def handle(self, *args, **options):
+        workdir = Path(tempfile.mkdtemp(prefix='bench-db-'))
+        try:
+            rows = []
+            for profile in options['profile'] or ['sqlite-stock', 'sqlite']:
+                rows.append((profile, self.run(profile, workdir / f'{profile}.sqlite3', options)))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        header = f"{'profile':<14}{'committed':>10}{'locked':>8}{'tx/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for profile, result in rows:
+            self.stdout.write(
+                f"{profile:<14}{result['committed']:>10}{result['locked']:>8}{result['tps']:>9.1f}"
+                f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+            )
+
+    def run(self, profile, path, options):
+        database = sqlite_profile(path.parent, tuned=profile == 'sqlite')
+        database['NAME'] = str(path)
+        connections.settings[ALIAS] = connections.configure_settings({'default': database})['default']
+        try:
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute(
+                    "CREATE TABLE otp (key TEXT PRIMARY KEY, code TEXT NOT NULL, attempts INTEGER NOT NULL)"
+                )
+            connections[ALIAS].close()
+            return self.drive(options)
+        finally:
+            # Drop this thread's wrapper too, or the next profile reuses it.
+            del connections[ALIAS]
+            del connections.settings[ALIAS]
+
+    def drive(self, options):
+        barrier = threading.Barrier(options['writers'])
+
+        def writer(number):
+            rng = random.Random(number)
+            samples, locked = [], 0
+            barrier.wait()
+            began = time.perf_counter()
+            try:
+                for _ in range(options['transactions']):
+                    key = f"shop:{rng.randrange(options['keys'])}"
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic(using=ALIAS), connections[ALIAS].cursor() as cursor:
+                            cursor.execute("SELECT attempts FROM otp WHERE key = %s", [key])
+                            if cursor.fetchone() is None:
+                                cursor.execute(
+                                    "INSERT INTO otp (key, code, attempts) VALUES (%s, %s, 0)",
+                                    [key, f"{rng.randrange(10 ** 6):06d}"],
+                                )
+                            else:
+                                cursor.execute(
+                                    "UPDATE otp SET code = %s, attempts = attempts + 1 WHERE key = %s",
+                                    [f"{rng.randrange(10 ** 6):06d}", key],
+                                )
+                    except OperationalError:
+                        locked += 1
+                        continue
+                    samples.append(time.perf_counter() - started)
+                return samples, locked, began, time.perf_counter()
+            finally:
+                connections[ALIAS].close()
+
+        with ThreadPoolExecutor(options['writers']) as pool:
+            outcomes = list(pool.map(writer, range(options['writers'])))
+        samples = [sample for outcome in outcomes for sample in outcome[0]]
+        wall = max(outcome[3] for outcome in outcomes) - min(outcome[2] for outcome in outcomes)
+        return {
+            'committed': len(samples),
+            'locked': sum(outcome[1] for outcome in outcomes),
+            'tps': len(samples) / wall if wall else 0.0,
+            'p50_ms': percentile(samples, 50) * 1000 if samples else 0.0,
+            'p95_ms': percentile(samples, 95) * 1000 if samples else 0.0,
+            'p99_ms': percentile(samples, 99) * 1000 if samples else 0.0,
+        }
@@ -0,0 +1,69 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+from telemetry.recorder import current_probe, record_request, start_probe, stop_probe
+
+
+class ProfilingMiddleware:
+    """
+    Records, per request, the resolved route, query count, DB time,
+    serializer and render time and response size, then hands the record to
+    the ring buffer, the JSONL sink and the budget check (telemetry/recorder.py).
+    Place it first in MIDDLEWARE so the timings cover the whole stack.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'TELEMETRY_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.ignored = tuple(getattr(settings, 'TELEMETRY_IGNORE_PATHS', ()))
+
+    def __call__(self, request):
+        if request.path.startswith(self.ignored):
+            return self.get_response(request)
+
+        probe, token = start_probe()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Wrappers attach to the (lazy) connection objects, so this also
+                # covers databases first used during the request.
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(probe))
+                response = self.get_response(request)
+        finally:
+            stop_probe(token)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        record_request({
+            'at': timezone.now().isoformat(),
+            'route': (match.view_name or match.route) if match else 'unresolved',
+            'method': request.method,
+            'status': response.status_code,
+            'queries': probe.queries,
+            'db_ms': round(probe.db_seconds * 1000, 3),
+            'serialize_ms': round(probe.serialize_seconds * 1000, 3),
+            'render_ms': round(probe.render_seconds * 1000, 3),
+            'total_ms': round(elapsed * 1000, 3),
+            'bytes': None if response.streaming else len(response.content),
+        }, probe)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        probe = current_probe()
+        if probe is not None:
+            probe.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: _stop_render(probe))
+        return response
+
+
+def _stop_render(probe):
+    probe.render_seconds += time.perf_counter() - probe.render_started
+
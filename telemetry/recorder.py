@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_probe = ContextVar('telemetry_probe', default=None)
+
+
+# ==========================================
+# 1. PER-REQUEST PROBE
+# ==========================================
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+
+
+def fingerprint(sql):
+    """
+    Normalises SQL so that the same statement with other parameters, or
+    with an IN list of another length, maps to the same fingerprint.
+    """
+    shape = _IN_LISTS.sub('IN (...)', _LITERALS.sub('?', sql))
+    shape = ' '.join(shape.split())
+    return hashlib.sha1(shape.encode()).hexdigest()[:12], shape
+
+
+class Probe:
+    """Collects what one request spends in the database and in serializers."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.render_started = None
+        self.render_seconds = 0.0
+        self.statements = Counter()
+        self.shapes = {}
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+            key, shape = fingerprint(sql)
+            self.statements[key] += 1
+            self.shapes.setdefault(key, shape)
+
+    def duplicates(self, limit=5):
+        """[(fingerprint, count, sql)] for statements run more than once."""
+        return [
+            (key, count, self.shapes[key][:300])
+            for key, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+
+def current_probe():
+    return _probe.get()
+
+
+def start_probe():
+    probe = Probe()
+    return probe, _probe.set(probe)
+
+
+def stop_probe(token):
+    _probe.reset(token)
+
+
+def instrument_serializers():
+    """
+    Times `Serializer.data` / `ListSerializer.data`. Nested serializers are
+    rendered inside the outer call, so only the outermost one is counted.
+    """
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__['data']
+        if getattr(prop.fget, '_telemetry', False):
+            continue
+
+        def timed(self, _fget=prop.fget):
+            probe = _probe.get()
+            if probe is None:
+                return _fget(self)
+            probe._serializer_depth += 1
+            started = time.perf_counter()
+            try:
+                return _fget(self)
+            finally:
+                probe._serializer_depth -= 1
+                if not probe._serializer_depth:
+                    probe.serialize_seconds += time.perf_counter() - started
+
+        timed._telemetry = True
+        setattr(cls, 'data', property(timed))
+
+
+# ==========================================
+# 2. SINKS
+# ==========================================
+
+class RingBuffer:
+    """The last `size` request records of this process."""
+
+    def __init__(self, size=1000):
+        self._records = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+class JsonlSink:
+    """Appends one JSON document per request to a file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':'), default=str) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', buffering=1, encoding='utf-8')
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+buffer = RingBuffer(getattr(settings, 'TELEMETRY_BUFFER_SIZE', 1000))
+_sink = None
+
+
+def get_sink():
+    global _sink
+    path = getattr(settings, 'TELEMETRY_SINK', None)
+    if path and _sink is None:
+        _sink = JsonlSink(path)
+    return _sink
+
+
+# ==========================================
+# 3. BUDGETS & AGGREGATES
+# ==========================================
+
+def budget_for(method, route):
+    """'<METHOD> <url name>' entries win over plain '<url name>' ones."""
+    budgets = getattr(settings, 'TELEMETRY_BUDGETS', {})
+    for key in (f'{method} {route}', route):
+        if key in budgets:
+            return budgets[key]
+    return getattr(settings, 'TELEMETRY_DEFAULT_BUDGET', {})
+
+
+def over_budget(record):
+    """Names of the budget limits `record` exceeded."""
+    budget = budget_for(record['method'], record['route'])
+    return [name for name, limit in budget.items() if (record.get(name) or 0) > limit]
+
+
+def record_request(record, probe):
+    exceeded = over_budget(record)
+    if exceeded:
+        record['over_budget'] = exceeded
+        record['repeated'] = [[key, count] for key, count, _ in probe.duplicates()]
+    buffer.append(record)
+    sink = get_sink()
+    if sink is not None:
+        try:
+            sink.write(record)
+        except OSError:
+            logger.exception("Could not write telemetry to %s", sink.path)
+    if exceeded:
+        logger.warning(
+            "%s %s over budget (%s): %d queries, %.1f ms db, %.1f ms total; repeated: %s",
+            record['method'], record['route'], ', '.join(exceeded), record['queries'],
+            record['db_ms'], record['total_ms'],
+            '; '.join(f"{count}x [{key}] {sql}" for key, count, sql in probe.duplicates()) or 'none',
+        )
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(records):
+    """Per-route aggregates of the given records."""
+    routes = {}
+    for record in records:
+        routes.setdefault(record['route'], []).append(record)
+    summary = {}
+    for route, rows in sorted(routes.items()):
+        latencies = [row['total_ms'] for row in rows]
+        summary[route] = {
+            'requests': len(rows),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'avg_queries': round(sum(row['queries'] for row in rows) / len(rows), 2),
+            'max_queries': max(row['queries'] for row in rows),
+            'avg_db_ms': round(sum(row['db_ms'] for row in rows) / len(rows), 2),
+            'over_budget': sum(1 for row in rows if row.get('over_budget')),
+        }
+    return summary
@@ -0,0 +1,30 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from pre_registration.reaper import expiry_reaper
+from telemetry.recorder import buffer, summarize
+
+
+class TelemetryView(APIView):
+    """
+    Internal: this process's recent request records and per-route aggregates.
+    URL: GET /api/telemetry/[?route=<url name>&limit=100]
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        records = buffer.snapshot()
+        route = request.query_params.get('route')
+        if route:
+            records = [record for record in records if record['route'] == route]
+        try:
+            limit = max(0, min(int(request.query_params.get('limit', 100)), len(records)))
+        except ValueError:
+            limit = 100
+        return Response({
+            'routes': summarize(records),
+            'recent': records[-limit:] if limit else [],
+            # Rows reclaimed by this process's expiry reaper thread.
+            'reaper': expiry_reaper.stats(),
+        })